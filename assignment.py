@@ -0,0 +1,111 @@
+"""Задача о назначениях минимальной стоимости для планирования всей армии.
+
+solve_assignment(cost) назначает строкам (юнитам) различные столбцы (клетки
+или места у целей) с минимальной суммарной стоимостью. Запрещенные пары
+помечаются стоимостью FORBIDDEN. Если установлен SciPy, используется
+scipy.optimize.linear_sum_assignment, иначе - тот же венгерский алгоритм
+кратчайших увеличивающих путей (Джонкер - Волгенант) на NumPy: строки
+добавляются по одной, каждый шаг пути - векторная операция над всеми столбцами.
+"""
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+# Стоимость запрещенной пары
+FORBIDDEN = np.inf
+
+
+def solve_assignment(cost):
+    """Возвращает (строки, столбцы) - массивы назначенных пар.
+
+    cost - матрица (строки, столбцы). Назначается наибольшее возможное число
+    строк; строки, которым не досталось допустимого столбца, в ответ не попадают.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    allowed = np.isfinite(cost)
+    rows_index = np.flatnonzero(allowed.any(axis=1))
+    cols_index = np.flatnonzero(allowed.any(axis=0))
+    if rows_index.size == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    cost = cost[np.ix_(rows_index, cols_index)]
+    allowed = allowed[np.ix_(rows_index, cols_index)]
+    # Запрещенные пары и пустые назначения стоят дороже любого назначения из
+    # допустимых пар: сначала назначается как можно больше строк, затем
+    # минимизируется стоимость
+    finite = cost[allowed]
+    penalty = (finite.max() - finite.min() + 1) * (min(cost.shape) + 1) + finite.max()
+    if linear_sum_assignment is not None:
+        rows, cols = linear_sum_assignment(np.where(allowed, cost, penalty))
+    else:
+        # Фиктивный столбец на каждую строку: увеличивающий путь есть всегда,
+        # и строка без допустимого столбца не закрепляет чужие назначения
+        dummy = np.full((cost.shape[0], cost.shape[0]), penalty)
+        rows, cols = shortest_augmenting_path(np.hstack([cost, dummy]))
+        real = cols < cost.shape[1]
+        rows, cols = rows[real], cols[real]
+    keep = allowed[rows, cols]
+    rows, cols = rows[keep], cols[keep]
+    return rows_index[rows], cols_index[cols]
+
+
+def shortest_augmenting_path(cost):
+    """Венгерский алгоритм для матрицы, где строк не больше, чем столбцов.
+
+    Для каждой новой строки алгоритмом Дейкстры по приведенным стоимостям
+    ищется кратчайший путь до свободного столбца, назначения вдоль пути
+    переставляются, потенциалы u, v обновляются. Ответ оптимален, если у
+    каждой строки есть путь к свободному столбцу (solve_assignment добавляет
+    фиктивные столбцы); строка без такого пути остается без назначения.
+    """
+    n, m = cost.shape
+    u = np.zeros(n)
+    v = np.zeros(m)
+    col_of_row = np.full(n, -1, dtype=np.intp)
+    row_of_col = np.full(m, -1, dtype=np.intp)
+    for current in range(n):
+        shortest = np.full(m, np.inf)
+        path = np.full(m, -1, dtype=np.intp)
+        visited = np.zeros(m, dtype=bool)
+        rows = [current]
+        row = current
+        min_value = 0.0
+        sink = -1
+        while True:
+            reduced = min_value + cost[row] - u[row] - v
+            better = (reduced < shortest) & ~visited
+            path[better] = row
+            shortest[better] = reduced[better]
+            candidates = np.where(visited, np.inf, shortest)
+            column = int(candidates.argmin())
+            min_value = candidates[column]
+            if min_value == np.inf:
+                break
+            # При равных длинах пути предпочитаем свободный столбец
+            ties = np.flatnonzero(candidates == min_value)
+            free = ties[row_of_col[ties] < 0]
+            if free.size:
+                column = int(free[0])
+            visited[column] = True
+            if row_of_col[column] < 0:
+                sink = column
+                break
+            row = int(row_of_col[column])
+            rows.append(row)
+        if sink < 0:
+            continue
+        u[current] += min_value
+        for row in rows[1:]:
+            u[row] += min_value - shortest[col_of_row[row]]
+        v[visited] -= min_value - shortest[visited]
+        column = sink
+        while True:
+            row = path[column]
+            row_of_col[column] = row
+            col_of_row[row], column = column, col_of_row[row]
+            if row == current:
+                break
+    rows = np.flatnonzero(col_of_row >= 0)
+    return rows, col_of_row[rows]
@@ -0,0 +1,108 @@
+import random
+
+from planner import PlannerBot, DIFFICULTY
+
+
+class GreedyBot:
+    """Стандартный бот: ближайший юнит идет к врагу, сильнейший атакует"""
+    name = "greedy"
+
+    def movement(self, game_state):
+        game_state.greedy_bot_movement()
+
+    def attack(self, game_state):
+        game_state.greedy_bot_attack()
+
+
+class RandomBot:
+    """Бот со случайными решениями: случайный юнит идет к случайному врагу"""
+    name = "random"
+
+    def movement(self, game_state):
+        available_units = [unit for unit in game_state.current_faction.units if not unit.is_moved]
+        enemies = game_state.enemy_units()
+        if available_units and enemies:
+            game_state.process_bot_movement(random.choice(available_units), [random.choice(enemies)])
+
+    def attack(self, game_state):
+        available_units = [unit for unit in game_state.current_faction.units if not unit.is_attacked]
+        random.shuffle(available_units)
+        for unit in available_units:
+            targets = game_state.attackable_targets(unit)
+            if targets:
+                game_state.process_bot_attack(unit, [random.choice(targets)])
+                return
+
+
+class SquadBot:
+    """Бот приказами отрядам: ближайший к врагу отряд идет строем, атакует отряд с наибольшим числом целей"""
+    name = "squad"
+
+    def movement(self, game_state):
+        faction = game_state.current_faction
+        pair = game_state.spatial.closest_pair([unit for unit in faction.units if not unit.is_moved])
+        if not pair:
+            return
+        unit, enemy, distance_sq = pair
+        squad = faction.squad_of(unit)
+        if squad is None:
+            game_state.process_bot_movement(unit, [enemy])
+            return
+        # Идем к врагу на всю дальность; занятая им клетка укоротит шаг при планировании
+        dx = (enemy.rect.x - unit.rect.x) // game_state.grid_size
+        dy = (enemy.rect.y - unit.rect.y) // game_state.grid_size
+        distance = distance_sq ** 0.5
+        step = min(unit.movement_range, distance)
+        if step > 0:
+            game_state.apply_squad_move(squad, (round(dx * step / distance), round(dy * step / distance)))
+
+    def attack(self, game_state):
+        best = None
+        for squad in game_state.current_faction.squads:
+            attackers = sum(1 for unit in squad.units
+                            if not unit.is_attacked and game_state.attackable_targets(unit))
+            if attackers and (best is None or attackers > best[0]):
+                best = (attackers, squad)
+        if best:
+            game_state.apply_squad_attack(best[1])
+            game_state.check_victory()
+
+
+class ArmyBot:
+    """Бот всей армией: каждый готовый юнит ходит и атакует по общему плану
+    (задача о назначениях, см. orders.plan_army_move и plan_army_attack)"""
+    name = "army"
+
+    def movement(self, game_state):
+        units = [unit for unit in game_state.current_faction.units if not unit.is_moved]
+        if units and game_state.enemy_units():
+            game_state.apply_army_move(units)
+
+    def attack(self, game_state):
+        attacks, kills = game_state.apply_army_attack(game_state.current_faction.units)
+        if attacks:
+            game_state.log(f"Бот: {attacks} атак, уничтожено {kills}")
+            game_state.check_victory()
+
+
+class IdleBot:
+    """Бот, который только бросает кубики и никогда не действует"""
+    name = "idle"
+
+    def movement(self, game_state):
+        pass
+
+    def attack(self, game_state):
+        pass
+
+
+BOT_POLICIES = {policy.name: policy for policy in (GreedyBot, RandomBot, SquadBot, ArmyBot, IdleBot, PlannerBot)}
+
+
+def make_policy(name):
+    """Создает стратегию бота по имени; уровень сложности из DIFFICULTY - планировщик с его бюджетом"""
+    if name in DIFFICULTY:
+        return PlannerBot(DIFFICULTY[name])
+    if name not in BOT_POLICIES:
+        raise ValueError(f"Неизвестная стратегия бота: {name}")
+    return BOT_POLICIES[name]()
@@ -0,0 +1,86 @@
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+
+
+def default_strength(stats):
+    """Боевая ценность юнита по его характеристикам из squads.json"""
+    health = stats.get("health", 100)
+    attack = stats.get("attack", 20)
+    defense = stats.get("defense", 15)
+    attack_range = stats.get("attack_range", 1)
+    movement_range = stats.get("movement_range", 2)
+    return (health * attack) ** 0.5 + defense + 5 * attack_range + 2 * movement_range
+
+
+def plan_army(budget, squad_data, strength=default_strength, max_share=0.5):
+    """Подбирает состав армии с максимальной суммарной силой в пределах бюджета.
+
+    Решается ограниченная задача о рюкзаке по всем типам из squad_data. Ни на
+    один тип не тратится больше max_share бюджета (но хотя бы один юнит типа
+    допускается). Возвращает словарь {тип: количество}.
+    """
+    items = []
+    for unit_type in sorted(squad_data):
+        stats = squad_data[unit_type]
+        cost = int(stats.get("cost", 100))
+        if cost <= 0 or cost > budget:
+            continue
+        limit = max(1, int(budget * max_share) // cost)
+        items.append((unit_type, cost, float(strength(stats)), limit))
+    if not items:
+        return {}
+    counts = _solve(int(budget), tuple(items))
+    return {unit_type: count for unit_type, count in counts if count}
+
+
+def expand_army(counts):
+    """Разворачивает {тип: количество} в список типов для размещения"""
+    units = []
+    for unit_type, count in counts.items():
+        units.extend([unit_type] * count)
+    return units
+
+
+@lru_cache(maxsize=256)
+def _solve(budget, items):
+    # Сокращаем стоимости и бюджет на общий делитель: для кратных 50 стоимостей
+    # таблица становится в 50 раз короче
+    step = 0
+    for _, cost, _, _ in items:
+        step = gcd(step, cost)
+    capacity = budget // step
+
+    # Двоичное разбиение ограниченного количества на предметы 0/1
+    pieces = []
+    for index, (_, cost, value, limit) in enumerate(items):
+        size = 1
+        while limit > 0:
+            take = min(size, limit)
+            pieces.append((index, take, take * cost // step, take * value))
+            limit -= take
+            size *= 2
+
+    # Строка таблицы для очередного предмета считается целиком сдвигом массива:
+    # кандидаты берутся из прежней строки, как при обходе емкостей с конца
+    best = np.zeros(capacity + 1)
+    taken = []
+    for _, _, weight, value in pieces:
+        row = np.zeros(capacity + 1, dtype=bool)
+        if weight <= capacity:
+            candidate = best[:capacity + 1 - weight] + value
+            better = candidate > best[weight:]
+            row[weight:] = better
+            best[weight:][better] = candidate[better]
+        taken.append(row)
+
+    # Восстанавливаем выбор с конца таблицы
+    counts = [0] * len(items)
+    c = capacity
+    for piece, row in zip(reversed(pieces), reversed(taken)):
+        if row[c]:
+            index, take, weight, _ = piece
+            counts[index] += take
+            c -= weight
+    return tuple((items[i][0], counts[i]) for i in range(len(items)))
@@ -0,0 +1,96 @@
+import random
+
+
+def line_offsets(count):
+    """Шеренга поперек направления на противника"""
+    return [(0, i) for i in range(count)]
+
+
+def column_offsets(count):
+    """Колонна в два ряда, вытянутая в сторону противника"""
+    return [(i // 2, i % 2) for i in range(count)]
+
+
+def wedge_offsets(count):
+    """Клин острием к противнику"""
+    offsets = [(0, 0)]
+    k = 1
+    while len(offsets) < count:
+        offsets.append((-k, -k))
+        if len(offsets) < count:
+            offsets.append((-k, k))
+        k += 1
+    return offsets[:count]
+
+
+FORMATIONS = {
+    "line": line_offsets,
+    "column": column_offsets,
+    "wedge": wedge_offsets,
+    "spread": None,  # случайное размещение по свободным клеткам зоны
+}
+
+
+class Deployment:
+    """Размещение юнитов в зоне без повторных попыток.
+
+    Свободные клетки зоны хранятся в списке с индексом позиций, поэтому выборка
+    случайной клетки без возвращения и удаление занятой клетки выполняются за O(1).
+    """
+
+    # Сколько случайных якорей пробуем для шаблонного построения
+    ANCHOR_TRIES = 32
+
+    def __init__(self, grid, zone=None, facing=1, blocked=None):
+        self.facing = facing
+        mask = grid.free_mask()
+        if zone:
+            mask &= grid.zone_mask(*zone)
+        # blocked - клетки, где стоять нельзя (например, непроходимая местность)
+        blocked = blocked or ()
+        self.free = [cell for cell in grid.cells(mask) if cell not in blocked]
+        self.positions = {cell: i for i, cell in enumerate(self.free)}
+
+    def available(self):
+        return len(self.free)
+
+    def take(self, cell):
+        """Убирает клетку из свободных (замена последним элементом)"""
+        i = self.positions.pop(cell)
+        last = self.free.pop()
+        if last != cell:
+            self.free[i] = last
+            self.positions[last] = i
+
+    def sample(self, count):
+        """Случайные свободные клетки без возвращения"""
+        cells = []
+        for _ in range(count):
+            cell = self.free[random.randrange(len(self.free))]
+            self.take(cell)
+            cells.append(cell)
+        return cells
+
+    def reserve(self, count, formation="spread"):
+        """Резервирует клетки под count юнитов в заданном построении.
+
+        Возвращает список клеток или None, если места в зоне не хватает.
+        Если шаблон построения не помещается, юниты расставляются вразброс.
+        """
+        if formation not in FORMATIONS:
+            raise ValueError(f"Неизвестное построение: {formation}")
+        if count > len(self.free):
+            return None
+        template = FORMATIONS[formation]
+        if template is None or count == 0:
+            return self.sample(count)
+
+        offsets = [(dx * self.facing, dy) for dx, dy in template(count)]
+        for _ in range(min(self.ANCHOR_TRIES, len(self.free))):
+            ax, ay = self.free[random.randrange(len(self.free))]
+            cells = [(ax + dx, ay + dy) for dx, dy in offsets]
+            if all(cell in self.positions for cell in cells):
+                for cell in cells:
+                    self.take(cell)
+                return cells
+        return self.sample(count)
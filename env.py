@@ -0,0 +1,291 @@
+"""Программный интерфейс игры для обучения ботов в стиле Gym.
+
+GameEnv управляет одной фракцией ("обучаемой"), остальные играют стратегиями
+из bots.py. Броски кубиков и фаза морали выполняются автоматически; решения
+принимаются в фазах движения и атаки.
+
+Действие - целое число. Последнее действие (PASS) завершает фазу, остальные
+кодируют (клетка юнита, смещение в окне (2 * reach + 1) x (2 * reach + 1)):
+в фазе движения это клетка назначения, в фазе атаки - клетка цели.
+Допустимые действия возвращаются в info["action_mask"] (bytearray, 1 -
+действие разрешено правилами).
+
+Пример:
+    env = GameEnv(seed=1)
+    obs, info = env.reset()
+    while True:
+        action = random.choice(env.legal_actions())
+        obs, reward, terminated, truncated, info = env.step(action)
+        if terminated or truncated:
+            break
+"""
+import multiprocessing
+import random
+
+from simulate import make_headless_game
+from unit import SQUAD_DATA
+
+
+class GameEnv:
+    """Одна игра с интерфейсом reset()/step(action)"""
+
+    def __init__(self, seed=None, budgets=(1000, 1000), opponents=("greedy",), board=(18, 18),
+                 factions=2, max_turns=200, reach=None, terrain=None):
+        self.budgets = budgets
+        self.opponents = opponents
+        self.board = board
+        self.factions = factions
+        self.max_turns = max_turns
+        self.terrain = terrain  # TerrainMap; каждая игра получает свою копию
+        if reach is None:
+            reach = max(max(data.get("movement_range", 1), data.get("attack_range", 1))
+                        for data in SQUAD_DATA.values())
+        self.reach = reach
+        self.window = 2 * reach + 1
+        self.cells = board[0] * board[1]
+        self.pass_action = self.cells * self.window * self.window
+        self.action_count = self.pass_action + 1
+        # У каждой среды свой генератор: игра пользуется модулем random, поэтому
+        # его состояние подменяется на время шага
+        self.rng_state = random.Random(seed).getstate()
+        self.game_state = None
+        self.faction = None
+
+    def reset(self, seed=None):
+        """Начинает новую игру; возвращает (наблюдение, info)"""
+        if seed is not None:
+            self.rng_state = random.Random(seed).getstate()
+        with self._rng():
+            policies = ("idle",) + tuple(self.opponents)
+            gs = make_headless_game(self.budgets, policies, self.board, self.factions, self.terrain)
+            gs.start_game()
+            # Армия обучаемой фракции расставлена как у бота, дальше ходы решает среда
+            self.faction = gs.player_faction
+            gs.bot_factions.discard(self.faction.name)
+            self.game_state = gs
+            self._advance()
+        return self.observe(), self._info()
+
+    def step(self, action):
+        """Выполняет действие; возвращает (наблюдение, награда, конец, обрезано, info)"""
+        gs = self.game_state
+        if not self.action_mask()[action]:
+            raise ValueError(f"недопустимое действие {action} в фазе {gs.current_phase}")
+        own_before, enemy_before = self._health()
+        with self._rng():
+            if action == self.pass_action:
+                gs.proceed_to_next_phase()
+            else:
+                unit, grid_x, grid_y = self.decode(action)
+                if gs.current_phase == "Movement":
+                    gs.move_unit(unit, grid_x, grid_y)
+                else:
+                    gs.attack_target(unit, gs.grid.at(grid_x, grid_y))
+            self._advance()
+        own_after, enemy_after = self._health()
+        reward = ((enemy_before - enemy_after) - (own_before - own_after)) / 100
+        terminated = gs.state == "game_over"
+        if terminated:
+            reward += 1 if gs.winner == self.faction.name else -1
+        truncated = not terminated and gs.turn_number > self.max_turns
+        return self.observe(), reward, terminated, truncated, self._info()
+
+    def observe(self):
+        """Наблюдение: плоскости поля (каналы x высота x ширина, см. observation.py).
+
+        Это представление только для чтения, которое меняется вместе с игрой;
+        чтобы сохранить наблюдение, сделайте copy().
+        """
+        return self.game_state.observation().view()
+
+    def decode(self, action):
+        """Действие -> (юнит, клетка x, клетка y)"""
+        source, offset = divmod(action, self.window * self.window)
+        width = self.board[0]
+        dy, dx = divmod(offset, self.window)
+        return (self.game_state.grid.at(source % width, source // width),
+                source % width + dx - self.reach, source // width + dy - self.reach)
+
+    def encode(self, unit, grid_x, grid_y):
+        """(юнит, клетка x, клетка y) -> действие"""
+        gs = self.game_state
+        unit_x = unit.rect.x // gs.grid_size
+        unit_y = unit.rect.y // gs.grid_size
+        offset = (grid_y - unit_y + self.reach) * self.window + (grid_x - unit_x + self.reach)
+        return (unit_y * self.board[0] + unit_x) * self.window * self.window + offset
+
+    def action_mask(self):
+        """Маска допустимых действий по правилам движения и атаки"""
+        mask = bytearray(self.action_count)
+        mask[self.pass_action] = 1
+        for action in self._rule_actions():
+            mask[action] = 1
+        return mask
+
+    def legal_actions(self):
+        return list(self._rule_actions()) + [self.pass_action]
+
+    def _rule_actions(self):
+        gs = self.game_state
+        if (gs.state != "turn" or gs.current_faction is not self.faction or
+                not gs.phase_roll_complete):
+            return
+        if gs.current_phase == "Movement":
+            for unit in self.faction.units:
+                if unit.is_moved:
+                    continue
+                unit_x = unit.rect.x // gs.grid_size
+                unit_y = unit.rect.y // gs.grid_size
+                limit = min(unit.movement_range, self.reach)
+                reach = gs.reachable(unit)
+                for dy in range(-limit, limit + 1):
+                    for dx in range(-limit, limit + 1):
+                        grid_x, grid_y = unit_x + dx, unit_y + dy
+                        if (grid_x, grid_y) in reach and gs.grid.is_free(grid_x, grid_y):
+                            yield self.encode(unit, grid_x, grid_y)
+        elif gs.current_phase == "Attack":
+            for unit in self.faction.units:
+                if unit.is_attacked:
+                    continue
+                unit_x = unit.rect.x // gs.grid_size
+                unit_y = unit.rect.y // gs.grid_size
+                for target in gs.attackable_targets(unit):
+                    grid_x = target.rect.x // gs.grid_size
+                    grid_y = target.rect.y // gs.grid_size
+                    if abs(grid_x - unit_x) <= self.reach and abs(grid_y - unit_y) <= self.reach:
+                        yield self.encode(unit, grid_x, grid_y)
+
+    def _advance(self):
+        """Играет за ботов и автоматические шаги до следующего решения обучаемой фракции"""
+        gs = self.game_state
+        while gs.state == "turn" and gs.turn_number <= self.max_turns:
+            if gs.current_phase is None:
+                gs.begin_turn()  # ход бота играется целиком
+                continue
+            if gs.current_faction is not self.faction:
+                break
+            if not gs.phase_roll_complete:
+                gs.roll_dice_for_phase()
+                continue
+            if gs.current_phase in ["Movement", "Attack"] and next(self._rule_actions(), None) is not None:
+                break
+            # Морали и фазе без допустимых действий решение не нужно
+            gs.proceed_to_next_phase()
+
+    def _health(self):
+        own = sum(unit.health for unit in self.faction.units)
+        enemy = sum(unit.health for unit in self.game_state.enemy_units(self.faction))
+        return own, enemy
+
+    def _info(self):
+        gs = self.game_state
+        return {"action_mask": self.action_mask(), "turn": gs.turn_number, "winner": gs.winner}
+
+    def _rng(self):
+        return _SwapRandom(self)
+
+
+class _SwapRandom:
+    """Подменяет состояние модуля random на генератор среды на время шага"""
+
+    def __init__(self, env):
+        self.env = env
+
+    def __enter__(self):
+        self.saved = random.getstate()
+        random.setstate(self.env.rng_state)
+
+    def __exit__(self, *exc):
+        self.env.rng_state = random.getstate()
+        random.setstate(self.saved)
+
+
+class VectorEnv:
+    """Несколько независимых игр, которые шагают одним вызовом.
+
+    Закончившаяся игра сразу начинается заново; её последнее наблюдение
+    кладется в info["final_observation"].
+    """
+
+    def __init__(self, count, seed=0, **kwargs):
+        self.envs = [GameEnv(seed=seed + index, **kwargs) for index in range(count)]
+        self.action_count = self.envs[0].action_count
+
+    def reset(self):
+        results = [env.reset() for env in self.envs]
+        return [obs for obs, _ in results], [info for _, info in results]
+
+    def step(self, actions):
+        return _transpose([_step_autoreset(env, action) for env, action in zip(self.envs, actions)])
+
+    def close(self):
+        pass
+
+
+def _step_autoreset(env, action):
+    obs, reward, terminated, truncated, info = env.step(action)
+    if terminated or truncated:
+        final = obs
+        obs, info = env.reset()
+        info["final_observation"] = final
+    return obs, reward, terminated, truncated, info
+
+
+def _transpose(results):
+    return tuple(list(column) for column in zip(*results))
+
+
+def _worker(connection, seeds, kwargs):
+    envs = [GameEnv(seed=seed, **kwargs) for seed in seeds]
+    while True:
+        command, data = connection.recv()
+        if command == "reset":
+            connection.send([env.reset() for env in envs])
+        elif command == "step":
+            connection.send([_step_autoreset(env, action) for env, action in zip(envs, data)])
+        elif command == "close":
+            connection.close()
+            return
+
+
+class SubprocVectorEnv:
+    """VectorEnv, игры которого распределены по процессам-обработчикам"""
+
+    def __init__(self, count, workers=None, seed=0, **kwargs):
+        # Игра с номером i живет в обработчике i % workers
+        workers = min(count, workers or multiprocessing.cpu_count())
+        seeds = list(range(seed, seed + count))
+        self.count = count
+        self.connections = []
+        self.processes = []
+        for index in range(workers):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker, args=(child, seeds[index::workers], kwargs),
+                                              daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+        self.action_count = GameEnv(**kwargs).action_count
+
+    def reset(self):
+        for connection in self.connections:
+            connection.send(("reset", None))
+        results = self._gather()
+        return [obs for obs, _ in results], [info for _, info in results]
+
+    def step(self, actions):
+        workers = len(self.connections)
+        for index, connection in enumerate(self.connections):
+            connection.send(("step", list(actions[index::workers])))
+        return _transpose(self._gather())
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(("close", None))
+        for process in self.processes:
+            process.join()
+
+    def _gather(self):
+        per_worker = [connection.recv() for connection in self.connections]
+        return [per_worker[index % len(per_worker)][index // len(per_worker)] for index in range(self.count)]
@@ -0,0 +1,94 @@
+import json
+import queue
+import socket
+import sys
+import threading
+import time
+
+# Маркер остановки потока записи
+_STOP = object()
+
+
+def open_sink(target):
+    """Открывает приемник событий.
+
+    target может быть путем к файлу, "-" (stdout), "tcp://host:port",
+    "unix:/путь/к/сокету" или уже открытым файловым объектом (например, pipe).
+    Возвращает (файловый объект, нужно ли закрывать его при остановке).
+    """
+    if not isinstance(target, str):
+        return target, False
+    if target == "-":
+        return sys.stdout, False
+    if target.startswith("tcp://"):
+        host, port = target[len("tcp://"):].rsplit(":", 1)
+        conn = socket.create_connection((host, int(port)))
+        return conn.makefile("w", encoding="utf-8"), True
+    if target.startswith("unix:"):
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.connect(target[len("unix:"):])
+        return conn.makefile("w", encoding="utf-8"), True
+    return open(target, "a", encoding="utf-8"), True
+
+
+class EventStream:
+    """Поток игровых событий в формате JSON Lines.
+
+    publish() только кладет событие в ограниченную очередь и никогда не
+    блокирует игровой цикл: если приемник не успевает, новые события
+    отбрасываются и учитываются в счетчике dropped. Запись идет в фоновом потоке;
+    dropped увеличивают оба потока, поэтому только под блокировкой.
+    """
+
+    def __init__(self, target, maxsize=10000):
+        self.sink, self.owns_sink = open_sink(target)
+        self.queue = queue.Queue(maxsize)
+        self.dropped = 0
+        self.dropped_lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def publish(self, event_type, **data):
+        event = {"type": event_type, "ts": time.time()}
+        event.update(data)
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self._count_dropped(1)
+
+    def close(self, timeout=5.0):
+        """Дописывает очередь и закрывает приемник"""
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self.thread.join(timeout)
+        if self.owns_sink:
+            self.sink.close()
+
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            # Забираем все накопившиеся события и пишем их одним блоком
+            batch = [event]
+            while batch[-1] is not _STOP:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            if stop:
+                batch.pop()
+            try:
+                if batch:
+                    self.sink.write("".join(json.dumps(item, ensure_ascii=False) + "\n" for item in batch))
+                    self.sink.flush()
+            except (OSError, ValueError):
+                # Приемник закрыт (например, зритель отключился) - события теряются
+                self._count_dropped(len(batch))
+            if stop:
+                return
+
+    def _count_dropped(self, count):
+        with self.dropped_lock:
+            self.dropped += count
@@ -12,10 +12,22 @@ class Faction:
         
         # Загружаем стоимость юнитов из внешнего файла
         self.unit_costs = {}
+        self.refresh_unit_costs()
+    
+    def refresh_unit_costs(self):
+        """Обновляет стоимость юнитов после перезагрузки squads.json"""
+        self.unit_costs.clear()
         for unit_type, data in SQUAD_DATA.items():
             self.unit_costs[unit_type] = data.get('cost', 100)
     
-    def create_squad(self, name, unit_type, num_units=1):
+    def create_squad(self, name, unit_type, num_units=1, *, deployment,
+                     formation="spread", grid_size=32):
+        """Создает отряд в клетках, которые резервирует deployment.
+
+        deployment - обязательный именованный аргумент: размещение в зоне
+        фракции на реальном поле с учетом уже занятых клеток
+        (GameState.make_deployment); юниты на сетку не ставятся.
+        """
         # Проверяем, существует ли такой тип юнита
         if unit_type not in SQUAD_DATA:
             print(f"Ошибка: тип юнита '{unit_type}' не найден в squads.json")
@@ -26,12 +38,15 @@ class Faction:
         total_cost = unit_cost * num_units
         
         if total_cost <= self.resources:
+            # Клетки резервируем заранее: либо место есть для всех, либо отряд не создается
+            cells = deployment.reserve(num_units, formation)
+            if cells is None:
+                print(f"Ошибка: недостаточно места для отряда '{name}' ({num_units} юнитов)")
+                return None
+            
             squad_units = []
-            for _ in range(num_units):
-                # Случайное размещение
-                x = random.randint(0, 600)
-                y = random.randint(0, 600)
-                unit = Unit(x, y, unit_type, self.name)
+            for grid_x, grid_y in cells:
+                unit = Unit(grid_x * grid_size, grid_y * grid_size, unit_type, self.name)
                 squad_units.append(unit)
                 self.units.append(unit)
             
@@ -68,6 +83,31 @@ class Faction:
                 if not squad.units:
                     self.squads.remove(squad)
     
+    def squad_of(self, unit):
+        """Отряд, в котором состоит юнит, или None"""
+        for squad in self.squads:
+            if unit in squad.units:
+                return squad
+        return None
+    
+    def group_units_by_type(self):
+        """Собирает юнитов, не входящих в отряды, в отряды по типу"""
+        grouped = {unit for squad in self.squads for unit in squad.units}
+        by_type = {}
+        for unit in self.units:
+            if unit not in grouped:
+                by_type.setdefault(unit.unit_type, []).append(unit)
+        for unit_type, units in by_type.items():
+            self.squads.append(Squad(f"{unit_type.capitalize()} {len(self.squads) + 1}",
+                                     unit_type, units, self))
+    
+    def army_composition(self):
+        """Состав армии по отрядам: тип юнита -> число юнитов"""
+        counts = {}
+        for squad in self.squads:
+            counts[squad.unit_type] = counts.get(squad.unit_type, 0) + len(squad.units)
+        return counts
+    
     def has_units(self):
         return len(self.units) > 0
     
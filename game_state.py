@@ -0,0 +1,1474 @@
+import pygame
+from faction import Faction
+import random
+import time
+from visibility import Visibility
+from sprites import SpriteAtlas
+from targeting import TargetIndex
+from spatial import SpatialIndex
+from deployment import Deployment
+from composition import plan_army, expand_army, default_strength
+from unit import Unit, SQUAD_DATA, FACTION_COLORS, DEFAULT_FACTION_COLOR, advance_unit_ids
+from bots import make_policy
+from turns import TurnScheduler, roll_initiative
+from orders import plan_squad_move, assign_targets, plan_army_move, plan_army_attack
+from observation import BoardPlanes
+from occupancy import OccupancyGrid
+from transposition import ZobristHash
+from terrain import TerrainMap, ReachabilityCache, TERRAIN_TYPES
+import odds
+
+# Цвет и прозрачность клеток, скрытых туманом войны
+FOG_COLOR = (10, 10, 10, 170)
+
+
+def merge_rects(rects, bounds):
+    """Обрезает прямоугольники по bounds и объединяет пересекающиеся;
+    непересекающиеся остаются отдельными"""
+    merged = []
+    for rect in rects:
+        rect = rect.clip(bounds)
+        if not rect.width or not rect.height:
+            continue
+        index = rect.collidelist(merged)
+        while index >= 0:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class GameState:
+    def __init__(self, surface, bot_factions=("faction2",), factions=("faction1", "faction2")):
+        self.surface = surface
+        self.factions = [Faction(name) for name in factions]
+        self.factions_by_name = {faction.name: faction for faction in self.factions}
+        # Первые две фракции - сторона игрока и сторона бота в интерфейсе
+        self.player_faction = self.factions[0]
+        self.bot_faction = self.factions[1]
+        self.current_faction = self.player_faction
+        self.state = "setup"  # setup, turn, game_over
+        self.selected_unit = None
+        self.current_action = None  # move, attack
+        self.action_menu = None
+        self.grid_size = 32
+        
+        # Фракции под управлением бота (пустой набор - игра двух людей по сети)
+        self.bot_factions = set(bot_factions)
+        self.bot_policies = {name: make_policy("greedy") for name in self.bot_factions}
+        
+        # step_turns=True: ход не начинается сам после end_turn, его запускает
+        # внешний цикл через begin_turn() (так бот против бота не уходит в рекурсию)
+        self.step_turns = False
+        self.turn_number = 0
+        self.winner = None
+        
+        # Инициализация сетки: занятость клеток хранится id юнитов в массиве int32
+        self.grid = OccupancyGrid(surface.get_width() // self.grid_size,
+                                  surface.get_height() // self.grid_size)
+        
+        # Видимость и туман войны, обновляются при изменении занятости клеток
+        self.visibility = Visibility(self.grid)
+        self.target_index = TargetIndex(self.grid)
+        self.spatial = SpatialIndex(self.grid.width, self.grid.height)
+        # Очередь ходов и счетчики живых юнитов по фракциям
+        self.scheduler = TurnScheduler(self.factions_by_name)
+        # Хеш позиции для таблиц транспозиций поисковых ботов
+        self.zobrist = ZobristHash()
+        # Местность (None - ровное поле) и кэш досягаемых клеток
+        self.terrain = None
+        self.reachability = ReachabilityCache(self.grid)
+        self.grid_listeners = [self.visibility, self.target_index, self.spatial, self.scheduler,
+                               self.zobrist, self.reachability]
+        self.units_by_id = self.grid.units
+        
+        # Подписчики изменений характеристик и флагов юнитов без смены клетки
+        self.unit_listeners = [self.zobrist]
+        self.planes = None
+        
+        # Кэши отрисовки: плитки юнитов, фон, слой тумана и прошлый кадр
+        self.sprite_atlas = SpriteAtlas(self.grid_size)
+        self._backgrounds = {}
+        self._fog = None
+        self._fog_seen = None  # видимость клеток, по которой собран слой тумана
+        self._fog_version = None
+        self._frame_key = None
+        self._frame_units = None
+        
+        # Поток структурированных событий (events.EventStream), подключается снаружи
+        self.events = None
+        
+        # Turn phases (состояние фаз хранится отдельно для каждой фракции)
+        self.phases = ["Movement", "Attack", "Morale"]
+        
+        # Метрика силы юнита для подбора армии бота
+        self.bot_strength = default_strength
+        
+        # Зоны расстановки - полосы через одну по ширине поля
+        width = self.grid.width
+        slots = 2 * len(self.factions) - 1
+        self.setup_zones = {}
+        for index, faction in enumerate(self.factions):
+            end = width if index == len(self.factions) - 1 else (2 * index + 1) * width // slots
+            self.setup_zones[faction.name] = (2 * index * width // slots, end)
+    
+    @property
+    def phase_state(self):
+        """Состояние фаз текущей фракции"""
+        return self.scheduler.phase_states[self.current_faction.name]
+    
+    @property
+    def current_phase_index(self):
+        return self.phase_state.index
+    
+    @current_phase_index.setter
+    def current_phase_index(self, index):
+        self.phase_state.index = index
+    
+    @property
+    def current_phase(self):
+        index = self.phase_state.index
+        return self.phases[index] if 0 <= index < len(self.phases) else None
+    
+    @current_phase.setter
+    def current_phase(self, phase):
+        self.phase_state.index = self.phases.index(phase) if phase is not None else -1
+    
+    @property
+    def phase_roll_complete(self):
+        return self.phase_state.rolled
+    
+    @phase_roll_complete.setter
+    def phase_roll_complete(self, rolled):
+        self.phase_state.rolled = rolled
+    
+    @property
+    def dice_roll(self):
+        return self.phase_state.dice
+    
+    @dice_roll.setter
+    def dice_roll(self, dice):
+        self.phase_state.dice = dice
+    
+    def set_action_menu(self, menu):
+        self.action_menu = menu
+    
+    def log(self, message):
+        """Пишет сообщение в лог действий, если меню подключено"""
+        if self.action_menu:
+            self.action_menu.add_to_log(message)
+    
+    def emit(self, event_type, **data):
+        """Публикует игровое событие в поток событий, если он подключен"""
+        if self.events is not None:
+            self.events.publish(event_type, **data)
+    
+    def unit_info(self, unit):
+        """Описание юнита для событий"""
+        return {"id": unit.id, "type": unit.unit_type, "faction": unit.faction,
+                "x": unit.rect.x // self.grid_size, "y": unit.rect.y // self.grid_size,
+                "health": unit.health}
+    
+    def finish_game(self, winner):
+        """Завершает игру победой фракции"""
+        self.state = "game_over"
+        self.winner = winner.name
+        self.log(f"Игра окончена! Победитель: {self.faction_title(winner)}")
+        self.emit("game_over", winner=winner.name)
+    
+    def check_victory(self):
+        """Завершает игру, если юниты остались не больше чем у одной фракции"""
+        if self.scheduler.living > 1:
+            return False
+        winner = self.scheduler.winner()
+        self.finish_game(self.factions_by_name[winner] if winner else self.current_faction)
+        return True
+    
+    def is_bot_turn(self):
+        """Ходит ли сейчас фракция под управлением бота"""
+        return self.state == "turn" and self.current_faction.name in self.bot_factions
+    
+    def faction_title(self, faction):
+        """Имя стороны для сообщений в логе"""
+        number = self.factions.index(faction) + 1
+        if faction.name in self.bot_factions:
+            return "Bot" if len(self.factions) == 2 else f"Bot {number}"
+        return f"Player {number}"
+    
+    def faction_color(self, faction_name):
+        return FACTION_COLORS.get(faction_name, DEFAULT_FACTION_COLOR)
+    
+    def enemy_units(self, faction=None):
+        """Юниты всех фракций, кроме данной (по умолчанию - текущей)"""
+        faction = faction or self.current_faction
+        return [unit for other in self.factions if other is not faction for unit in other.units]
+    
+    def snapshot(self):
+        """Компактный снимок состояния игры: фаза и юниты по id"""
+        units = {}
+        for faction in self.factions:
+            for unit in faction.units:
+                units[unit.id] = [unit.unit_type, unit.faction,
+                                  unit.rect.x // self.grid_size, unit.rect.y // self.grid_size,
+                                  unit.health, unit.attack, unit.defense,
+                                  int(unit.is_moved), int(unit.is_attacked)]
+        return {
+            "state": self.state,
+            "faction": self.current_faction.name,
+            "phase": self.current_phase,
+            "rolled": self.phase_roll_complete,
+            "dice": self.dice_roll,
+            "turn": self.turn_number,
+            "winner": self.winner,
+            "units": units,
+        }
+    
+    def restore(self, snapshot):
+        """Восстанавливает состояние из snapshot(); юниты создаются заново с прежними id"""
+        for grid_x, grid_y, unit in self.grid.occupied():
+            self.clear_cell(grid_x, grid_y)
+        for faction in self.factions:
+            faction.units = []
+            faction.squads = []
+        
+        for unit_id, row in snapshot["units"].items():
+            unit_type, faction_name, grid_x, grid_y, health, attack, defense, moved, attacked = row
+            unit = self.restore_unit(int(unit_id), unit_type, faction_name, grid_x, grid_y, health)
+            unit.attack, unit.defense = attack, defense
+            unit.is_moved, unit.is_attacked = bool(moved), bool(attacked)
+            self.unit_changed(unit)
+        
+        self.state = snapshot["state"]
+        self.current_faction = self.factions_by_name[snapshot["faction"]]
+        for phase_state in self.scheduler.phase_states.values():
+            phase_state.reset()
+        self.current_phase = snapshot["phase"]
+        self.phase_roll_complete = snapshot["rolled"]
+        self.dice_roll = snapshot["dice"]
+        self.turn_number = snapshot.get("turn", 0)
+        self.winner = snapshot.get("winner")
+        self.selected_unit = None
+        self.current_action = None
+        if self.state != "setup":
+            for faction in self.factions:
+                faction.group_units_by_type()
+        if self.state == "turn":
+            # Порядок инициативы в снимок не входит: ходы идут по кругу от текущей фракции
+            names = list(self.factions_by_name)
+            index = names.index(self.current_faction.name)
+            self.scheduler.start(names[index:] + names[:index])
+            self.scheduler.next_faction()
+    
+    def unit_changed(self, unit):
+        """Оповещает подписчиков об изменении здоровья, характеристик или флагов юнита"""
+        for listener in self.unit_listeners:
+            listener.on_unit_changed(unit)
+    
+    def set_terrain(self, terrain):
+        """Подключает карту местности (TerrainMap) того же размера, что и поле"""
+        if terrain is not None and (terrain.width, terrain.height) != (self.grid.width, self.grid.height):
+            raise ValueError(f"карта {terrain.width}x{terrain.height} не совпадает с полем "
+                             f"{self.grid.width}x{self.grid.height}")
+        self.terrain = terrain
+        if terrain is not None:
+            terrain.listeners.append(self)
+            terrain.listeners.append(self.reachability)
+        self.reachability.set_terrain(terrain)
+        self._backgrounds.clear()
+        self._frame_units = None
+    
+    def load_terrain(self, path):
+        """Загружает карту местности из файла (см. terrain.py)"""
+        self.set_terrain(TerrainMap.load(path))
+    
+    def on_terrain_changed(self, grid_x, grid_y):
+        self._backgrounds.clear()
+        self._frame_units = None
+    
+    def reachable(self, unit):
+        """Клетки, до которых юнит может дойти: {(x, y): стоимость пути}; включает занятые"""
+        return self.reachability.cells(unit.rect.x // self.grid_size, unit.rect.y // self.grid_size,
+                                       unit.movement_range, unit.faction)
+    
+    def defense_bonus(self, unit):
+        """Прибавка к защите юнита от местности его клетки"""
+        if self.terrain is None:
+            return 0
+        return self.terrain.defense(unit.rect.x // self.grid_size, unit.rect.y // self.grid_size)
+    
+    def odds_tooltip(self, x, y):
+        """Текст подсказки с шансами удара выбранного юнита по юниту в точке (x, y)
+        или None, если под курсором нет видимого врага выбранного юнита"""
+        grid_x, grid_y = int(x) // self.grid_size, int(y) // self.grid_size
+        attacker = self.selected_unit
+        if attacker is None or not self.grid.in_bounds(grid_x, grid_y):
+            return None
+        target = self.grid.at(grid_x, grid_y)
+        if target is None or target.faction == attacker.faction:
+            return None
+        # Враг в тумане войны не выдает себя подсказкой
+        if self.state != "setup" and not self.visibility.is_visible(attacker.faction, grid_x, grid_y):
+            return None
+        table = odds.odds_table()
+        bonus = self.defense_bonus(target)
+        lines = [f"{attacker.unit_type} → {target.unit_type} (здоровье {target.health})"]
+        if table.covers(attacker.unit_type, target.unit_type, bonus):
+            low, high = table.damage_range(attacker.unit_type, target.unit_type, bonus)
+            expected = table.expected_damage(attacker.unit_type, target.unit_type, bonus)
+            kill = table.kill_probability(attacker.unit_type, target.unit_type, target.health, 1, bonus)
+            hits = table.hits_to_kill(attacker.unit_type, target.unit_type, target.health, bonus)
+            lines.append(f"Урон: {expected:.1f} в среднем ({low}–{high} по броскам)")
+            lines.append(f"Убить одним ударом: {kill:.0%}")
+            lines.append("Ударов до убийства: " + ("—" if hits == float("inf") else f"{hits:.1f}"))
+        lines.append(f"Урон сейчас: {attacker.damage_against(target, bonus)}")
+        if bonus:
+            lines.append(f"Местность цели: защита +{bonus}")
+        return "\n".join(lines)
+    
+    def position_key(self):
+        """Хеш Зобриста позиции: юниты, фаза и фракция, которая ходит"""
+        return self.zobrist.key(self.current_phase, self.current_faction.name)
+    
+    def observation(self):
+        """Плоскости поля (observation.BoardPlanes); создаются при первом запросе и дальше
+        обновляются по событиям"""
+        if self.planes is None:
+            self.planes = BoardPlanes(self.grid.width, self.grid.height,
+                                      list(self.factions_by_name), list(SQUAD_DATA))
+            for grid_x, grid_y, unit in self.grid.occupied():
+                self.planes.on_cell_occupied(grid_x, grid_y, unit)
+            self.grid_listeners.append(self.planes)
+            self.unit_listeners.append(self.planes)
+        return self.planes
+    
+    def restore_unit(self, unit_id, unit_type, faction_name, grid_x, grid_y, health):
+        """Воссоздает юнита с известным id в клетке (для снимков и повторов)"""
+        unit = Unit(grid_x * self.grid_size, grid_y * self.grid_size, unit_type, faction_name)
+        unit.id = unit_id
+        unit.health = health
+        self.factions_by_name[faction_name].units.append(unit)
+        self.occupy_cell(grid_x, grid_y, unit)
+        advance_unit_ids(unit_id)
+        return unit
+    
+    def occupy_cell(self, grid_x, grid_y, unit):
+        """Ставит юнита в клетку сетки и оповещает подписчиков"""
+        self.grid.place(grid_x, grid_y, unit)
+        for listener in self.grid_listeners:
+            listener.on_cell_occupied(grid_x, grid_y, unit)
+    
+    def clear_cell(self, grid_x, grid_y):
+        """Освобождает клетку сетки и оповещает подписчиков"""
+        unit = self.grid.remove(grid_x, grid_y)
+        if unit is not None:
+            for listener in self.grid_listeners:
+                listener.on_cell_cleared(grid_x, grid_y, unit)
+    
+    def make_deployment(self, faction_name):
+        """Создает размещение по свободным клеткам зоны фракции"""
+        start, end = self.setup_zones[faction_name]
+        # Фронт зоны смотрит к центру поля
+        facing = 1 if start + end < self.grid.width else -1
+        blocked = self.terrain.impassable_cells() if self.terrain is not None else None
+        return Deployment(self.grid, self.setup_zones[faction_name], facing, blocked)
+    
+    def deploy_units(self, faction, unit_types, formation="spread"):
+        """Размещает юнитов перечисленных типов в зоне фракции.
+
+        Проверка места и ресурсов выполняется заранее: если разместить всех
+        нельзя, не размещается никто и возвращается пустой список.
+        """
+        total_cost = sum(faction.unit_costs.get(unit_type, 100) for unit_type in unit_types)
+        deployment = self.make_deployment(faction.name)
+        cells = None
+        if total_cost <= faction.resources:
+            cells = deployment.reserve(len(unit_types), formation)
+        if cells is None:
+            if self.action_menu:
+                self.action_menu.add_to_log(f"⚠️ Не удалось разместить {len(unit_types)} юнитов для {faction.name}")
+            return []
+        
+        placed = []
+        for unit_type, (grid_x, grid_y) in zip(unit_types, cells):
+            unit = faction.add_unit(grid_x * self.grid_size, grid_y * self.grid_size, unit_type)
+            self.occupy_cell(grid_x, grid_y, unit)
+            self.emit("placement", unit=self.unit_info(unit))
+            placed.append(unit)
+        return placed
+    
+    def create_squad(self, faction, name, unit_type, num_units=1, formation="spread"):
+        """Создает отряд фракции и ставит его юнитов на сетку"""
+        squad = faction.create_squad(name, unit_type, num_units,
+                                     deployment=self.make_deployment(faction.name),
+                                     formation=formation, grid_size=self.grid_size)
+        if squad:
+            for unit in squad.units:
+                self.occupy_cell(unit.rect.x // self.grid_size, unit.rect.y // self.grid_size, unit)
+        return squad
+    
+    def can_see(self, unit, target):
+        """Проверяет линию видимости от юнита до цели"""
+        return self.visibility.unit_sees(unit, target.rect.x // self.grid_size,
+                                         target.rect.y // self.grid_size)
+    
+    def attackable_targets(self, unit):
+        """Возвращает врагов в радиусе атаки юнита, которых он видит (по порядку id)"""
+        return sorted((target for target in self.target_index.targets_of(unit)
+                       if self.can_see(unit, target)), key=lambda target: target.id)
+    
+    def set_action(self, action):
+        self.current_action = action
+        
+        # Проверяем соответствие между действием и текущей фазой
+        if action in ["move", "squad_move"] and self.current_phase != "Movement":
+            if self.action_menu:
+                self.action_menu.add_to_log("⚠️ В текущей фазе движение недоступно!")
+            self.current_action = None
+            return
+            
+        if action == "attack" and self.current_phase != "Attack":
+            if self.action_menu:
+                self.action_menu.add_to_log("⚠️ В текущей фазе атака недоступна!")
+            self.current_action = None
+            return
+        
+        # Если действие не соответствует текущей фазе, сбрасываем выбор юнита
+        if action not in ["move", "squad_move", "attack"]:
+            self.selected_unit = None
+    
+    def is_valid_setup_position(self, faction, grid_x, grid_y):
+        zone = self.setup_zones[faction]
+        return (zone[0] <= grid_x < zone[1] and 
+                0 <= grid_y < self.grid.height and 
+                self.grid.is_free(grid_x, grid_y) and
+                (self.terrain is None or self.terrain.passable(grid_x, grid_y)))
+    
+    def handle_click(self, x, y):
+        grid_x = int(x) // self.grid_size
+        grid_y = int(y) // self.grid_size
+        
+        if not self.grid.in_bounds(grid_x, grid_y):
+            return
+        
+        if self.state == "setup":
+            self.handle_setup(grid_x, grid_y)
+        elif self.state == "turn":
+            self.handle_turn(grid_x, grid_y)
+    
+    def handle_setup(self, grid_x, grid_y):
+        # Get selected unit type from UI
+        selected_text = self.action_menu.unit_combo.currentText().lower()
+        # Извлекаем только имя юнита, отбрасывая стоимость в скобках
+        unit_type = selected_text.split(" (")[0]
+        
+        unit = self.place_unit(self.current_faction, unit_type, grid_x, grid_y)
+        if unit and self.action_menu:
+            # Обновляем список юнитов при размещении нового юнита
+            self.action_menu.update_units_list(self.player_faction.units)
+    
+    def place_unit(self, faction, unit_type, grid_x, grid_y):
+        """Размещает юнита фракции в клетке её зоны на этапе расстановки"""
+        if self.state != "setup" or not self.is_valid_setup_position(faction.name, grid_x, grid_y):
+            return None
+        unit = faction.add_unit(grid_x * self.grid_size, grid_y * self.grid_size, unit_type)
+        if unit:
+            self.occupy_cell(grid_x, grid_y, unit)
+            self.log(f"Размещен {unit_type}")
+            self.emit("placement", unit=self.unit_info(unit))
+        return unit
+    
+    def handle_turn(self, grid_x, grid_y):
+        # Check if we're selecting a unit
+        clicked_unit = None
+        
+        # Проверяем, что игра находится в фазе хода игрока
+        if not self.is_bot_turn():
+            # Находим юнит по клику
+            for unit in self.current_faction.units:
+                if unit.rect.collidepoint(grid_x * self.grid_size, grid_y * self.grid_size):
+                    clicked_unit = unit
+                    break
+            
+            # Если мы собираемся двигать выбранный юнит
+            if self.current_action == "move" and self.selected_unit and not self.selected_unit.is_moved and self.current_phase == "Movement" and self.phase_roll_complete:
+                # Проверяем, что клик в пустую клетку
+                if not clicked_unit:
+                    self.move_unit(self.selected_unit, grid_x, grid_y)
+            
+            # Приказ отряду выбранного юнита сдвинуться строем
+            elif self.current_action == "squad_move" and self.selected_unit and not self.selected_unit.is_moved and self.current_phase == "Movement" and self.phase_roll_complete:
+                if not clicked_unit:
+                    self.move_squad(self.selected_unit, grid_x, grid_y)
+            
+            # Если мы собираемся атаковать выбранным юнитом
+            elif self.current_action == "attack" and self.selected_unit and not self.selected_unit.is_attacked and self.current_phase == "Attack" and self.phase_roll_complete:
+                # Находим вражеский юнит для атаки
+                enemy_unit = self.grid.at(grid_x, grid_y)
+                if enemy_unit is not None and enemy_unit.faction != self.current_faction.name:
+                    self.attack_target(self.selected_unit, enemy_unit)
+            
+            # Фаза Morale - игрок просто должен бросить кубик
+            elif self.current_phase == "Morale" and self.phase_roll_complete:
+                # Автоматически переходим к следующей фазе (конец хода)
+                self.proceed_to_next_phase()
+            
+            # Если мы просто выбираем юнита (или отменяем выбор)
+            elif clicked_unit:
+                # Выбор/отмена выбора юнита
+                if self.selected_unit:
+                    self.selected_unit.selected = False
+                
+                if self.selected_unit == clicked_unit:
+                    # Отменяем выбор того же юнита
+                    self.selected_unit = None
+                    self.current_action = None
+                else:
+                    # Выбираем нового юнита
+                    self.selected_unit = clicked_unit
+                    self.selected_unit.selected = True
+                    self.current_action = None
+                    
+                    if self.action_menu:
+                        self.action_menu.add_to_log(f"Выбран юнит: {self.selected_unit.unit_type}")
+                        self.action_menu.update_button_states()
+    
+    def move_unit(self, unit, grid_x, grid_y):
+        """Перемещает юнита текущей фракции в фазе движения.
+
+        Возвращает True, если ход разрешен правилами и выполнен.
+        """
+        if (unit.faction != self.current_faction.name or unit.is_moved or
+                self.current_phase != "Movement" or not self.phase_roll_complete):
+            return False
+        if not self.grid.in_bounds(grid_x, grid_y):
+            return False
+        
+        # Проверка дальности (с учетом местности) и пустой клетки
+        if (grid_x, grid_y) not in self.reachable(unit) or not self.grid.is_free(grid_x, grid_y):
+            return False
+        
+        old_x = unit.rect.x // self.grid_size
+        old_y = unit.rect.y // self.grid_size
+        
+        # Обновляем позицию на игровом поле
+        unit.rect.x = grid_x * self.grid_size
+        unit.rect.y = grid_y * self.grid_size
+        
+        # Обновляем сетку
+        self.clear_cell(old_x, old_y)
+        self.occupy_cell(grid_x, grid_y, unit)
+        unit.is_moved = True
+        self.unit_changed(unit)
+        self.emit("move", unit=unit.id, faction=unit.faction, from_x=old_x, from_y=old_y, x=grid_x, y=grid_y)
+        self.current_action = None
+        
+        if self.action_menu:
+            self.action_menu.add_to_log(f"Unit moved to ({grid_x}, {grid_y})")
+            self.action_menu.update_button_states()
+        
+        # Переходим к следующей фазе автоматически
+        self.proceed_to_next_phase()
+        return True
+    
+    def attack_target(self, unit, enemy_unit):
+        """Атака юнитом текущей фракции вражеского юнита в фазе атаки.
+
+        Возвращает True, если атака разрешена правилами и выполнена.
+        """
+        if (unit.faction != self.current_faction.name or unit.is_attacked or
+                self.current_phase != "Attack" or not self.phase_roll_complete):
+            return False
+        
+        # Дальность проверяем по индексу целей, а не пересчетом расстояния
+        if enemy_unit not in self.target_index.targets_of(unit):
+            return False
+        if not self.can_see(unit, enemy_unit):
+            self.log("⚠️ Цель вне линии видимости!")
+            return False
+        
+        # Perform attack
+        damage = self.strike(unit, enemy_unit)
+        self.current_action = None
+        
+        if self.action_menu:
+            self.action_menu.add_to_log(f"Атака нанесла {damage} урона!")
+            self.action_menu.update_button_states()
+        
+        # Check if target was destroyed
+        if enemy_unit.health <= 0:
+            self.log("❌ Юнит противника уничтожен!")
+            
+            # Check victory condition
+            if self.check_victory():
+                return True
+        
+        # Переходим к следующей фазе автоматически
+        self.proceed_to_next_phase()
+        
+        # Обновляем список юнитов после атаки
+        if self.action_menu:
+            self.action_menu.update_units_list(self.player_faction.units)
+        return True
+    
+    def move_squad(self, unit, grid_x, grid_y):
+        """Приказ отряду юнита: сдвинуться строем так, чтобы юнит пришел в (grid_x, grid_y).
+
+        Возвращает True, если сдвинулся хотя бы один юнит.
+        """
+        faction = self.factions_by_name[unit.faction]
+        squad = faction.squad_of(unit)
+        if (squad is None or faction is not self.current_faction or unit.is_moved or
+                self.current_phase != "Movement" or not self.phase_roll_complete):
+            return False
+        offset = (grid_x - unit.rect.x // self.grid_size, grid_y - unit.rect.y // self.grid_size)
+        moved = self.apply_squad_move(squad, offset)
+        if not moved:
+            return False
+        self.current_action = None
+        self.log(f"Отряд {squad.name}: сдвинуто {moved} из {len(squad.units)} юнитов")
+        if self.action_menu:
+            self.action_menu.update_button_states()
+        
+        # Приказ отряду занимает фазу движения, как и ход одного юнита
+        self.proceed_to_next_phase()
+        return True
+    
+    def apply_squad_move(self, squad, offset):
+        """Сдвигает не ходивших юнитов отряда на offset клеток; возвращает число сдвинутых"""
+        units = [unit for unit in squad.units if not unit.is_moved]
+        plan = plan_squad_move(self.grid, units, offset, self.grid_size, self.reachable)
+        
+        # Сначала освобождаем все старые клетки, затем занимаем новые
+        for unit, (old_x, old_y), _ in plan:
+            self.clear_cell(old_x, old_y)
+        for unit, (old_x, old_y), (new_x, new_y) in plan:
+            unit.rect.x = new_x * self.grid_size
+            unit.rect.y = new_y * self.grid_size
+            self.occupy_cell(new_x, new_y, unit)
+            self.emit("move", unit=unit.id, faction=unit.faction,
+                      from_x=old_x, from_y=old_y, x=new_x, y=new_y)
+        for unit in units:
+            unit.is_moved = True
+            self.unit_changed(unit)
+        return len(plan)
+    
+    def squad_attack(self, unit):
+        """Приказ отряду юнита атаковать: цели распределяются между юнитами отряда.
+
+        Возвращает True, если была хотя бы одна атака.
+        """
+        faction = self.factions_by_name[unit.faction]
+        squad = faction.squad_of(unit)
+        if (squad is None or faction is not self.current_faction or
+                self.current_phase != "Attack" or not self.phase_roll_complete):
+            return False
+        attacks, kills = self.apply_squad_attack(squad)
+        if not attacks:
+            self.log("⚠️ У отряда нет целей в досягаемости!")
+            return False
+        self.current_action = None
+        self.log(f"Отряд {squad.name}: {attacks} атак, уничтожено {kills}")
+        if self.check_victory():
+            return True
+        
+        self.proceed_to_next_phase()
+        if self.action_menu:
+            self.action_menu.update_units_list(self.player_faction.units)
+        return True
+    
+    def apply_squad_attack(self, squad):
+        """Атакует всеми готовыми юнитами отряда; возвращает (число атак, число убитых)"""
+        attackers = [unit for unit in squad.units if not unit.is_attacked]
+        attacks = kills = 0
+        damage = lambda unit, target: unit.damage_against(target, self.defense_bonus(target))
+        for unit, target in assign_targets(attackers, self.attackable_targets, damage):
+            if target.health <= 0:
+                continue
+            self.strike(unit, target)
+            attacks += 1
+            if target.health <= 0:
+                kills += 1
+        return attacks, kills
+    
+    def apply_army_move(self, units):
+        """Ход всеми перечисленными юнитами по общему плану (orders.plan_army_move);
+        возвращает число сдвинувшихся юнитов"""
+        enemies = self.enemy_units(self.factions_by_name[units[0].faction]) if units else []
+        plan = plan_army_move(self.grid, units, enemies, self.grid_size, self.reachable)
+        # Клетки назначения свободны и различны, поэтому порядок ходов не важен
+        for unit, _, (new_x, new_y) in plan:
+            self.execute_bot_move(unit, new_x, new_y)
+        for unit in units:
+            if not unit.is_moved:
+                unit.is_moved = True
+                self.unit_changed(unit)
+        return len(plan)
+    
+    def apply_army_attack(self, units):
+        """Атакует всеми перечисленными юнитами по общему распределению целей
+        (orders.plan_army_attack); возвращает (число атак, число убитых)"""
+        attackers = [unit for unit in units if not unit.is_attacked]
+        attacks = kills = 0
+        damage = lambda unit, target: unit.damage_against(target, self.defense_bonus(target))
+        for unit, target in plan_army_attack(attackers, self.attackable_targets, damage):
+            if target.health <= 0:
+                # Цель уже добита: бьем самую слабую из оставшихся в досягаемости
+                alive = self.attackable_targets(unit)
+                if not alive:
+                    continue
+                target = min(alive, key=lambda enemy: (enemy.health, enemy.id))
+            self.strike(unit, target)
+            attacks += 1
+            if target.health <= 0:
+                kills += 1
+        return attacks, kills
+    
+    def strike(self, unit, target):
+        """Наносит удар и убирает цель, если она погибла; возвращает урон"""
+        damage = unit.attack_unit(target, self.defense_bonus(target))
+        unit.is_attacked = True
+        self.unit_changed(unit)
+        self.unit_changed(target)
+        self.emit("attack", attacker=unit.id, target=target.id, faction=unit.faction,
+                  damage=damage, target_health=target.health)
+        if target.health <= 0:
+            self.kill_unit(target, unit)
+        return damage
+    
+    def kill_unit(self, unit, killer):
+        """Убирает погибшего юнита с поля и из его фракции"""
+        self.clear_cell(unit.rect.x // self.grid_size, unit.rect.y // self.grid_size)
+        self.factions_by_name[unit.faction].remove_unit(unit)
+        self.emit("death", unit=self.unit_info(unit), killer=killer.id)
+    
+    def end_turn(self):
+        if self.state == "turn":
+            if self.selected_unit:
+                self.selected_unit.selected = False
+                self.selected_unit = None
+            
+            self.current_action = None
+            self.phase_state.reset()
+            
+            # Check victory conditions
+            if not self.check_victory():
+                self.current_faction = self.factions_by_name[self.scheduler.next_faction()]
+                
+                # Reset all action flags for the new current faction's units
+                for unit in self.current_faction.units:
+                    unit.is_moved = False
+                    unit.is_attacked = False
+                    self.unit_changed(unit)
+                
+                if self.action_menu:
+                    next_player = self.faction_title(self.current_faction)
+                    self.action_menu.add_to_log(f"Ход перешел к {next_player}")
+                
+                # Start phases for the new turn
+                self.turn_number += 1
+                if not self.step_turns:
+                    self.begin_turn()
+    
+    def begin_turn(self):
+        """Запускает фазы текущего хода; за бота ход играется сразу"""
+        self.start_turn_phases()
+        
+        # If it's bot's turn, make a move
+        if self.is_bot_turn():
+            self.make_bot_move()
+    
+    def start_game(self):
+        if self.state == "setup":
+            # Бросок кубика инициативы для каждой фракции, ничьи перебрасываются
+            order, rolls = roll_initiative(list(self.factions_by_name))
+            
+            # Логирование результатов броска
+            if self.action_menu:
+                self.action_menu.add_to_log("🎲 Определение порядка ходов:")
+                for faction in self.factions:
+                    self.action_menu.add_to_log(f"{self.faction_title(faction)} бросает кубик: {rolls[faction.name][0]}")
+                for attempt in range(1, max(len(values) for values in rolls.values())):
+                    self.action_menu.add_to_log("🔄 Ничья! Перебрасываем кубики.")
+                    for faction in self.factions:
+                        if len(rolls[faction.name]) > attempt:
+                            self.action_menu.add_to_log(f"{self.faction_title(faction)} перебрасывает: {rolls[faction.name][attempt]}")
+            
+            # Определение первого хода
+            self.scheduler.start(order)
+            self.state = "turn"
+            
+            # Финальное логирование результата
+            if self.action_menu:
+                titles = [self.faction_title(self.factions_by_name[name]) for name in order]
+                self.action_menu.add_to_log(f"🏁 Первым ходит {titles[0]}!")
+                self.action_menu.add_to_log("Результат: " + " vs ".join(
+                    f"{title} ({rolls[name][-1]})" for title, name in zip(titles, order)))
+            
+            # Автоматическое размещение юнитов ботов, если их ещё нет
+            for faction in self.factions:
+                if faction.name in self.bot_factions and not faction.units:
+                    # Состав армии подбирается по всем типам из squads.json
+                    composition = plan_army(faction.resources, SQUAD_DATA, self.bot_strength)
+                    planned_units = expand_army(composition)
+                    for unit in self.deploy_units(faction, planned_units):
+                        if self.action_menu:
+                            self.action_menu.add_to_log(f"Размещен бот: {unit.unit_type} в ({unit.rect.x // self.grid_size}, {unit.rect.y // self.grid_size})")
+            
+            # Юниты, расставленные поодиночке, объединяются в отряды по типу
+            for faction in self.factions:
+                faction.group_units_by_type()
+            
+            # Start the first turn with phases (фракции без юнитов пропускают ход)
+            self.current_faction = self.factions_by_name[self.scheduler.next_faction() or order[0]]
+            self.turn_number = 1
+            if not self.step_turns:
+                self.begin_turn()
+    
+    def draw(self):
+        """Отрисовывает поле и возвращает список изменившихся областей.
+
+        Если с прошлого кадра ничего не изменилось, поверхность не трогается и
+        возвращается пустой список. Иначе перерисовываются только старые и
+        новые плитки изменившихся юнитов и клетки, видимость которых
+        изменилась; пересекающиеся области объединяются, остальные рисуются
+        и возвращаются по отдельности.
+        """
+        # Туман войны считается с точки зрения игрока
+        fog_active = self.state != "setup"
+        fog_cells = []
+        if fog_active:
+            visible = self.visibility.visible_mask(self.player_faction.name)
+            fog_cells = self.update_fog()
+        
+        # Собираем плитки видимых юнитов
+        units = {}
+        for faction in self.factions:
+            for unit in faction.units:
+                # Вражеские юниты в тумане не отображаются
+                if fog_active and faction is not self.player_faction:
+                    if not visible[unit.rect.y // self.grid_size][unit.rect.x // self.grid_size]:
+                        continue
+                key = self.sprite_atlas.tile_key(unit)
+                units[unit.id] = (key, self.sprite_atlas.tile_rect(key, unit))
+        
+        # Подсветка дальности зависит от всего поля, поэтому с ней кадр рисуется целиком
+        overlays = (self.selected_unit is not None and
+                    self.current_action in ["move", "squad_move", "attack"])
+        frame_key = (self.state, overlays)
+        
+        if overlays or frame_key != self._frame_key or self._frame_units is None:
+            areas = [self.surface.get_rect()]
+        else:
+            dirty = list(fog_cells)
+            for unit_id in units.keys() | self._frame_units.keys():
+                old = self._frame_units.get(unit_id)
+                new = units.get(unit_id)
+                if old != new:
+                    dirty.extend(item[1] for item in (old, new) if item is not None)
+            areas = merge_rects(dirty, self.surface.get_rect())
+            if not areas:
+                return []
+        
+        for area in areas:
+            self.render_frame(units, overlays, fog_active, area)
+        self._frame_key = frame_key
+        self._frame_units = units
+        return areas
+    
+    def render_frame(self, units, overlays, fog_active, area):
+        """Рисует область кадра: фон, подсветку, плитки юнитов и туман"""
+        self.surface.set_clip(area)
+        self.surface.blit(self.background(), area, area)
+        
+        # Draw movement or attack range if action is selected
+        if overlays:
+            if self.current_action in ["move", "squad_move"] and not self.selected_unit.is_moved:
+                self.draw_movement_range()
+            elif self.current_action == "attack" and not self.selected_unit.is_attacked:
+                self.draw_attack_range()
+        
+        # Каждый юнит - один blit готовой плитки
+        self.surface.blits([(self.sprite_atlas.tile(key), rect) for key, rect in units.values()
+                            if rect.colliderect(area)], doreturn=False)
+        
+        # Draw fog of war
+        if fog_active:
+            self.surface.blit(self._fog, area, area)
+        self.surface.set_clip(None)
+    
+    def background(self):
+        """Кэшированный фон: сетка и, на этапе расстановки, зоны фракций"""
+        setup = self.state == "setup"
+        surface = self._backgrounds.get(setup)
+        if surface is None:
+            surface = pygame.Surface(self.surface.get_size())
+            # Fill background
+            surface.fill((0, 0, 0))
+            
+            # Клетки местности
+            if self.terrain is not None:
+                for y, row in enumerate(self.terrain.cells):
+                    for x, name in enumerate(row):
+                        if name != "plain":
+                            surface.fill(TERRAIN_TYPES[name]["color"],
+                                         (x * self.grid_size, y * self.grid_size, self.grid_size, self.grid_size))
+            
+            # Draw grid
+            for x in range(0, surface.get_width(), self.grid_size):
+                pygame.draw.line(surface, (128, 128, 128), (x, 0), 
+                               (x, surface.get_height()))
+            for y in range(0, surface.get_height(), self.grid_size):
+                pygame.draw.line(surface, (128, 128, 128), (0, y), 
+                               (surface.get_width(), y))
+            
+            # Draw setup zones
+            if setup:
+                for faction, (start, end) in self.setup_zones.items():
+                    color = tuple(channel // 4 for channel in self.faction_color(faction))
+                    rect = pygame.Rect(start * self.grid_size, 0,
+                                     (end - start) * self.grid_size,
+                                     surface.get_height())
+                    pygame.draw.rect(surface, color, rect)
+            self._backgrounds[setup] = surface
+        return surface
+    
+    def update_fog(self):
+        """Обновляет слой тумана только в клетках, видимость которых изменилась;
+        возвращает прямоугольники этих клеток"""
+        visible = self.visibility.visible_mask(self.player_faction.name)
+        if self._fog is None:
+            # Новый слой прозрачен: все клетки считаются видимыми
+            self._fog = pygame.Surface(self.surface.get_size(), pygame.SRCALPHA)
+            self._fog_seen = [[True] * len(row) for row in visible]
+        elif self._fog_version == self.visibility.version:
+            return []
+        changed = []
+        for y, row in enumerate(visible):
+            seen_row = self._fog_seen[y]
+            for x, count in enumerate(row):
+                seen = count > 0
+                if seen != seen_row[x]:
+                    seen_row[x] = seen
+                    rect = pygame.Rect(x * self.grid_size, y * self.grid_size,
+                                       self.grid_size, self.grid_size)
+                    self._fog.fill((0, 0, 0, 0) if seen else FOG_COLOR, rect)
+                    changed.append(rect)
+        self._fog_version = self.visibility.version
+        return changed
+
+    def draw_movement_range(self):
+        if self.selected_unit:
+            # Досягаемые клетки берутся из кэша, путь не пересчитывается каждый кадр
+            for new_x, new_y in self.reachable(self.selected_unit):
+                if self.grid.is_free(new_x, new_y):
+                    rect = pygame.Rect(new_x * self.grid_size,
+                                    new_y * self.grid_size,
+                                    self.grid_size, self.grid_size)
+                    # Fill with semi-transparent color
+                    s = pygame.Surface((self.grid_size, self.grid_size))
+                    s.set_alpha(128)
+                    s.fill((0, 255, 255))
+                    self.surface.blit(s, rect)
+                    # Draw border
+                    pygame.draw.rect(self.surface, (0, 255, 255), rect, 2)
+
+    def draw_attack_range(self):
+        if self.selected_unit:
+            x = self.selected_unit.rect.x // self.grid_size
+            y = self.selected_unit.rect.y // self.grid_size
+            attack_range = getattr(self.selected_unit, 'attack_range', 1)
+            
+            for dx in range(-attack_range, attack_range + 1):
+                for dy in range(-attack_range, attack_range + 1):
+                    if (dx * dx + dy * dy) <= attack_range * attack_range:
+                        new_x = x + dx
+                        new_y = y + dy
+                        if self.grid.in_bounds(new_x, new_y):
+                            rect = pygame.Rect(new_x * self.grid_size,
+                                            new_y * self.grid_size,
+                                            self.grid_size, self.grid_size)
+                            # Fill with semi-transparent color
+                            s = pygame.Surface((self.grid_size, self.grid_size))
+                            s.set_alpha(128)
+                            s.fill((255, 0, 0))
+                            self.surface.blit(s, rect)
+                            # Draw border
+                            pygame.draw.rect(self.surface, (255, 0, 0), rect, 2)
+            
+            # Подсвечиваем врагов, которых можно атаковать прямо сейчас
+            for target in self.attackable_targets(self.selected_unit):
+                pygame.draw.rect(self.surface, (255, 255, 0), target.rect.inflate(6, 6), 3)
+
+    def make_bot_move(self):
+        # Bot's turn logic
+        if self.is_bot_turn():
+            self.log("Ход бота...")
+            
+            # Вначале бросаем кубик для фазы, если ещё не бросали
+            if self.current_phase and not self.phase_roll_complete:
+                self.log(f"Бросаем кубик для фазы {self.current_phase}")
+                self.roll_dice_for_phase()
+            
+            # Bot only processes the current phase if roll is complete
+            if self.current_phase and self.phase_roll_complete:
+                # Get player units for targeting
+                player_units = self.enemy_units()
+                
+                # Проверка, есть ли юниты у игрока
+                if not player_units:
+                    self.log("У игрока нет юнитов. Пропускаем ход бота.")
+                    self.proceed_to_next_phase()
+                    return
+                
+                self.log(f"Бот обрабатывает фазу: {self.current_phase}")
+                
+                # Find available units for the current phase
+                if self.current_phase == "Movement":
+                    available_units = [unit for unit in self.current_faction.units if not unit.is_moved]
+                    if self.action_menu:
+                        if available_units:
+                            self.action_menu.add_to_log(f"Доступно {len(available_units)} юнитов для движения")
+                        else:
+                            self.action_menu.add_to_log("Нет доступных юнитов для движения")
+                elif self.current_phase == "Attack":
+                    available_units = [unit for unit in self.current_faction.units if not unit.is_attacked]
+                    if self.action_menu:
+                        if available_units:
+                            self.action_menu.add_to_log(f"Доступно {len(available_units)} юнитов для атаки")
+                            # Проверяем параметры атаки у юнитов
+                            for unit in available_units:
+                                self.action_menu.add_to_log(f"{unit.unit_type}: атака={unit.attack}, дальность={unit.attack_range}")
+                        else:
+                            self.action_menu.add_to_log("Нет доступных юнитов для атаки")
+                else:  # Morale phase
+                    available_units = self.current_faction.units
+                    if self.action_menu:
+                        self.action_menu.add_to_log(f"Фаза морали: {len(available_units)} юнитов")
+                
+                # Если есть доступные юниты для текущей фазы
+                if available_units:
+                    # Select the best unit for the current phase
+                    if self.current_phase == "Movement":
+                        bot_unit = max(available_units, key=lambda unit: unit.movement_range + (50 if unit.unit_type == "archer" else 0))
+                        if self.action_menu:
+                            self.action_menu.add_to_log(f"Движение: выбран {bot_unit.unit_type} с рейтингом {bot_unit.movement_range}")
+                    elif self.current_phase == "Attack":
+                        bot_unit = max(available_units, key=lambda unit: unit.attack)
+                        if self.action_menu:
+                            self.action_menu.add_to_log(f"Атака: выбран {bot_unit.unit_type} с атакой {bot_unit.attack}")
+                    else:  # Morale phase
+                        bot_unit = max(available_units, key=lambda unit: unit.defense)
+                        if self.action_menu:
+                            self.action_menu.add_to_log(f"Мораль: выбран {bot_unit.unit_type} с защитой {bot_unit.defense}")
+                    
+                    # Select the unit
+                    if self.selected_unit:
+                        self.selected_unit.selected = False
+                    self.selected_unit = bot_unit
+                    self.selected_unit.selected = True
+                    
+                    # Process the phase
+                    if self.current_phase == "Movement" and not bot_unit.is_moved:
+                        if self.action_menu:
+                            self.action_menu.add_to_log(f"Вызываем процесс движения для {bot_unit.unit_type}")
+                        # Показываем позицию юнита до перемещения
+                        pos_x = bot_unit.rect.x // self.grid_size
+                        pos_y = bot_unit.rect.y // self.grid_size
+                        if self.action_menu:
+                            self.action_menu.add_to_log(f"Юнит находится в позиции ({pos_x}, {pos_y})")
+                        
+                        self.process_bot_movement(bot_unit, player_units)
+                        
+                        # Показываем, изменилась ли позиция юнита
+                        new_x = bot_unit.rect.x // self.grid_size
+                        new_y = bot_unit.rect.y // self.grid_size
+                        if new_x != pos_x or new_y != pos_y:
+                            if self.action_menu:
+                                self.action_menu.add_to_log(f"Юнит переместился в новую позицию ({new_x}, {new_y})")
+                        else:
+                            if self.action_menu:
+                                self.action_menu.add_to_log(f"Юнит остался на месте ({new_x}, {new_y})")
+                    
+                    elif self.current_phase == "Attack" and not bot_unit.is_attacked:
+                        if self.action_menu:
+                            self.action_menu.add_to_log(f"Вызываем процесс атаки для {bot_unit.unit_type}")
+                            self.action_menu.add_to_log(f"Позиция атакующего: ({bot_unit.rect.x // self.grid_size}, {bot_unit.rect.y // self.grid_size})")
+                            self.action_menu.add_to_log(f"Целей в радиусе атаки: {len(self.target_index.targets_of(bot_unit))}")
+                        
+                        self.process_bot_attack(bot_unit, player_units)
+                    
+                    elif self.current_phase == "Morale":
+                        if self.action_menu:
+                            self.action_menu.add_to_log("Фаза морали - просто переходим дальше")
+                else:
+                    if self.action_menu:
+                        self.action_menu.add_to_log(f"Нет доступных юнитов для фазы {self.current_phase}, пропускаем")
+                
+                # Proceed to the next phase
+                if self.action_menu:
+                    self.action_menu.add_to_log("Переходим к следующей фазе")
+                self.proceed_to_next_phase()
+            
+            # Update UI
+            if self.action_menu:
+                self.action_menu.update_button_states()
+                self.action_menu.update_info()
+    
+    def process_bot_movement(self, bot_unit, player_units):
+        """Processes bot movement during its turn."""
+        if self.action_menu:
+            self.action_menu.add_to_log(f"Бот выполняет движение {bot_unit.unit_type}")
+            self.action_menu.add_to_log(f"Диапазон движения: {bot_unit.movement_range}")
+        
+        if not player_units:
+            if self.action_menu:
+                self.action_menu.add_to_log("Нет юнитов игрока для преследования")
+            bot_unit.is_moved = True
+            self.unit_changed(bot_unit)
+            return
+
+        current_x = bot_unit.rect.x // self.grid_size
+        current_y = bot_unit.rect.y // self.grid_size
+
+        # Ближайшего врага ищем по пространственному индексу; если цель
+        # передана явно (одна), берем её
+        if len(player_units) == 1:
+            closest_enemy = player_units[0]
+        else:
+            closest_enemy = self.spatial.nearest_enemy(bot_unit) or player_units[0]
+
+        enemy_x = closest_enemy.rect.x // self.grid_size
+        enemy_y = closest_enemy.rect.y // self.grid_size
+
+        if self.action_menu:
+            self.action_menu.add_to_log(f"Бот в позиции ({current_x}, {current_y}), противник в ({enemy_x}, {enemy_y})")
+
+        # Гарантируем минимальный диапазон движения для бота
+        bot_unit.movement_range = max(2, bot_unit.movement_range)
+        
+        # Ищем все доступные ходы в пределах диапазона движения
+        valid_moves = []
+        reach = self.reachable(bot_unit)
+        # Перебор ограничен полем: дальность после бросков может быть больше доски
+        radius = bot_unit.movement_range
+        for dx in range(max(-radius, -current_x), min(radius, self.grid.width - 1 - current_x) + 1):
+            for dy in range(max(-radius, -current_y), min(radius, self.grid.height - 1 - current_y) + 1):
+                test_x = current_x + dx
+                test_y = current_y + dy
+                
+                # Пропускаем текущую позицию
+                if dx == 0 and dy == 0:
+                    continue
+                    
+                # Проверяем, что клетка досягаема (с учетом местности),
+                # в пределах поля и свободна
+                if ((test_x, test_y) in reach and 
+                    self.grid.in_bounds(test_x, test_y) and 
+                    self.grid.is_free(test_x, test_y)):
+                    
+                    # Вычисляем квадрат расстояния до противника с этой новой позиции
+                    enemy_dist = (test_x - enemy_x) ** 2 + (test_y - enemy_y) ** 2
+                    valid_moves.append((test_x, test_y, enemy_dist))
+        
+        if self.action_menu:
+            self.action_menu.add_to_log(f"Найдено {len(valid_moves)} возможных ходов")
+        
+        # Сортируем ходы по расстоянию до противника (предпочитаем ближе)
+        valid_moves.sort(key=lambda move: move[2])
+        
+        # Выбираем лучший ход
+        new_x, new_y = current_x, current_y
+        if valid_moves:
+            new_x, new_y, _ = valid_moves[0]
+            if self.action_menu:
+                self.action_menu.add_to_log(f"Выбран ход в ({new_x}, {new_y})")
+        else:
+            if self.action_menu:
+                self.action_menu.add_to_log("Нет доступных ходов!")
+
+        # Перемещаем юнит, если найдена подходящая позиция
+        if new_x != current_x or new_y != current_y:
+            pixel_x = new_x * self.grid_size
+            pixel_y = new_y * self.grid_size
+            
+            if self.action_menu:
+                self.action_menu.add_to_log(f"Пытаемся переместить юнит в пиксели ({pixel_x}, {pixel_y})")
+            
+            self.execute_bot_move(bot_unit, new_x, new_y)
+        else:
+            bot_unit.is_moved = True
+            self.unit_changed(bot_unit)
+            if self.action_menu:
+                self.action_menu.add_to_log("Юнит остался на месте - нет валидных ходов")
+
+    def execute_bot_move(self, bot_unit, new_x, new_y):
+        """Переносит юнит бота в свободную клетку (new_x, new_y) без проверок правил хода"""
+        current_x = bot_unit.rect.x // self.grid_size
+        current_y = bot_unit.rect.y // self.grid_size
+        bot_unit.rect.x = new_x * self.grid_size
+        bot_unit.rect.y = new_y * self.grid_size
+        self.clear_cell(current_x, current_y)
+        self.occupy_cell(new_x, new_y, bot_unit)
+        bot_unit.is_moved = True
+        self.unit_changed(bot_unit)
+        self.emit("move", unit=bot_unit.id, faction=bot_unit.faction,
+                  from_x=current_x, from_y=current_y, x=new_x, y=new_y)
+        self.log(f"Бот переместил {bot_unit.unit_type} из ({current_x}, {current_y}) в ({new_x}, {new_y})")
+    
+    def process_bot_attack(self, bot_unit, player_units):
+        """Обрабатывает атаку выбранного юнита бота"""
+        if self.action_menu:
+            self.action_menu.add_to_log(f"Бот выполняет атаку {bot_unit.unit_type}")
+            self.action_menu.add_to_log(f"Диапазон атаки: {bot_unit.attack_range}")
+            bot_x = bot_unit.rect.x // self.grid_size
+            bot_y = bot_unit.rect.y // self.grid_size
+            self.action_menu.add_to_log(f"Позиция бота: ({bot_x}, {bot_y})")
+        
+        # Find enemy in range: цели берем из индекса, ограничивая переданным списком
+        allowed = set(player_units)
+        in_range_enemies = [target for target in self.attackable_targets(bot_unit)
+                            if target in allowed]
+        if self.action_menu:
+            for target in in_range_enemies:
+                self.action_menu.add_to_log(f"✓ {target.unit_type} в зоне досягаемости!")
+        
+        if in_range_enemies:
+            # Attack the weakest enemy in range
+            target = min(in_range_enemies, key=lambda enemy: enemy.health)
+            damage = self.strike(bot_unit, target)
+            
+            if self.action_menu:
+                self.action_menu.add_to_log(f"Бот атаковал {target.unit_type} и нанес {damage} урона!")
+                # Обновляем список юнитов игрока после атаки бота
+                self.action_menu.update_units_list(self.player_faction.units)
+            
+            # Check if target was destroyed
+            if target.health <= 0:
+                if self.action_menu:
+                    self.action_menu.add_to_log(f"❌ Юнит игрока {target.unit_type} уничтожен!")
+                    # Обновляем список юнитов после уничтожения
+                    self.action_menu.update_units_list(self.player_faction.units)
+                    
+                # Check victory condition
+                self.check_victory()
+        else:
+            if self.action_menu:
+                self.action_menu.add_to_log("🤖 Нет целей в зоне досягаемости для атаки бота")
+            bot_unit.is_attacked = True  # Skip attack if no targets
+            self.unit_changed(bot_unit)
+    
+    def roll_dice_for_phase(self):
+        if self.state == "turn" and self.current_phase is not None:
+            # Roll a dice (1-6)
+            self.dice_roll = random.randint(1, 6)
+            self.emit("dice_roll", faction=self.current_faction.name, phase=self.current_phase, roll=self.dice_roll)
+            
+            if self.action_menu:
+                self.action_menu.add_to_log(f"🎲 {self.current_faction.name} выбросил {self.dice_roll} на фазе {self.current_phase}")
+            
+            # Apply phase effects based on dice roll
+            if self.current_phase == "Movement":
+                self.apply_movement_effects(self.dice_roll)
+            elif self.current_phase == "Attack":
+                self.apply_attack_effects(self.dice_roll)
+            elif self.current_phase == "Morale":
+                self.apply_morale_effects(self.dice_roll)
+            
+            self.phase_roll_complete = True
+            
+            # Move to the next phase if it's bot's turn
+            if self.is_bot_turn():
+                self.proceed_to_next_phase()
+            
+            self.update_action_menu()
+    
+    def apply_movement_effects(self, dice_roll):
+        # Modifier based on dice roll
+        movement_modifier = max(-1, (dice_roll - 3) / 3)  # -1 to +1 range
+        
+        for unit in self.current_faction.units:
+            original_range = unit.movement_range
+            unit.movement_range = max(1, int(original_range * (1 + movement_modifier)))
+            
+        if self.action_menu:
+            if movement_modifier > 0:
+                self.action_menu.add_to_log(f"Удача! Движение улучшено на {movement_modifier:.1f}x")
+            elif movement_modifier < 0:
+                self.action_menu.add_to_log(f"Неудача! Движение снижено на {abs(movement_modifier):.1f}x")
+            else:
+                self.action_menu.add_to_log("Нейтральный бросок. Движение без изменений.")
+                
+        # Если ход бота, передаем фазу движения его стратегии
+        if self.is_bot_turn() and self.current_phase == "Movement":
+            if self.action_menu:
+                self.action_menu.add_to_log("Применяем модификатор движения для бота")
+            self.run_bot_policy("movement")
+    
+    def bot_policy(self):
+        """Стратегия бота текущей фракции"""
+        return self.bot_policies.setdefault(self.current_faction.name, make_policy("greedy"))
+    
+    def run_bot_policy(self, action):
+        """Вызывает действие стратегии бота ("movement" или "attack") и сообщает телеметрию.
+
+        Событие "plan" содержит время решения, а у планировщиков (planner.py) -
+        ещё число оцененных вариантов, бюджет и историю лучшей оценки.
+        """
+        policy = self.bot_policy()
+        faction, phase = self.current_faction.name, self.current_phase
+        started = time.perf_counter()
+        getattr(policy, action)(self)
+        elapsed = time.perf_counter() - started
+        stats = getattr(policy, "last_stats", None)
+        if stats is None:
+            self.emit("plan", faction=faction, phase=phase, policy=policy.name, elapsed=round(elapsed, 6))
+            return
+        self.emit("plan", faction=faction, phase=phase, policy=policy.name, **stats.as_dict())
+        self.log(f"План бота: {stats.nodes} вариантов за {stats.elapsed * 1000:.1f} мс "
+                 f"из {stats.budget * 1000:.0f} мс" + ("" if stats.complete else " (бюджет исчерпан)"))
+    
+    def greedy_bot_movement(self):
+        """Жадное движение: ближайший к врагу юнит идет к нему"""
+        # Находим доступные юниты для движения
+        available_units = [unit for unit in self.current_faction.units if not unit.is_moved]
+        if available_units and self.scheduler.living > 1:
+            # Находим юнит противника, который ближе всего к любому из наших юнитов
+            closest_enemy = None
+            closest_unit = None
+            pair = self.spatial.closest_pair(available_units)
+            if pair:
+                closest_unit, closest_enemy, _ = pair
+            
+            if closest_unit and closest_enemy:
+                if self.action_menu:
+                    self.action_menu.add_to_log(f"Выбран {closest_unit.unit_type} для движения к {closest_enemy.unit_type}")
+                self.process_bot_movement(closest_unit, [closest_enemy])
+    
+    def apply_attack_effects(self, dice_roll):
+        # Modifier based on dice roll
+        attack_modifier = odds.attack_modifier(dice_roll)  # -0.5 to +0.5 range
+        
+        for unit in self.current_faction.units:
+            unit.attack = odds.modified_attack(unit.attack, dice_roll)
+            self.unit_changed(unit)
+            
+        if self.action_menu:
+            if attack_modifier > 0:
+                self.action_menu.add_to_log(f"Удача! Атака улучшена на {attack_modifier:.1f}x")
+            elif attack_modifier < 0:
+                self.action_menu.add_to_log(f"Неудача! Атака снижена на {abs(attack_modifier):.1f}x")
+            else:
+                self.action_menu.add_to_log("Нейтральный бросок. Атака без изменений.")
+                
+        # Если ход бота, передаем фазу атаки его стратегии
+        if self.is_bot_turn() and self.current_phase == "Attack":
+            if self.action_menu:
+                self.action_menu.add_to_log("Применяем модификатор атаки для бота")
+            self.run_bot_policy("attack")
+    
+    def greedy_bot_attack(self):
+        """Жадная атака: самый сильный юнит бьет ближайшую цель в досягаемости"""
+        # Находим доступные юниты для атаки
+        available_units = [unit for unit in self.current_faction.units if not unit.is_attacked]
+        
+        if available_units and self.scheduler.living > 1:
+            # Пары (юнит, цель) берем из индекса целей вместо перебора всех пар
+            units_in_range = []
+            
+            for bot_unit in available_units:
+                bot_x = bot_unit.rect.x // self.grid_size
+                bot_y = bot_unit.rect.y // self.grid_size
+                for player_unit in self.attackable_targets(bot_unit):
+                    player_x = player_unit.rect.x // self.grid_size
+                    player_y = player_unit.rect.y // self.grid_size
+                    
+                    # Расстояние в клетках (Манхэттенская метрика)
+                    distance = abs(bot_x - player_x) + abs(bot_y - player_y)
+                    units_in_range.append((bot_unit, player_unit, distance, bot_unit.attack))
+            
+            # Если есть юниты, которые могут атаковать
+            if units_in_range:
+                # Сортируем по атаке (сначала наиболее сильные)
+                units_in_range.sort(key=lambda x: (-x[3], x[2]))  # -атака (чтобы сначала шли большие значения), затем расстояние
+                
+                best_attack_unit, target_unit, attack_distance, _ = units_in_range[0]
+                
+                if self.action_menu:
+                    self.action_menu.add_to_log(f"Выбран {best_attack_unit.unit_type} для атаки {target_unit.unit_type} с расстояния {attack_distance}")
+                
+                # Передаем конкретную цель для атаки
+                self.process_bot_attack(best_attack_unit, [target_unit])
+            else:
+                # Если никто не может атаковать, выбираем юнит с наибольшей атакой
+                best_attack_unit = max(available_units, key=lambda unit: unit.attack)
+                
+                if self.action_menu:
+                    self.action_menu.add_to_log(f"Выбран {best_attack_unit.unit_type} для атаки, но нет целей в досягаемости")
+                
+                # Передаем все юниты противников для проверки атаки
+                self.process_bot_attack(best_attack_unit, self.enemy_units())
+    
+    def apply_morale_effects(self, dice_roll):
+        # Morale effects (for example, could affect defense)
+        morale_modifier = odds.morale_modifier(dice_roll)  # -0.3 to +0.3 range
+        
+        for unit in self.current_faction.units:
+            unit.defense = odds.modified_defense(unit.defense, dice_roll)
+            self.unit_changed(unit)
+            
+        if self.action_menu:
+            if morale_modifier > 0:
+                self.action_menu.add_to_log(f"Высокий боевой дух! Защита улучшена на {morale_modifier:.1f}x")
+            elif morale_modifier < 0:
+                self.action_menu.add_to_log(f"Низкий боевой дух! Защита снижена на {abs(morale_modifier):.1f}x")
+            else:
+                self.action_menu.add_to_log("Нейтральный боевой дух. Защита без изменений.")
+    
+    def start_turn_phases(self):
+        # Start with the first phase
+        self.current_phase_index = 0
+        if len(self.phases) > 0:
+            self.current_phase = self.phases[0]
+            self.phase_roll_complete = False
+            self.emit("phase_start", faction=self.current_faction.name, phase=self.current_phase)
+            
+            if self.action_menu:
+                self.action_menu.add_to_log(f"Начинается фаза: {self.current_phase}")
+                self.action_menu.update_info()
+            
+            # If it's bot's turn, automatically roll dice
+            if self.is_bot_turn():
+                self.roll_dice_for_phase()
+    
+    def proceed_to_next_phase(self):
+        # Move to the next phase
+        self.current_phase_index += 1
+        
+        # Check if we've gone through all phases
+        if self.current_phase_index >= len(self.phases):
+            # End of all phases, end the turn
+            self.current_phase = None
+            self.current_phase_index = -1
+            
+            if self.action_menu:
+                self.action_menu.add_to_log("Все фазы завершены. Ход переходит к следующему игроку.")
+            
+            self.end_turn()
+        else:
+            # Move to the next phase
+            self.current_phase = self.phases[self.current_phase_index]
+            self.phase_roll_complete = False
+            self.emit("phase_start", faction=self.current_faction.name, phase=self.current_phase)
+            
+            if self.action_menu:
+                self.action_menu.add_to_log(f"Начинается фаза: {self.current_phase}")
+                self.action_menu.update_info()
+            
+            # If it's bot's turn, automatically roll dice
+            if self.is_bot_turn():
+                self.roll_dice_for_phase()
+    
+    def update_action_menu(self):
+        if self.action_menu:
+            self.action_menu.update_button_states()
+            self.action_menu.update_info()
@@ -0,0 +1,209 @@
+"""История матчей в локальной базе SQLite.
+
+Партии копятся в памяти и записываются пачками по batch_size в одной
+транзакции (executemany), база открыта в режиме WAL, поэтому запросы из
+другого процесса не ждут окончания турнира. Армия описывается составом по
+типам юнитов и основным типом (самым многочисленным), по которому построен
+индекс для запросов вида "армии лучников против армий рыцарей при бюджете 1000".
+
+Пример:
+    python simulate.py --games 10000 --policies greedy random --history matches.db
+    python history.py matches.db --win-rate archer knight --budget 1000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from unit import SQUAD_DATA, squad_data_hash
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    seed INTEGER,
+    squads_version TEXT NOT NULL,
+    board TEXT,
+    factions INTEGER NOT NULL,
+    turns INTEGER NOT NULL,
+    winner TEXT
+);
+CREATE TABLE IF NOT EXISTS armies (
+    match_id INTEGER NOT NULL REFERENCES matches(id),
+    faction TEXT NOT NULL,
+    policy TEXT,
+    budget INTEGER,
+    main_type TEXT,
+    units INTEGER NOT NULL,
+    survivors INTEGER NOT NULL,
+    won INTEGER NOT NULL,
+    PRIMARY KEY (match_id, faction)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS army_units (
+    match_id INTEGER NOT NULL REFERENCES matches(id),
+    faction TEXT NOT NULL,
+    unit_type TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (match_id, faction, unit_type)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS unit_types (
+    squads_version TEXT NOT NULL,
+    name TEXT NOT NULL,
+    health INTEGER, attack INTEGER, defense INTEGER,
+    attack_range INTEGER, movement_range INTEGER, cost INTEGER,
+    PRIMARY KEY (squads_version, name)
+);
+CREATE INDEX IF NOT EXISTS armies_by_type_budget ON armies (main_type, budget, won);
+CREATE INDEX IF NOT EXISTS army_units_by_type ON army_units (unit_type, count);
+CREATE INDEX IF NOT EXISTS matches_by_seed ON matches (seed);
+"""
+
+# Армия a считается один раз на матч, если среди её противников в этом матче
+# есть армия b нужного типа; иначе в бою всех против всех армия попадала бы
+# в выборку по разу на каждого такого противника. Унарный плюс у столбцов b
+# запрещает искать b по индексу типа: иначе для каждой армии a
+# просматривались бы все армии с тем же типом, а не армии её матча.
+# Таблица armies хранится по первичному ключу (WITHOUT ROWID), поэтому поиск
+# противников - одно обращение к B-дереву. {opponent} и {army} - доп. условия
+WIN_RATE_QUERY = """
+SELECT COUNT(*), COALESCE(SUM(a.won), 0)
+FROM armies AS a
+WHERE a.main_type = ?{army} AND EXISTS (
+    SELECT 1 FROM armies AS b
+    WHERE b.match_id = a.match_id AND b.faction != a.faction AND +b.main_type = ?{opponent}
+)
+"""
+
+
+def main_type(composition):
+    """Самый многочисленный тип армии (при равенстве - первый по имени)"""
+    if not composition:
+        return None
+    return min(composition, key=lambda unit_type: (-composition[unit_type], unit_type))
+
+
+class MatchHistory:
+    """Запись итогов матчей и запросы к ним"""
+
+    def __init__(self, path="matches.db", batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # В режиме WAL это безопасно при сбое процесса и сильно ускоряет запись
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        # Матчи пачки без id; армии ссылаются на матч по номеру в пачке
+        self.matches = []
+        self.armies = []
+        self.army_units = []
+        self.versions = set()
+
+    def record(self, result, board=None):
+        """Добавляет итог run_game() в очередь записи; id матчу назначается в flush()"""
+        version = squad_data_hash()
+        if version not in self.versions:
+            self._record_unit_types(version)
+        match_id = len(self.matches)
+        armies = result["armies"]
+        self.matches.append((time.time(), result.get("seed"), version, board,
+                             len(armies), result["turns"], result["winner"]))
+        for faction, army in armies.items():
+            composition = army["units"]
+            self.armies.append((match_id, faction, army.get("policy"), army.get("budget"),
+                                main_type(composition), sum(composition.values()),
+                                result["survivors"].get(faction, 0), int(result["winner"] == faction)))
+            self.army_units.extend((match_id, faction, unit_type, count)
+                                   for unit_type, count in composition.items())
+        if len(self.matches) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Записывает накопленные матчи одной транзакцией.
+
+        Id матчей продолжают MAX(id) базы. Транзакция начинается с BEGIN IMMEDIATE,
+        то есть сразу с блокировки записи: другой процесс, пишущий в ту же базу,
+        не вставит матчи между чтением MAX(id) и вставкой пачки.
+        """
+        if not self.matches:
+            return
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            first_id = self.connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM matches").fetchone()[0]
+            self.connection.executemany("INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                        [(first_id + index,) + row for index, row in enumerate(self.matches)])
+            self.connection.executemany("INSERT INTO armies VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                        [(first_id + row[0],) + row[1:] for row in self.armies])
+            self.connection.executemany("INSERT INTO army_units VALUES (?, ?, ?, ?)",
+                                        [(first_id + row[0],) + row[1:] for row in self.army_units])
+        self.matches = []
+        self.armies = []
+        self.army_units = []
+
+    def win_rate(self, army_type, opponent_type, budget=None, policy=None):
+        """Доля побед армий с основным типом army_type над армиями с основным
+        типом opponent_type: (побед, встреч, доля). Встреча - матч армии, в
+        котором хотя бы один противник имеет тип opponent_type; победа - победа
+        в матче. Бюджет и стратегия, если заданы, требуются от обеих армий."""
+        self.flush()
+        army, opponent = "", ""
+        army_params, opponent_params = [], []
+        if budget is not None:
+            army += " AND a.budget = ?"
+            opponent += " AND +b.budget = ?"
+            army_params.append(budget)
+            opponent_params.append(budget)
+        if policy is not None:
+            army += " AND a.policy = ?"
+            opponent += " AND +b.policy = ?"
+            army_params.append(policy)
+            opponent_params.append(policy)
+        query = WIN_RATE_QUERY.format(army=army, opponent=opponent)
+        params = [army_type] + army_params + [opponent_type] + opponent_params
+        games, wins = self.connection.execute(query, params).fetchone()
+        return wins, games, wins / games if games else 0.0
+
+    def count(self):
+        self.flush()
+        return self.connection.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def _record_unit_types(self, version):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO unit_types VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(version, name, data["health"], data["attack"], data["defense"],
+                  data["attack_range"], data["movement_range"], data["cost"])
+                 for name, data in SQUAD_DATA.items()])
+        self.versions.add(version)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Запросы к истории матчей Warhammer 2D")
+    parser.add_argument("database", help="файл базы SQLite (см. simulate.py --history)")
+    parser.add_argument("--win-rate", nargs=2, metavar=("TYPE", "OPPONENT"),
+                        help="доля побед армий с основным типом TYPE против армий с основным типом OPPONENT")
+    parser.add_argument("--budget", type=int, help="только армии с этим бюджетом")
+    parser.add_argument("--policy", help="только армии с этой стратегией бота")
+    args = parser.parse_args(argv)
+
+    history = MatchHistory(args.database)
+    print(f"Матчей в базе: {history.count()}")
+    if args.win_rate:
+        started = time.perf_counter()
+        wins, games, rate = history.win_rate(*args.win_rate, budget=args.budget, policy=args.policy)
+        elapsed = time.perf_counter() - started
+        print(f"{args.win_rate[0]} против {args.win_rate[1]}: побед {wins} из {games} ({rate:.1%}), "
+              f"запрос {elapsed * 1000:.1f} мс")
+    history.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
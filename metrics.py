@@ -0,0 +1,166 @@
+"""Сбор статистики игр для анализа баланса.
+
+MetricsCollector подключается к потоку событий игры (как Recorder в replay.py),
+копит показатели в памяти и записывает их одним блоком в конце игры. Формат -
+длинная таблица со столбцами COLUMNS, по строке на показатель:
+
+    game, turn, faction, unit_type, phase, metric, value
+
+Показатели по ходам, фракциям и типам юнитов: damage_dealt, damage_taken,
+kills, losses, moves, distance; по фазам: dice (одна строка на бросок,
+value - выпавшее число), seconds (время фазы) и plan_seconds (время решения
+бота); plan_nodes - число вариантов, оцененных планировщиком (planner.py).
+
+Файл с расширением .parquet пишется через pyarrow (по группе строк на игру),
+остальные - как CSV. Оба формата дописывают строки к существующему файлу.
+Parquet нельзя дописать на месте, поэтому новый файл собирается рядом
+(прежние группы строк, затем новые) и заменяет старый в close().
+"""
+import csv
+import math
+import os
+import time
+
+COLUMNS = ["game", "turn", "faction", "unit_type", "phase", "metric", "value"]
+
+
+class MetricsCollector:
+    """Показатели серии игр в одном файле; attach() подключает очередную игру"""
+
+    def __init__(self, path, format=None):
+        self.path = path
+        self.format = format or ("parquet" if path.endswith(".parquet") else "csv")
+        self.game_state = None
+        self.forward = None
+        self.game = None
+        self.games = 0
+        self.totals = {}
+        self.rows = []
+        self.phase_started = None
+        self.phase_key = None
+        if self.format == "parquet":
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise RuntimeError("для записи в Parquet нужен pyarrow (pip install pyarrow)") from None
+            self._pa = pyarrow
+            self._writer = None
+            self._temp_path = path + ".tmp"
+        else:
+            new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+            self.file = open(path, "a", encoding="utf-8", newline="")
+            self.csv = csv.writer(self.file)
+            if new_file:
+                self.csv.writerow(COLUMNS)
+
+    def attach(self, game_state, game=None):
+        """Подключается к событиям игры; прежний поток событий продолжает их получать"""
+        self.end_game()
+        self.game_state = game_state
+        self.game = self.games if game is None else game
+        self.forward = game_state.events
+        game_state.events = self
+
+    def publish(self, event_type, **data):
+        if self.forward is not None:
+            self.forward.publish(event_type, **data)
+        gs = self.game_state
+        if event_type == "move":
+            unit = gs.units_by_id.get(data["unit"])
+            if unit is not None:
+                self._add(unit.faction, unit.unit_type, "moves", 1)
+                self._add(unit.faction, unit.unit_type, "distance",
+                          math.hypot(data["x"] - data["from_x"], data["y"] - data["from_y"]))
+        elif event_type == "attack":
+            attacker = gs.units_by_id.get(data["attacker"])
+            target = gs.units_by_id.get(data["target"])
+            if attacker is not None:
+                self._add(attacker.faction, attacker.unit_type, "damage_dealt", data["damage"])
+            if target is not None:
+                self._add(target.faction, target.unit_type, "damage_taken", data["damage"])
+        elif event_type == "death":
+            info = data["unit"]
+            self._add(info["faction"], info["type"], "losses", 1)
+            killer = gs.units_by_id.get(data["killer"])
+            if killer is not None:
+                self._add(killer.faction, killer.unit_type, "kills", 1)
+        elif event_type == "dice_roll":
+            self.rows.append((self.game, gs.turn_number, data["faction"], "", data["phase"],
+                              "dice", data["roll"]))
+        elif event_type == "phase_start":
+            self._close_phase()
+            self.phase_started = time.perf_counter()
+            self.phase_key = (gs.turn_number, data["faction"], "", data["phase"], "seconds")
+        elif event_type == "plan":
+            self.rows.append((self.game, gs.turn_number, data["faction"], "", data["phase"],
+                              "plan_seconds", data["elapsed"]))
+            if "nodes" in data:
+                self.rows.append((self.game, gs.turn_number, data["faction"], "", data["phase"],
+                                  "plan_nodes", data["nodes"]))
+        elif event_type == "game_over":
+            self.end_game()
+
+    def end_game(self):
+        """Записывает показатели текущей игры одним блоком (повторный вызов ничего не делает)"""
+        if self.game_state is None:
+            return
+        self._close_phase()
+        rows = self.rows
+        rows.extend((self.game,) + key + (value,) for key, value in self.totals.items())
+        if rows:
+            if self.format == "parquet":
+                self._write_parquet(rows)
+            else:
+                self.csv.writerows(rows)
+                self.file.flush()
+        self.game_state.events = self.forward
+        self.game_state = None
+        self.forward = None
+        self.totals = {}
+        self.rows = []
+        self.games += 1
+
+    def close(self):
+        self.end_game()
+        if self.format == "parquet":
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+                os.replace(self._temp_path, self.path)
+        else:
+            self.file.close()
+
+    def _add(self, faction, unit_type, metric, value):
+        key = (self.game_state.turn_number, faction, unit_type, self.game_state.current_phase, metric)
+        self.totals[key] = self.totals.get(key, 0) + value
+
+    def _close_phase(self):
+        if self.phase_key is not None:
+            self.rows.append((self.game,) + self.phase_key + (time.perf_counter() - self.phase_started,))
+            self.phase_key = None
+
+    def _write_parquet(self, rows):
+        pa = self._pa
+        columns = list(zip(*rows))
+        table = pa.table({
+            "game": pa.array([str(value) for value in columns[0]]),
+            "turn": pa.array(columns[1], pa.int32()),
+            "faction": pa.array(columns[2]),
+            "unit_type": pa.array(columns[3]),
+            "phase": pa.array([value or "" for value in columns[4]]),
+            "metric": pa.array(columns[5]),
+            "value": pa.array(columns[6], pa.float64()),
+        })
+        if self._writer is None:
+            self._open_parquet(table.schema)
+        self._writer.write_table(table)
+
+    def _open_parquet(self, schema):
+        """Открывает новый файл рядом с прежним и переносит в него прежние группы строк"""
+        parquet = self._pa.parquet
+        self._writer = parquet.ParquetWriter(self._temp_path, schema)
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            previous = parquet.ParquetFile(self.path)
+            for index in range(previous.num_row_groups):
+                self._writer.write_table(previous.read_row_group(index).cast(schema))
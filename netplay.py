@@ -0,0 +1,337 @@
+"""Сетевая игра людей: asyncio-сервер с правилами и клиент.
+
+Протокол - JSON, по одному сообщению на строку. Клиент отправляет действия
+(join, place, ready, move, attack, squad_move, squad_attack, roll, end_turn), сервер применяет их к своему
+GameState и рассылает каждому игроку только изменения (дельты) с учетом тумана
+войны его фракции.
+
+Запуск сервера (в каждом матче --factions игроков, по умолчанию двое):
+    python netplay.py --host 127.0.0.1 --port 8765 --factions 2
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from game_state import GameState
+
+
+class MessageError(ValueError):
+    """Сообщение клиента с неверными полями"""
+
+
+def faction_names(count):
+    """Имена фракций матча на count игроков, как в simulate.py"""
+    return [f"faction{index + 1}" for index in range(count)]
+
+
+def message_cell(message):
+    """Клетка (x, y) из сообщения; MessageError, если координат нет или это не числа"""
+    try:
+        return int(message.get("x")), int(message.get("y"))
+    except (TypeError, ValueError, OverflowError):
+        raise MessageError("неверные координаты")
+
+
+def visible_snapshot(game_state, faction):
+    """Снимок состояния, из которого убраны враги вне обзора фракции"""
+    snapshot = game_state.snapshot()
+    if game_state.state != "setup":
+        visibility = game_state.visibility
+        snapshot["units"] = {
+            unit_id: row for unit_id, row in snapshot["units"].items()
+            if row[1] == faction or visibility.is_visible(faction, row[2], row[3])
+        }
+    return snapshot
+
+
+def make_delta(old, new):
+    """Разница двух снимков: изменившиеся поля, юниты и удаленные id"""
+    delta = {}
+    fields = {key: value for key, value in new.items()
+              if key != "units" and old.get(key) != value}
+    if fields:
+        delta["s"] = fields
+    old_units = old.get("units", {})
+    changed = {unit_id: row for unit_id, row in new["units"].items()
+               if old_units.get(unit_id) != row}
+    if changed:
+        delta["u"] = changed
+    removed = [unit_id for unit_id in old_units if unit_id not in new["units"]]
+    if removed:
+        delta["r"] = removed
+    return delta
+
+
+def apply_delta(snapshot, delta):
+    """Применяет дельту к снимку на стороне клиента"""
+    snapshot.update(delta.get("s", {}))
+    units = snapshot.setdefault("units", {})
+    for unit_id, row in delta.get("u", {}).items():
+        units[int(unit_id)] = row
+    for unit_id in delta.get("r", []):
+        units.pop(int(unit_id), None)
+    return snapshot
+
+
+class Match:
+    """Один матч: состояние игры и подключенные игроки"""
+
+    def __init__(self, match_id, factions=("faction1", "faction2")):
+        self.match_id = match_id
+        self.game_state = GameState(pygame.Surface((600, 600)), bot_factions=(), factions=factions)
+        self.players = {}  # faction -> writer
+        self.sent = {}  # faction -> последний отправленный снимок
+        self.ready = set()
+
+    def free_faction(self):
+        for faction in self.game_state.factions_by_name:
+            if faction not in self.players:
+                return faction
+        return None
+
+    def faction(self, name):
+        return self.game_state.factions_by_name[name]
+
+    def unit(self, message, key="unit"):
+        """Юнит по id из поля сообщения или None"""
+        unit_id = message.get(key)
+        if not isinstance(unit_id, int):
+            return None
+        return self.game_state.units_by_id.get(unit_id)
+
+    def apply(self, faction_name, message):
+        """Применяет действие игрока; возвращает текст ошибки или None"""
+        try:
+            return self._apply(faction_name, message)
+        except MessageError as e:
+            return str(e)
+
+    def _apply(self, faction_name, message):
+        gs = self.game_state
+        action = message.get("a")
+
+        if action == "place":
+            unit_type = message.get("type")
+            if not isinstance(unit_type, str):
+                return "нельзя разместить юнита"
+            grid_x, grid_y = message_cell(message)
+            unit = gs.place_unit(self.faction(faction_name), unit_type, grid_x, grid_y)
+            return None if unit else "нельзя разместить юнита"
+        if action == "ready":
+            if gs.state != "setup":
+                return "игра уже идет"
+            self.ready.add(faction_name)
+            if self.ready >= set(gs.factions_by_name):
+                gs.start_game()
+            return None
+
+        if gs.state == "game_over":
+            return "игра окончена"
+        if gs.state == "setup" or gs.current_faction.name != faction_name:
+            return "сейчас не ваш ход"
+
+        if action == "roll":
+            if gs.phase_roll_complete:
+                return "кубик уже брошен"
+            gs.roll_dice_for_phase()
+            # Фаза морали завершается сразу после броска, как в интерфейсе
+            if gs.current_phase == "Morale" and gs.phase_roll_complete:
+                gs.proceed_to_next_phase()
+            return None
+        if action == "end_turn":
+            gs.end_turn()
+            return None
+        if action == "move":
+            unit = self.unit(message)
+            if unit is None or not gs.move_unit(unit, *message_cell(message)):
+                return "ход невозможен"
+            return None
+        if action == "squad_move":
+            unit = self.unit(message)
+            if unit is None or not gs.move_squad(unit, *message_cell(message)):
+                return "приказ отряду невозможен"
+            return None
+        if action == "squad_attack":
+            unit = self.unit(message)
+            if unit is None or not gs.squad_attack(unit):
+                return "атака отрядом невозможна"
+            return None
+        if action == "attack":
+            unit = self.unit(message)
+            target = self.unit(message, "target")
+            if unit is None or target is None or not gs.attack_target(unit, target):
+                return "атака невозможна"
+            return None
+        return f"неизвестное действие: {action}"
+
+    def deltas(self):
+        """Дельты для каждого игрока относительно последнего отправленного снимка"""
+        result = {}
+        for faction in self.players:
+            snapshot = visible_snapshot(self.game_state, faction)
+            delta = make_delta(self.sent.get(faction, {"units": {}}), snapshot)
+            self.sent[faction] = snapshot
+            if delta:
+                result[faction] = delta
+        return result
+
+
+class GameServer:
+    """Сервер, обслуживающий много матчей в одном процессе"""
+
+    def __init__(self, factions=2):
+        self.matches = {}
+        self.factions = faction_names(factions)
+        self._ids = itertools.count(1)
+
+    async def handle_client(self, reader, writer):
+        match = None
+        faction = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    await self.send(writer, {"t": "error", "msg": "неверный JSON"})
+                    continue
+                if not isinstance(message, dict):
+                    await self.send(writer, {"t": "error", "msg": "ожидается объект JSON"})
+                    continue
+
+                if message.get("a") == "join":
+                    if match is not None:
+                        await self.send(writer, {"t": "error", "msg": "уже в матче"})
+                        continue
+                    match_id = message.get("match")
+                    if match_id is not None and not isinstance(match_id, str):
+                        await self.send(writer, {"t": "error", "msg": "неверный id матча"})
+                        continue
+                    match, faction = self.join(match_id, writer)
+                    if match is None:
+                        await self.send(writer, {"t": "error", "msg": "матч заполнен"})
+                        continue
+                    await self.send(writer, {"t": "joined", "match": match.match_id, "faction": faction})
+                elif match is None:
+                    await self.send(writer, {"t": "error", "msg": "сначала join"})
+                    continue
+                else:
+                    error = match.apply(faction, message)
+                    if error:
+                        await self.send(writer, {"t": "error", "msg": error})
+                await self.broadcast(match)
+        except ConnectionError:
+            pass  # клиент оборвал соединение
+        except asyncio.CancelledError:
+            # Сервер останавливается; задачу не оставляем отмененной, иначе
+            # asyncio выводит трассировку для обработчика соединения
+            pass
+        finally:
+            if match is not None:
+                self.leave(match, faction, writer)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    def join(self, match_id, writer):
+        if match_id is None or match_id not in self.matches:
+            match_id = match_id or f"m{next(self._ids)}"
+            self.matches.setdefault(match_id, Match(match_id, self.factions))
+        match = self.matches[match_id]
+        faction = match.free_faction()
+        if faction is None:
+            return None, None
+        match.players[faction] = writer
+        return match, faction
+
+    def leave(self, match, faction, writer):
+        """Убирает игрока из матча, если его место еще не занял новый игрок"""
+        if match.players.get(faction) is writer:
+            del match.players[faction]
+            match.sent.pop(faction, None)
+        if not match.players:
+            self.matches.pop(match.match_id, None)
+
+    async def broadcast(self, match):
+        for faction, delta in match.deltas().items():
+            writer = match.players.get(faction)
+            if writer is None:
+                continue
+            delta["t"] = "delta"
+            try:
+                await self.send(writer, delta)
+            except ConnectionError:
+                # Оборвано соединение получателя: убираем только его, а не
+                # игрока, чье действие рассылается
+                self.leave(match, faction, writer)
+                writer.close()
+
+    async def send(self, writer, message):
+        writer.write(json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode() + b"\n")
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+class GameClient:
+    """Клиент: отправляет действия и собирает зеркало состояния из дельт"""
+
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self.faction = None
+        self.match_id = None
+        self.state = {"units": {}}
+
+    async def connect(self, host="127.0.0.1", port=8765, match=None):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        await self.send("join", match=match)
+        while self.faction is None:
+            message = await self.receive()
+            if message.get("t") == "error":
+                raise ConnectionError(message.get("msg"))
+
+    async def send(self, action, **fields):
+        fields["a"] = action
+        self.writer.write(json.dumps(fields, separators=(",", ":")).encode() + b"\n")
+        await self.writer.drain()
+
+    async def receive(self):
+        """Читает одно сообщение сервера и применяет его к зеркалу состояния"""
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("сервер закрыл соединение")
+        message = json.loads(line)
+        if message.get("t") == "joined":
+            self.faction = message["faction"]
+            self.match_id = message["match"]
+        elif message.get("t") == "delta":
+            apply_delta(self.state, message)
+        return message
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Сервер сетевой игры Warhammer 2D")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--factions", type=int, default=2, help="игроков в матче (от 2 до 8)")
+    args = parser.parse_args()
+    if not 2 <= args.factions <= 8:
+        parser.error("--factions: от 2 до 8")
+    asyncio.run(GameServer(args.factions).serve(args.host, args.port))
@@ -0,0 +1,60 @@
+import numpy as np
+
+# Каналы характеристик юнита (после каналов занятости по фракциям)
+STAT_CHANNELS = ["health", "attack", "defense", "moved", "attacked"]
+
+
+class BoardPlanes:
+    """Многоканальное представление поля для обучения и аналитики.
+
+    Массив формы (каналы, высота, ширина), float32: занятость по фракциям,
+    характеристики юнита из STAT_CHANNELS и тип юнита (one-hot). Плоскости
+    обновляются по событиям сетки и по on_unit_changed, а не собираются
+    заново из объектов на каждом шаге.
+    """
+
+    def __init__(self, width, height, factions, unit_types):
+        self.faction_index = {name: index for index, name in enumerate(factions)}
+        self.stats_offset = len(self.faction_index)
+        types_offset = self.stats_offset + len(STAT_CHANNELS)
+        self.type_index = {unit_type: types_offset + index for index, unit_type in enumerate(unit_types)}
+        self.names = ([f"occupancy:{name}" for name in factions] + STAT_CHANNELS +
+                      [f"type:{unit_type}" for unit_type in unit_types])
+        self.planes = np.zeros((len(self.names), height, width), dtype=np.float32)
+        self.cells = {}  # unit -> (x, y)
+
+        # Потребители получают только представление без права записи (без копирования)
+        self.readonly = self.planes.view()
+        self.readonly.flags.writeable = False
+
+    def on_cell_occupied(self, grid_x, grid_y, unit):
+        self.cells[unit] = (grid_x, grid_y)
+        self._write(unit, grid_x, grid_y)
+
+    def on_cell_cleared(self, grid_x, grid_y, unit):
+        self.cells.pop(unit, None)
+        self.planes[:, grid_y, grid_x] = 0
+
+    def on_unit_changed(self, unit):
+        cell = self.cells.get(unit)
+        if cell is not None:
+            self._write(unit, *cell)
+
+    def view(self):
+        """Плоскости только для чтения; они меняются вместе с игрой, для хранения делайте copy()"""
+        return self.readonly
+
+    def channel(self, name):
+        """Одна плоскость по имени канала, например "health" или "occupancy:faction1" """
+        return self.readonly[self.names.index(name)]
+
+    def _write(self, unit, grid_x, grid_y):
+        column = self.planes[:, grid_y, grid_x]
+        column[:] = 0
+        column[self.faction_index[unit.faction]] = 1
+        offset = self.stats_offset
+        column[offset:offset + 5] = (unit.health, unit.attack, unit.defense,
+                                     unit.is_moved, unit.is_attacked)
+        type_channel = self.type_index.get(unit.unit_type)
+        if type_channel is not None:
+            column[type_channel] = 1
@@ -0,0 +1,84 @@
+import numpy as np
+
+# Значение пустой клетки: id юнитов начинаются с 1
+EMPTY = 0
+
+
+class OccupancyGrid:
+    """Занятость поля: массив int32 (высота, ширина) с id юнитов и таблица id -> юнит.
+
+    Четыре байта на клетку вместо ссылки в списке списков; запросы по
+    областям поля (свободные клетки, зоны, окрестности) выполняются
+    операциями NumPy без обхода клеток в Python.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.ids = np.zeros((height, width), dtype=np.int32)
+        self.units = {}  # id -> юнит
+
+    def in_bounds(self, grid_x, grid_y):
+        return 0 <= grid_x < self.width and 0 <= grid_y < self.height
+
+    def at(self, grid_x, grid_y):
+        """Юнит в клетке или None"""
+        return self.units.get(self.ids.item(grid_y, grid_x))
+
+    def is_free(self, grid_x, grid_y):
+        return self.ids.item(grid_y, grid_x) == EMPTY
+
+    def place(self, grid_x, grid_y, unit):
+        self.ids[grid_y, grid_x] = unit.id
+        self.units[unit.id] = unit
+
+    def remove(self, grid_x, grid_y):
+        """Освобождает клетку; возвращает стоявшего в ней юнита или None"""
+        unit_id = self.ids.item(grid_y, grid_x)
+        if unit_id == EMPTY:
+            return None
+        self.ids[grid_y, grid_x] = EMPTY
+        return self.units.pop(unit_id, None)
+
+    def occupied(self):
+        """Список (x, y, юнит) по рядам сверху вниз, как при обходе grid[y][x]"""
+        ys, xs = np.nonzero(self.ids)
+        return [(x, y, self.units[unit_id])
+                for x, y, unit_id in zip(xs.tolist(), ys.tolist(), self.ids[ys, xs].tolist())]
+
+    # --- Маски и области ---
+
+    def free_mask(self):
+        """Булев массив (высота, ширина): True для свободных клеток"""
+        return self.ids == EMPTY
+
+    def zone_mask(self, start, end):
+        """Булев массив зоны расстановки - столбцов с start по end - 1"""
+        mask = np.zeros((self.height, self.width), dtype=bool)
+        mask[:, start:end] = True
+        return mask
+
+    def units_mask(self, units):
+        """Булев массив клеток, занятых перечисленными юнитами (например, фракцией)"""
+        return np.isin(self.ids, [unit.id for unit in units])
+
+    def cells(self, mask):
+        """Клетки маски списком (x, y) по рядам сверху вниз"""
+        ys, xs = np.nonzero(mask)
+        return list(zip(xs.tolist(), ys.tolist()))
+
+    def window(self, grid_x, grid_y, radius):
+        """Окрестность клетки в квадрате радиуса radius, обрезанная границами поля.
+
+        Возвращает (представление ids, x левого столбца, y верхнего ряда).
+        """
+        x0 = max(0, grid_x - radius)
+        y0 = max(0, grid_y - radius)
+        return self.ids[y0:grid_y + radius + 1, x0:grid_x + radius + 1], x0, y0
+
+    def units_near(self, grid_x, grid_y, radius):
+        """Юниты в квадрате радиуса radius: список (x, y, юнит)"""
+        window, x0, y0 = self.window(grid_x, grid_y, radius)
+        ys, xs = np.nonzero(window)
+        return [(x0 + x, y0 + y, self.units[unit_id])
+                for x, y, unit_id in zip(xs.tolist(), ys.tolist(), window[ys, xs].tolist())]
@@ -0,0 +1,184 @@
+"""Таблицы урона и шансов убийства для пар типов юнитов.
+
+Для каждой пары (тип атакующего, тип цели) и прибавки к защите от местности
+таблица хранит урон при каждом сочетании бросков: броска фазы атаки у
+атакующего и броска фазы морали у цели (матрица 6x6, все исходы
+равновероятны), а также вероятность убить цель за k ударов при любом остатке
+здоровья. Характеристики берутся из squads.json: таблица описывает юнитов с
+исходными характеристиками типа и одним броском каждого кубика.
+
+Таблица строится один раз на версию squads.json и сохраняется на диск в
+CACHE_DIR под хэшем содержимого (unit.squad_data_hash), поэтому боты и
+подсказка в интерфейсе получают шансы без пересчета во внутренних циклах.
+odds_table() хранит таблицу в памяти и не хэширует данные при каждом вызове;
+при перезагрузке squads.json (SquadDataWatcher) таблицу сбрасывает reset_odds_table().
+"""
+import os
+
+import numpy as np
+
+from unit import SQUAD_DATA, squad_data_hash
+from terrain import TERRAIN_TYPES
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# Число ударов, для которых хранятся шансы убийства
+MAX_HITS = 16
+
+ROLLS = range(1, 7)
+
+
+def attack_modifier(dice_roll):
+    """Множитель атаки фазы атаки: от -0.5 до +0.5"""
+    return max(-0.5, (dice_roll - 3) / 6)
+
+
+def morale_modifier(dice_roll):
+    """Множитель защиты фазы морали: от -0.3 до +0.3"""
+    return max(-0.3, (dice_roll - 3) / 10)
+
+
+def modified_attack(attack, dice_roll):
+    return max(5, int(attack * (1 + attack_modifier(dice_roll))))
+
+
+def modified_defense(defense, dice_roll):
+    return max(5, int(defense * (1 + morale_modifier(dice_roll))))
+
+
+def terrain_bonuses():
+    """Прибавки к защите, которые дает местность"""
+    return sorted({data["defense"] for data in TERRAIN_TYPES.values()})
+
+
+class OddsTable:
+    """Урон и шансы убийства по типам юнитов.
+
+    damage[атакующий, цель, прибавка, бросок атаки - 1, бросок морали - 1] - урон удара;
+    kills[атакующий, цель, прибавка, k - 1, здоровье] - вероятность, что k
+    ударов (каждый со своими бросками) снимут не меньше этого здоровья.
+    """
+
+    def __init__(self, types, bonuses, damage, kills, version=None):
+        self.types = list(types)
+        self.bonuses = list(bonuses)
+        self.damage = damage
+        self.kills = kills
+        self.version = version
+        self.type_index = {name: index for index, name in enumerate(self.types)}
+        self.bonus_index = {bonus: index for index, bonus in enumerate(self.bonuses)}
+        self.expected = damage.mean(axis=(3, 4))
+
+    @classmethod
+    def build(cls, data, bonuses=None):
+        bonuses = terrain_bonuses() if bonuses is None else sorted(bonuses)
+        types = sorted(data)
+        max_health = max(data[name]["health"] for name in types)
+        damage = np.zeros((len(types), len(types), len(bonuses), 6, 6), dtype=np.int32)
+        kills = np.zeros((len(types), len(types), len(bonuses), MAX_HITS, max_health + 1), dtype=np.float32)
+        for a, attacker in enumerate(types):
+            attacks = np.array([modified_attack(data[attacker]["attack"], roll) for roll in ROLLS])
+            for d, defender in enumerate(types):
+                defenses = np.array([modified_defense(data[defender]["defense"], roll) for roll in ROLLS])
+                for b, bonus in enumerate(bonuses):
+                    hits = np.maximum(0, attacks[:, None] - (defenses[None, :] + bonus) // 2)
+                    damage[a, d, b] = hits
+                    kills[a, d, b] = kill_curves(hits.ravel(), max_health)
+        return cls(types, bonuses, damage, kills, squad_data_hash(data))
+
+    @classmethod
+    def load(cls, data=None, cache_dir=CACHE_DIR):
+        """Таблица для описаний отрядов data (по умолчанию SQUAD_DATA) из кэша на
+        диске или построенная заново; новая таблица сохраняется в кэш"""
+        data = SQUAD_DATA if data is None else data
+        version = squad_data_hash(data)
+        path = os.path.join(cache_dir, f"odds_{version}.npz")
+        bonuses = terrain_bonuses()
+        try:
+            with np.load(path) as cached:
+                if cached["bonuses"].tolist() == bonuses and cached["types"].tolist() == sorted(data):
+                    return cls(cached["types"].tolist(), bonuses, cached["damage"], cached["kills"], version)
+        except (OSError, KeyError, ValueError):
+            pass
+        table = cls.build(data, bonuses)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.savez_compressed(path, types=np.array(table.types), bonuses=np.array(bonuses),
+                                damage=table.damage, kills=table.kills)
+        except OSError as e:
+            print(f"Не удалось сохранить таблицу шансов {path}: {e}")
+        return table
+
+    def _key(self, attacker_type, defender_type, bonus):
+        return self.type_index[attacker_type], self.type_index[defender_type], self.bonus_index[bonus]
+
+    def covers(self, attacker_type, defender_type, bonus=0):
+        return (attacker_type in self.type_index and defender_type in self.type_index
+                and bonus in self.bonus_index)
+
+    def damage_matrix(self, attacker_type, defender_type, bonus=0):
+        """Урон 6x6: строка - бросок атаки, столбец - бросок морали цели"""
+        return self.damage[self._key(attacker_type, defender_type, bonus)]
+
+    def expected_damage(self, attacker_type, defender_type, bonus=0):
+        return float(self.expected[self._key(attacker_type, defender_type, bonus)])
+
+    def damage_range(self, attacker_type, defender_type, bonus=0):
+        matrix = self.damage_matrix(attacker_type, defender_type, bonus)
+        return int(matrix.min()), int(matrix.max())
+
+    def kill_probability(self, attacker_type, defender_type, health, hits=1, bonus=0):
+        """Вероятность снять health здоровья за hits ударов"""
+        curves = self.kills[self._key(attacker_type, defender_type, bonus)]
+        if health <= 0:
+            return 1.0
+        health = min(health, curves.shape[1] - 1)
+        return float(curves[min(hits, MAX_HITS) - 1, health])
+
+    def hits_to_kill(self, attacker_type, defender_type, health, bonus=0):
+        """Ожидаемое число ударов до убийства; inf, если за MAX_HITS ударов убить нельзя"""
+        curves = self.kills[self._key(attacker_type, defender_type, bonus)]
+        if health <= 0:
+            return 0.0
+        health = min(health, curves.shape[1] - 1)
+        alive = 1.0 - curves[:, health]
+        if alive[-1] > 0.999:
+            return float("inf")
+        # E[N] = сумма P(N > k) по k от 0; хвост после MAX_HITS отбрасывается
+        return float(1.0 + alive[:-1].sum())
+
+
+def kill_curves(outcomes, max_health):
+    """Вероятности снять не меньше h здоровья за k ударов для k = 1..MAX_HITS.
+
+    outcomes - равновероятные значения урона одного удара. Распределение
+    суммарного урона обрезается на max_health: больше снять уже не нужно.
+    """
+    single = np.bincount(np.minimum(outcomes, max_health), minlength=max_health + 1) / len(outcomes)
+    total = single
+    curves = np.empty((MAX_HITS, max_health + 1))
+    for k in range(MAX_HITS):
+        if k:
+            total = np.convolve(total, single)
+            total = np.append(total[:max_health], total[max_health:].sum())
+        # P(сумма >= h) - хвост распределения
+        curves[k] = total[::-1].cumsum()[::-1]
+    return curves
+
+
+_table = None
+
+
+def odds_table():
+    """Таблица для текущего SQUAD_DATA. Строится (или читается с диска) один раз;
+    после перезагрузки squads.json нужно вызвать reset_odds_table()"""
+    global _table
+    if _table is None:
+        _table = OddsTable.load()
+    return _table
+
+
+def reset_odds_table():
+    """Сбрасывает таблицу: следующий odds_table() возьмет новые данные SQUAD_DATA"""
+    global _table
+    _table = None
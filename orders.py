@@ -0,0 +1,209 @@
+import numpy as np
+
+from assignment import solve_assignment, FORBIDDEN
+
+# Сколько лучших клеток каждого юнита попадает в общую задачу о назначениях
+ARMY_MOVE_CHOICES = 12
+
+# Ценность удара по цели, которую уже добивают другие назначенные юниты
+OVERKILL_WEIGHT = 0.1
+
+
+def step_offsets(dx, dy):
+    """Смещения вдоль вектора (dx, dy) от полного до одной клетки"""
+    steps = max(abs(dx), abs(dy))
+    for step in range(steps, 0, -1):
+        yield round(dx * step / steps), round(dy * step / steps)
+
+
+def plan_squad_move(grid, units, offset, grid_size=32, reachable=None):
+    """Планирует перемещение отряда на смещение offset с сохранением строя.
+
+    Все юниты сдвигаются на один и тот же вектор. Столкновения разрешаются за
+    один проход по сетке занятости: юниты, стоящие дальше по направлению
+    движения, ходят первыми и освобождают клетки для идущих следом. Юнит,
+    которому не хватает дальности или путь занят, укорачивает шаг вдоль того же
+    вектора, а если не помещается и так - остается на месте.
+    reachable(unit) - досягаемые клетки юнита с учетом местности; без него
+    дальность проверяется по радиусу movement_range.
+    Возвращает список (юнит, (старые x, y), (новые x, y)) для двигающихся юнитов.
+    """
+    dx, dy = offset
+    if not units or (dx == 0 and dy == 0):
+        return []
+    cells = {unit: (unit.rect.x // grid_size, unit.rect.y // grid_size) for unit in units}
+    order = sorted(units, key=lambda unit: (-(cells[unit][0] * dx + cells[unit][1] * dy), unit.id))
+
+    vacated = set()  # клетки, которые отряд уже освободил
+    taken = set()  # клетки, занятые отрядом после хода
+    plan = []
+    for unit in order:
+        x, y = cells[unit]
+        reach = reachable(unit) if reachable is not None else None
+        target = None
+        for step_x, step_y in step_offsets(dx, dy):
+            new_x, new_y = x + step_x, y + step_y
+            if reach is not None:
+                if (new_x, new_y) not in reach:
+                    continue
+            elif step_x * step_x + step_y * step_y > unit.movement_range * unit.movement_range:
+                continue
+            if not grid.in_bounds(new_x, new_y) or (new_x, new_y) in taken:
+                continue
+            if not grid.is_free(new_x, new_y) and (new_x, new_y) not in vacated:
+                continue
+            target = (new_x, new_y)
+            break
+        if target is None:
+            taken.add((x, y))
+            continue
+        vacated.add((x, y))
+        taken.add(target)
+        plan.append((unit, (x, y), target))
+    return plan
+
+
+def assign_targets(attackers, targets_of, damage=None):
+    """Распределяет цели между атакующими юнитами отряда.
+
+    targets_of(unit) возвращает цели в досягаемости юнита, damage(unit, цель) -
+    ожидаемый урон (по умолчанию unit.damage_against). Юниты с меньшим
+    выбором назначаются первыми; каждый бьет цель с наименьшим ожидаемым
+    остатком здоровья среди тех, кого предыдущие назначения еще не добивают.
+    Возвращает список пар (юнит, цель) в порядке выполнения.
+    """
+    if damage is None:
+        damage = lambda unit, target: unit.damage_against(target)
+    remaining = {}
+    options = []
+    for unit in attackers:
+        candidates = targets_of(unit)
+        if candidates:
+            options.append((unit, candidates))
+            for target in candidates:
+                remaining[target] = target.health
+    options.sort(key=lambda item: (len(item[1]), item[0].id))
+
+    assignment = []
+    for unit, candidates in options:
+        alive = [target for target in candidates if remaining[target] > 0]
+        if not alive:
+            continue
+        target = min(alive, key=lambda target: (remaining[target], target.id))
+        remaining[target] -= damage(unit, target)
+        assignment.append((unit, target))
+    return assignment
+
+
+def plan_army_move(grid, units, enemies, grid_size=32, reachable=None, choices=ARMY_MOVE_CHOICES):
+    """Планирует ход всех юнитов армии одной задачей о назначениях.
+
+    Цель каждого юнита - ближайший враг; стоимость клетки - сколько клеток
+    (по Манхэттену) не хватит до дальности атаки по цели, плюс малая добавка
+    за отклонение от точной дальности. В задачу попадают choices лучших
+    свободных клеток каждого юнита и его текущая клетка (остаться на месте),
+    поэтому две клетки одному юниту не достанутся, а конфликты за клетки
+    решаются в том же решении. reachable(unit) - досягаемые клетки, как в
+    plan_squad_move. Возвращает список (юнит, (старые x, y), (новые x, y))
+    для юнитов, которые сдвигаются.
+    """
+    if not units or not enemies:
+        return []
+    positions = np.array([(unit.rect.x // grid_size, unit.rect.y // grid_size) for unit in units])
+    enemy_positions = np.array([(enemy.rect.x // grid_size, enemy.rect.y // grid_size) for enemy in enemies])
+    distances = ((positions[:, None, :] - enemy_positions[None, :, :]) ** 2).sum(axis=2)
+    goals = enemy_positions[distances.argmin(axis=1)]
+    attack_ranges = np.array([unit.attack_range for unit in units])
+    free = grid.free_mask()
+
+    # Досягаемые клетки всех юнитов одним массивом (строка юнита, x, y)
+    reach_rows, reach_cells = [], []
+    for row, unit in enumerate(units):
+        if reachable is not None:
+            cells = list(reachable(unit))
+        else:
+            x, y = positions[row]
+            radius = unit.movement_range
+            cells = [(x + dx, y + dy) for dx in range(-radius, radius + 1) for dy in range(-radius, radius + 1)
+                     if 0 < dx * dx + dy * dy <= radius * radius
+                     and grid.in_bounds(x + dx, y + dy)]
+        reach_rows.extend([row] * len(cells))
+        reach_cells.extend(cells)
+    rows = np.array(reach_rows, dtype=np.intp)
+    cells = np.array(reach_cells, dtype=np.intp).reshape(-1, 2)
+    keep = free[cells[:, 1], cells[:, 0]]
+    rows, cells = rows[keep], cells[keep]
+    gap = np.abs(cells - goals[rows]).sum(axis=1) - attack_ranges[rows]
+    cost = np.maximum(gap, 0) + 0.01 * np.abs(gap)
+    # У каждого юнита оставляем choices самых дешевых клеток
+    order = np.lexsort((cost, rows))
+    rows, cells, cost = rows[order], cells[order], cost[order]
+    starts = np.searchsorted(rows, rows)
+    keep = np.arange(len(rows)) - starts < choices
+    rows, cells, cost = rows[keep], cells[keep], cost[keep]
+    # Текущая клетка юнита - вариант "остаться"; другим юнитам она недоступна, так как занята
+    gap = np.abs(positions - goals).sum(axis=1) - attack_ranges
+    rows = np.concatenate([rows, np.arange(len(units))])
+    cells = np.vstack([cells, positions])
+    cost = np.concatenate([cost, np.maximum(gap, 0) + 0.01 * np.abs(gap)])
+
+    columns, cell_index = np.unique(cells[:, 1] * grid.width + cells[:, 0], return_inverse=True)
+    matrix = np.full((len(units), len(columns)), FORBIDDEN)
+    matrix[rows, cell_index] = cost
+
+    plan = []
+    for row, column in zip(*solve_assignment(matrix)):
+        new = (int(columns[column] % grid.width), int(columns[column] // grid.width))
+        old = (int(positions[row][0]), int(positions[row][1]))
+        if new != old:
+            plan.append((units[row], old, new))
+    return plan
+
+
+def plan_army_attack(attackers, targets_of, damage=None):
+    """Распределяет цели между всеми атакующими юнитами армии.
+
+    Каждой цели отводится столько мест, сколько юнитов её достают; места по
+    порядку ценятся как удар, пока ожидаемый урон предыдущих мест не убивает
+    цель, и в OVERKILL_WEIGHT раз дешевле после этого. Ценность удара - урон
+    (не больше остатка здоровья) плюс доля атаки цели, которую он снимает.
+    Места распределяются одной задачей о назначениях. damage - как в
+    assign_targets. Возвращает список пар (юнит, цель) в порядке выполнения:
+    по целям, сильнейшие удары первыми.
+    """
+    if damage is None:
+        damage = lambda unit, target: unit.damage_against(target)
+    reach = {}
+    for unit in attackers:
+        for target in targets_of(unit):
+            reach.setdefault(target, []).append(unit)
+    if not reach:
+        return []
+    index = {unit: row for row, unit in enumerate(attackers)}
+    slots = []  # (цель, множитель ценности)
+    entries = []  # (строка, столбец, стоимость)
+    for target, units in reach.items():
+        hits = sorted(((damage(unit, target), unit) for unit in units), key=lambda hit: (-hit[0], hit[1].id))
+        first = len(slots)
+        expected = target.health
+        for hit, _ in hits:
+            slots.append((target, 1.0 if expected > 0 else OVERKILL_WEIGHT))
+            expected -= hit
+        for hit, unit in hits:
+            dealt = min(hit, target.health)
+            value = dealt + target.attack * dealt / target.health
+            for column in range(first, len(slots)):
+                entries.append((index[unit], column, -value * slots[column][1]))
+    matrix = np.full((len(attackers), len(slots)), FORBIDDEN)
+    rows, columns, costs = zip(*entries)
+    matrix[list(rows), list(columns)] = costs
+
+    chosen = {}
+    for row, column in zip(*solve_assignment(matrix)):
+        target = slots[column][0]
+        chosen.setdefault(target, []).append(attackers[row])
+    order = []
+    for target, units in chosen.items():
+        units.sort(key=lambda unit: (-damage(unit, target), unit.id))
+        order.extend((unit, target) for unit in units)
+    return order
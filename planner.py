@@ -0,0 +1,257 @@
+"""Планировщик ходов бота с ограничением по времени (anytime).
+
+Планировщик перебирает варианты действия фазы в порядке эвристики - сначала
+лучший вариант каждого юнита, затем остальные - и оценивает их, пока не
+кончится бюджет времени; возвращается лучший найденный вариант. Чем больше
+бюджет, тем больше вариантов проверено, поэтому уровни сложности - это просто
+бюджеты (DIFFICULTY). Бюджет отсчитывается от начала решения фазы, вместе с
+подготовкой перед поиском, и превышается не больше чем на один вариант:
+хотя бы один вариант оценивается всегда (если первый вариант требует
+пересчета обзора после движения, это время тоже уходит на него).
+
+Телеметрия поиска (PlanStats) публикуется событием "plan" и пишется в лог;
+MetricsCollector сохраняет её как показатели plan_nodes и plan_seconds.
+"""
+import itertools
+import time
+
+from transposition import TranspositionTable
+from odds import odds_table
+
+# Бюджеты времени на фазу (секунды) по уровням сложности
+DIFFICULTY = {
+    "easy": 0.002,
+    "normal": 0.02,
+    "hard": 0.2,
+}
+
+# Веса оценки позиции после хода
+EXPOSURE_WEIGHT = 0.6  # урон, который враг может нанести походившему юниту
+PROGRESS_WEIGHT = 2.0  # сближение с врагом (за клетку)
+
+# Сколько точек истории оценки хранить в телеметрии
+TRACE_LIMIT = 32
+
+
+class PlanStats:
+    """Телеметрия одного поиска"""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.nodes = 0
+        self.elapsed = 0.0
+        self.trace = []  # (секунды от начала, лучшая оценка)
+        self.complete = False  # все варианты проверены до истечения бюджета
+        self.score = None
+
+    def as_dict(self):
+        return {"nodes": self.nodes, "elapsed": round(self.elapsed, 6), "budget": self.budget,
+                "complete": self.complete, "score": self.score,
+                "trace": [[round(moment, 6), round(score, 3)] for moment, score in self.trace]}
+
+
+class AnytimePlanner:
+    """Перебор вариантов с лучшей оценкой до дедлайна.
+
+    budget - секунды на поиск; max_nodes - предел числа оценок (для
+    воспроизводимых прогонов, когда время не должно влиять на выбор).
+    Лучшие ходы позиций хранятся в таблице транспозиций и при повторе
+    позиции проверяются первыми.
+    """
+
+    def __init__(self, budget=DIFFICULTY["normal"], max_nodes=None, table=None):
+        self.budget = budget
+        self.max_nodes = max_nodes
+        self.table = table if table is not None else TranspositionTable(1 << 12)
+
+    def search(self, candidates, evaluate, key=None, resolve=None, started=None):
+        """Возвращает (лучший вариант или None, PlanStats).
+
+        candidates - итерируемые пары (ход, вариант), где ход - хешируемое
+        описание для таблицы транспозиций; evaluate(вариант) -> оценка.
+        resolve(ход) -> вариант или None восстанавливает лучший ход позиции
+        key из таблицы, чтобы оценить его первым. started - момент
+        (time.perf_counter) начала решения фазы: подготовка до поиска
+        входит в бюджет и в PlanStats.elapsed. Хотя бы один вариант
+        оценивается, даже если бюджет ушел на подготовку.
+        """
+        stats = PlanStats(self.budget)
+        if started is None:
+            started = time.perf_counter()
+        deadline = started + self.budget
+        self.table.new_search()
+        first = []
+        hint = self.table.best_move(key) if key is not None and resolve is not None else None
+        if hint is not None:
+            candidate = resolve(hint)
+            if candidate is not None:
+                first.append((hint, candidate))
+
+        best = None
+        best_move = None
+        for move, candidate in itertools.chain(first, candidates):
+            score = evaluate(candidate)
+            stats.nodes += 1
+            if stats.score is None or score > stats.score:
+                stats.score = score
+                best = candidate
+                best_move = move
+                if len(stats.trace) < TRACE_LIMIT:
+                    stats.trace.append((time.perf_counter() - started, score))
+            if self.max_nodes is not None and stats.nodes >= self.max_nodes:
+                break
+            if self.max_nodes is None and time.perf_counter() >= deadline:
+                break
+        else:
+            stats.complete = True
+        stats.elapsed = time.perf_counter() - started
+        if key is not None and best_move is not None:
+            self.table.store(key, stats.nodes, stats.score, move=best_move)
+        return best, stats
+
+
+class PlannerBot:
+    """Стратегия бота на основе AnytimePlanner: одно лучшее действие за фазу.
+
+    last_stats - PlanStats последнего поиска; GameState публикует их событием "plan".
+    """
+    name = "planner"
+
+    def __init__(self, budget=DIFFICULTY["normal"], max_nodes=None):
+        self.planner = AnytimePlanner(budget, max_nodes)
+        self.last_stats = None
+
+    def movement(self, game_state):
+        started = time.perf_counter()
+        gs = game_state
+        self.last_stats = None
+        faction = gs.current_faction
+        enemies = [(enemy, enemy.rect.x // gs.grid_size, enemy.rect.y // gs.grid_size)
+                   for enemy in gs.enemy_units(faction)]
+        units = [unit for unit in faction.units if not unit.is_moved]
+        if not enemies or not units:
+            return
+        # Лучший удар, уже доступный юнитам, от хода других юнитов не зависит;
+        # двух лучших достаточно, чтобы знать лучший удар "остальных" для любого юнита
+        # Удар будет в следующей фазе, после броска, поэтому оценки - ожидаемые (odds.py)
+        table = odds_table()
+        ready = sorted(((max((expected_strike_value(table, gs, unit, target)
+                              for target in gs.target_index.targets_of(unit)), default=0), unit.id)
+                        for unit in faction.units), reverse=True)[:2]
+        strikes = {}  # (тип юнита, враг) -> ожидаемая ценность удара
+        threats = {}  # (тип врага, тип юнита, прибавка к защите) -> ожидаемый урон
+
+        def evaluate(candidate):
+            unit, (x, y) = candidate
+            others = next((value for value, unit_id in ready if unit_id != unit.id), 0)
+            own = 0
+            exposure = 0
+            nearest = None
+            bonus = gs.terrain.defense(x, y) if gs.terrain is not None else 0
+            for enemy, enemy_x, enemy_y in enemies:
+                distance = abs(enemy_x - x) + abs(enemy_y - y)
+                if distance <= unit.attack_range:
+                    key = (unit.unit_type, enemy)
+                    if key not in strikes:
+                        strikes[key] = expected_strike_value(table, gs, unit, enemy)
+                    own = max(own, strikes[key])
+                if distance <= enemy.movement_range + enemy.attack_range:
+                    key = (enemy.unit_type, unit.unit_type, bonus)
+                    if key not in threats:
+                        threats[key] = expected_damage(table, enemy, unit, bonus)
+                    exposure = max(exposure, threats[key])
+                distance_sq = (enemy_x - x) ** 2 + (enemy_y - y) ** 2
+                if nearest is None or distance_sq < nearest:
+                    nearest = distance_sq
+            return max(own, others) - EXPOSURE_WEIGHT * exposure - PROGRESS_WEIGHT * nearest ** 0.5
+
+        def resolve(move):
+            unit = gs.units_by_id.get(move[0])
+            cell = move[1:]
+            if (unit is None or unit.faction != faction.name or unit.is_moved
+                    or cell not in gs.reachable(unit) or not gs.grid.is_free(*cell)):
+                return None
+            return unit, cell
+
+        best, stats = self.planner.search(movement_candidates(gs, units), evaluate,
+                                          gs.position_key(), resolve, started)
+        self.last_stats = stats
+        if best is not None:
+            unit, (x, y) = best
+            gs.execute_bot_move(unit, x, y)
+
+    def attack(self, game_state):
+        started = time.perf_counter()
+        gs = game_state
+        candidates = ((("attack", unit.id, target.id), (unit, target))
+                      for unit in gs.current_faction.units if not unit.is_attacked
+                      for target in gs.attackable_targets(unit))
+        def resolve(move):
+            unit, target = gs.units_by_id.get(move[1]), gs.units_by_id.get(move[2])
+            if unit is None or target is None or unit.faction != gs.current_faction.name or unit.is_attacked:
+                return None
+            return (unit, target) if target in gs.attackable_targets(unit) else None
+
+        best, stats = self.planner.search(candidates, lambda pair: strike_value(gs, *pair),
+                                          gs.position_key(), resolve, started)
+        self.last_stats = stats
+        if best is not None:
+            unit, target = best
+            gs.process_bot_attack(unit, [target])
+            gs.check_victory()
+
+
+def strike_value(game_state, unit, target):
+    """Ценность удара: урон с учетом местности цели плюс атака цели, если удар её убивает"""
+    damage = unit.damage_against(target, game_state.defense_bonus(target))
+    return damage + (target.attack if damage >= target.health else 0)
+
+
+def expected_damage(table, unit, target, defense_bonus=0):
+    """Средний урон удара по таблице шансов; для типов вне таблицы - урон при текущих характеристиках"""
+    if table.covers(unit.unit_type, target.unit_type, defense_bonus):
+        return table.expected_damage(unit.unit_type, target.unit_type, defense_bonus)
+    return unit.damage_against(target, defense_bonus)
+
+
+def expected_strike_value(table, game_state, unit, target):
+    """Ожидаемая ценность удара до броска: средний урон плюс атака цели, умноженная на шанс убить"""
+    bonus = game_state.defense_bonus(target)
+    if not table.covers(unit.unit_type, target.unit_type, bonus):
+        return strike_value(game_state, unit, target)
+    damage = min(table.expected_damage(unit.unit_type, target.unit_type, bonus), target.health)
+    return damage + target.attack * table.kill_probability(unit.unit_type, target.unit_type,
+                                                           target.health, 1, bonus)
+
+
+def movement_candidates(game_state, units):
+    """Варианты хода (юнит, клетка) в порядке эвристики.
+
+    Сначала по одной лучшей клетке каждого юнита (ближайшей к его ближайшему
+    врагу), затем вторые по качеству и так далее, поэтому даже малый бюджет
+    покрывает всех юнитов. Клетки юнита считаются, только когда до него дошла очередь.
+    """
+    gs = game_state
+    ranked = []
+    for unit in units:
+        enemy = gs.spatial.nearest_enemy(unit)
+        if enemy is None:
+            continue
+        enemy_x, enemy_y = enemy.rect.x // gs.grid_size, enemy.rect.y // gs.grid_size
+        cells = [cell for cell in gs.reachable(unit) if gs.grid.is_free(*cell)]
+        cells.sort(key=lambda cell: ((cell[0] - enemy_x) ** 2 + (cell[1] - enemy_y) ** 2, cell[1], cell[0]))
+        ranked.append((unit, cells))
+        if cells:
+            x, y = cells[0]
+            yield (unit.id, x, y), (unit, (x, y))
+    depth = 1
+    while True:
+        found = False
+        for unit, cells in ranked:
+            if depth < len(cells):
+                found = True
+                x, y = cells[depth]
+                yield (unit.id, x, y), (unit, (x, y))
+        if not found:
+            return
+        depth += 1
@@ -0,0 +1,227 @@
+"""Запись игр и экспорт повторов в кадры без дисплея.
+
+Запись - это поток событий (JSON Lines, см. events.py), в который через каждые
+interval событий вставляется ключевой кадр со снимком состояния. Экспорт
+разбивает запись на отрезки по ключевым кадрам и рисует их параллельно в
+процессах-обработчиках на скрытой поверхности pygame.
+
+Пример:
+    python replay.py game.jsonl --png frames/
+    python replay.py game.jsonl --pipe "ffmpeg -y -f rawvideo -pix_fmt rgb24 -s {width}x{height} -r 10 -i - game.mp4"
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shlex
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from events import EventStream
+from game_state import GameState
+from terrain import TerrainMap
+
+# События, после которых рисуется кадр (бросок кубика картинку не меняет)
+FRAME_EVENTS = {"placement", "move", "attack", "death", "phase_start", "game_over"}
+
+
+class Recorder:
+    """Записывает события игры с ключевыми кадрами.
+
+    Подключается вместо game_state.events; если передан forward, события
+    дополнительно пересылаются в него (например, в основной EventStream).
+    """
+
+    def __init__(self, game_state, target, interval=50, forward=None):
+        self.game_state = game_state
+        self.interval = interval
+        self.forward = forward
+        # Запись не должна терять события, поэтому очередь не ограничена
+        self.stream = EventStream(target, maxsize=0)
+        self.count = 0
+        game_state.events = self
+        self.keyframe()
+
+    def keyframe(self):
+        gs = self.game_state
+        self.stream.publish("keyframe", factions=list(gs.factions_by_name),
+                            board=[gs.grid.width, gs.grid.height], snapshot=gs.snapshot(),
+                            terrain=gs.terrain.dump() if gs.terrain is not None else None)
+
+    def publish(self, event_type, **data):
+        self.stream.publish(event_type, **data)
+        if self.forward is not None:
+            self.forward.publish(event_type, **data)
+        self.count += 1
+        if self.count % self.interval == 0:
+            self.keyframe()
+
+    def close(self):
+        self.stream.close()
+
+
+def load_segments(path):
+    """Читает запись и делит её на отрезки: (ключевой кадр, события до следующего)"""
+    segments = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            event = json.loads(line)
+            if event["type"] == "keyframe":
+                segments.append((event, []))
+            elif segments:
+                segments[-1][1].append(event)
+    return segments
+
+
+def apply_event(game_state, event):
+    """Применяет записанное событие к состоянию игры"""
+    gs = game_state
+    kind = event["type"]
+    if kind == "placement":
+        info = event["unit"]
+        gs.restore_unit(info["id"], info["type"], info["faction"], info["x"], info["y"], info["health"])
+    elif kind == "move":
+        unit = gs.units_by_id.get(event["unit"])
+        if unit is not None:
+            gs.clear_cell(event["from_x"], event["from_y"])
+            unit.rect.x = event["x"] * gs.grid_size
+            unit.rect.y = event["y"] * gs.grid_size
+            gs.occupy_cell(event["x"], event["y"], unit)
+            unit.is_moved = True
+            gs.unit_changed(unit)
+    elif kind == "attack":
+        attacker = gs.units_by_id.get(event["attacker"])
+        target = gs.units_by_id.get(event["target"])
+        if attacker is not None:
+            attacker.is_attacked = True
+            gs.unit_changed(attacker)
+        if target is not None:
+            target.health = event["target_health"]
+            gs.unit_changed(target)
+    elif kind == "death":
+        unit = gs.units_by_id.get(event["unit"]["id"])
+        if unit is not None:
+            gs.clear_cell(event["unit"]["x"], event["unit"]["y"])
+            gs.factions_by_name[unit.faction].remove_unit(unit)
+    elif kind == "phase_start":
+        gs.state = "turn"
+        gs.current_faction = gs.factions_by_name[event["faction"]]
+        if event["phase"] == gs.phases[0]:
+            # Новый ход фракции: флаги её юнитов сбрасываются
+            for unit in gs.current_faction.units:
+                unit.is_moved = False
+                unit.is_attacked = False
+                gs.unit_changed(unit)
+        gs.current_phase = event["phase"]
+        gs.phase_roll_complete = False
+    elif kind == "dice_roll":
+        gs.dice_roll = event["roll"]
+        gs.phase_roll_complete = True
+    elif kind == "game_over":
+        gs.state = "game_over"
+        gs.winner = event["winner"]
+
+
+def render_segment(job):
+    """Рисует кадры одного отрезка.
+
+    Если задан каталог png_dir, кадры сохраняются в файлы и возвращается их
+    число; иначе возвращается список сырых кадров RGB.
+    """
+    keyframe, events, first_frame, png_dir, include_keyframe = job
+    width, height = keyframe["board"]
+    game_state = GameState(pygame.Surface((width * 32, height * 32)), bot_factions=(),
+                           factions=keyframe["factions"])
+    if keyframe.get("terrain"):
+        game_state.set_terrain(TerrainMap.parse(keyframe["terrain"]))
+    game_state.restore(keyframe["snapshot"])
+
+    frames = []
+    count = 0
+
+    def emit_frame():
+        nonlocal count
+        game_state.draw()
+        if png_dir:
+            pygame.image.save(game_state.surface, os.path.join(png_dir, f"frame_{first_frame + count:06d}.png"))
+        else:
+            frames.append(pygame.image.tostring(game_state.surface, "RGB"))
+        count += 1
+
+    if include_keyframe:
+        emit_frame()
+    for event in events:
+        apply_event(game_state, event)
+        if event["type"] in FRAME_EVENTS:
+            emit_frame()
+    return count if png_dir else frames
+
+
+def plan_jobs(segments, png_dir=None):
+    """Задания для обработчиков с номером первого кадра каждого отрезка"""
+    jobs = []
+    frame = 0
+    for index, (keyframe, events) in enumerate(segments):
+        jobs.append((keyframe, events, frame, png_dir, index == 0))
+        frame += (index == 0) + sum(1 for event in events if event["type"] in FRAME_EVENTS)
+    return jobs, frame
+
+
+def export(path, png_dir=None, pipe=None, workers=None):
+    """Экспортирует запись в PNG-последовательность или в поток кодировщику.
+
+    Возвращает (число кадров, ширина, высота).
+    """
+    segments = load_segments(path)
+    if not segments:
+        raise ValueError(f"в записи {path} нет ключевых кадров")
+    width, height = (size * 32 for size in segments[0][0]["board"])
+    if png_dir:
+        os.makedirs(png_dir, exist_ok=True)
+    jobs, total = plan_jobs(segments, png_dir)
+
+    encoder = None
+    if pipe:
+        command = shlex.split(pipe.format(width=width, height=height))
+        encoder = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    with multiprocessing.Pool(workers) as pool:
+        # imap сохраняет порядок отрезков, поэтому кадры уходят кодировщику по порядку
+        for result in pool.imap(render_segment, jobs):
+            if encoder is not None:
+                for frame in result:
+                    encoder.stdin.write(frame)
+
+    if encoder is not None:
+        encoder.stdin.close()
+        if encoder.wait() != 0:
+            raise RuntimeError(f"кодировщик завершился с кодом {encoder.returncode}")
+    return total, width, height
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Экспорт записанной игры Warhammer 2D в кадры")
+    parser.add_argument("recording", help="файл записи (JSON Lines с ключевыми кадрами)")
+    parser.add_argument("--png", metavar="DIR", help="каталог для последовательности PNG")
+    parser.add_argument("--pipe", metavar="CMD",
+                        help="команда кодировщика, получающая сырые кадры RGB на stdin; "
+                             "{width} и {height} заменяются размером кадра")
+    parser.add_argument("--workers", type=int, help="число процессов (по умолчанию - по числу ядер)")
+    args = parser.parse_args(argv)
+    if not args.png and not args.pipe:
+        parser.error("нужен --png или --pipe")
+
+    started = time.perf_counter()
+    frames, width, height = export(args.recording, args.png, args.pipe, args.workers)
+    elapsed = time.perf_counter() - started
+    print(f"Кадров: {frames} ({width}x{height}) за {elapsed:.2f} с", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
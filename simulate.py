@@ -0,0 +1,173 @@
+"""Пакетная симуляция игр бот против бота без Qt и без дисплея.
+
+Пример:
+    python simulate.py --games 100 --seed 1 --budgets 1000 1000 \\
+        --policies greedy random --board 18x18 --output results.json
+
+Бой всех против всех: --factions 4 (бюджеты и стратегии повторяются по кругу).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from game_state import GameState
+from bots import BOT_POLICIES, make_policy
+from planner import DIFFICULTY
+from replay import Recorder
+from metrics import MetricsCollector
+from history import MatchHistory
+from terrain import TerrainMap
+
+
+def make_headless_game(budgets=(1000, 1000), policies=("greedy", "greedy"), board=(18, 18), factions=2,
+                       terrain=None):
+    """Создает GameState для игры ботов на поле board (в клетках); terrain - TerrainMap того же размера"""
+    width, height = board
+    names = [f"faction{index + 1}" for index in range(factions)]
+    game_state = GameState(pygame.Surface((width * 32, height * 32)),
+                           bot_factions=names, factions=names)
+    game_state.step_turns = True
+    for index, faction in enumerate(game_state.factions):
+        faction.resources = budgets[index % len(budgets)]
+        game_state.bot_policies[faction.name] = make_policy(policies[index % len(policies)])
+    if terrain is not None:
+        game_state.set_terrain(terrain.copy())
+    return game_state
+
+
+def run_game(seed, budgets=(1000, 1000), policies=("greedy", "greedy"), board=(18, 18), max_turns=200,
+             factions=2, record=None, metrics=None, terrain=None):
+    """Играет одну игру до победы или лимита ходов и возвращает её итог.
+
+    Если задан каталог record, игра записывается в record/game_<seed>.jsonl для replay.py.
+    metrics - MetricsCollector, в который пишется статистика игры под номером seed.
+    """
+    random.seed(seed)
+    game_state = make_headless_game(budgets, policies, board, factions, terrain)
+    recorder = Recorder(game_state, os.path.join(record, f"game_{seed}.jsonl")) if record else None
+    if metrics is not None:
+        metrics.attach(game_state, seed)
+    game_state.start_game()
+    # Состав армий запоминается до боя, пока все юниты живы
+    armies = {faction.name: {"policy": policies[index % len(policies)],
+                             "budget": budgets[index % len(budgets)],
+                             "units": faction.army_composition()}
+              for index, faction in enumerate(game_state.factions)}
+    while game_state.state != "game_over" and game_state.turn_number <= max_turns:
+        game_state.begin_turn()
+    if metrics is not None:
+        metrics.end_game()
+    if recorder is not None:
+        recorder.close()
+    return {
+        "seed": seed,
+        "winner": game_state.winner,
+        "turns": game_state.turn_number,
+        "survivors": {faction.name: len(faction.units) for faction in game_state.factions},
+        "armies": armies,
+    }
+
+
+def summarize(results, elapsed):
+    """Сводка по результатам серии игр"""
+    games = len(results)
+    turns = sum(result["turns"] for result in results)
+    wins = dict.fromkeys(results[0]["survivors"] if results else (), 0)
+    draws = 0
+    for result in results:
+        if result["winner"] is None:
+            draws += 1
+        else:
+            wins[result["winner"]] += 1
+    return {
+        "games": games,
+        "wins": wins,
+        "draws": draws,
+        "avg_turns": turns / games if games else 0,
+        "elapsed": elapsed,
+        "games_per_second": games / elapsed if elapsed else 0,
+        "turns_per_second": turns / elapsed if elapsed else 0,
+    }
+
+
+def parse_board(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная симуляция Warhammer 2D без интерфейса")
+    parser.add_argument("--games", type=int, default=10, help="число игр")
+    parser.add_argument("--seed", type=int, default=0, help="первый seed (игры используют seed, seed+1, ...)")
+    parser.add_argument("--factions", type=int, default=2, help="число фракций (от 2 до 8)")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[1000, 1000], metavar="B",
+                        help="ресурсы армий по фракциям")
+    parser.add_argument("--policies", nargs="+", default=["greedy", "greedy"], metavar="P",
+                        choices=sorted(BOT_POLICIES) + list(DIFFICULTY),
+                        help="стратегии ботов по фракциям; easy, normal, hard - планировщик с бюджетом уровня")
+    parser.add_argument("--board", type=parse_board, default=(18, 18), help="размер поля в клетках, например 18x18")
+    parser.add_argument("--max-turns", type=int, default=200, help="лимит ходов, после которого игра - ничья")
+    parser.add_argument("--output", help="файл для итогов (JSON)")
+    parser.add_argument("--record", metavar="DIR", help="каталог для записей игр (см. replay.py)")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="файл статистики по ходам и типам юнитов: CSV или .parquet (см. metrics.py)")
+    parser.add_argument("--history", metavar="DB", help="база SQLite истории матчей (см. history.py)")
+    parser.add_argument("--map", metavar="FILE", help="карта местности (см. terrain.py); размер поля берется из неё")
+    args = parser.parse_args(argv)
+    if not 2 <= args.factions <= 8:
+        parser.error("--factions: от 2 до 8")
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+    terrain = None
+    if args.map:
+        try:
+            terrain = TerrainMap.load(args.map)
+        except (OSError, ValueError) as error:
+            parser.error(f"--map: {error}")
+        args.board = (terrain.width, terrain.height)
+
+    metrics = None
+    if args.metrics:
+        try:
+            metrics = MetricsCollector(args.metrics)
+        except RuntimeError as error:
+            parser.error(str(error))
+
+    history = MatchHistory(args.history) if args.history else None
+    board = f"{args.board[0]}x{args.board[1]}"
+
+    results = []
+    started = time.perf_counter()
+    for seed in range(args.seed, args.seed + args.games):
+        result = run_game(seed, args.budgets, args.policies, args.board, args.max_turns,
+                          args.factions, args.record, metrics, terrain)
+        if history is not None:
+            history.record(result, board)
+        results.append(result)
+    elapsed = time.perf_counter() - started
+    if metrics is not None:
+        metrics.close()
+    if history is not None:
+        history.close()
+
+    summary = summarize(results, elapsed)
+    summary.update({"factions": args.factions, "budgets": args.budgets, "policies": args.policies,
+                    "board": list(args.board), "seeds": [args.seed, args.seed + args.games - 1]})
+    wins = ", ".join(f"{name}: {count}" for name, count in summary["wins"].items())
+    print(f"Игр: {summary['games']}, побед {wins}, ничьих: {summary['draws']}")
+    print(f"Скорость: {summary['games_per_second']:.2f} игр/с, {summary['turns_per_second']:.1f} ходов/с")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"summary": summary, "games": results}, file, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
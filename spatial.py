@@ -0,0 +1,93 @@
+class SpatialIndex:
+    """Сетка корзин для быстрых запросов ближайших врагов.
+
+    Поле делится на квадратные корзины по bucket_size клеток. Юниты
+    перекладываются между корзинами при каждом изменении занятости клетки,
+    а поиск ближайших идет кольцами корзин от точки запроса. Все расстояния
+    считаются в квадратах клеток, без извлечения корня.
+    """
+
+    def __init__(self, width, height, bucket_size=4):
+        self.width = width
+        self.height = height
+        self.bucket_size = bucket_size
+        self.buckets_x = (width + bucket_size - 1) // bucket_size
+        self.buckets_y = (height + bucket_size - 1) // bucket_size
+        self.buckets = {}  # (bx, by) -> множество юнитов
+        self.cells = {}  # unit -> (x, y)
+
+    def on_cell_occupied(self, grid_x, grid_y, unit):
+        self.cells[unit] = (grid_x, grid_y)
+        key = (grid_x // self.bucket_size, grid_y // self.bucket_size)
+        self.buckets.setdefault(key, set()).add(unit)
+
+    def on_cell_cleared(self, grid_x, grid_y, unit):
+        self.cells.pop(unit, None)
+        key = (grid_x // self.bucket_size, grid_y // self.bucket_size)
+        bucket = self.buckets.get(key)
+        if bucket is not None:
+            bucket.discard(unit)
+            if not bucket:
+                del self.buckets[key]
+
+    def nearest(self, grid_x, grid_y, k=1, enemy_of=None):
+        """Возвращает до k ближайших юнитов в виде списка (квадрат расстояния, юнит).
+
+        Если задан enemy_of, учитываются только юниты других фракций.
+        """
+        bx = grid_x // self.bucket_size
+        by = grid_y // self.bucket_size
+        found = []
+        max_ring = max(self.buckets_x, self.buckets_y)
+        for ring in range(max_ring + 1):
+            for key in self._ring(bx, by, ring):
+                for unit in self.buckets.get(key, ()):
+                    if enemy_of is not None and unit.faction == enemy_of:
+                        continue
+                    ux, uy = self.cells[unit]
+                    found.append(((ux - grid_x) ** 2 + (uy - grid_y) ** 2, unit))
+            if len(found) >= k:
+                found.sort(key=lambda item: (item[0], item[1].id))
+                # Все корзины следующих колец не ближе ring * bucket_size клеток
+                bound = ring * self.bucket_size
+                if found[k - 1][0] <= bound * bound:
+                    break
+        found.sort(key=lambda item: (item[0], item[1].id))
+        return found[:k]
+
+    def nearest_enemy(self, unit):
+        """Ближайший враг юнита или None"""
+        cell = self.cells.get(unit)
+        if cell is None:
+            return None
+        result = self.nearest(cell[0], cell[1], 1, enemy_of=unit.faction)
+        return result[0][1] if result else None
+
+    def closest_pair(self, units):
+        """Находит пару (юнит, ближайший враг) с минимальным расстоянием.
+
+        Возвращает (юнит, враг, квадрат расстояния) или None.
+        """
+        best = None
+        for unit in units:
+            cell = self.cells.get(unit)
+            if cell is None:
+                continue
+            result = self.nearest(cell[0], cell[1], 1, enemy_of=unit.faction)
+            if result and (best is None or result[0][0] < best[2]):
+                best = (unit, result[0][1], result[0][0])
+        return best
+
+    def _ring(self, bx, by, ring):
+        # Корзины на границе квадрата радиуса ring вокруг (bx, by)
+        if ring == 0:
+            yield (bx, by)
+            return
+        for x in range(bx - ring, bx + ring + 1):
+            for y in (by - ring, by + ring):
+                if 0 <= x < self.buckets_x and 0 <= y < self.buckets_y:
+                    yield (x, y)
+        for y in range(by - ring + 1, by + ring):
+            for x in (bx - ring, bx + ring):
+                if 0 <= x < self.buckets_x and 0 <= y < self.buckets_y:
+                    yield (x, y)
@@ -0,0 +1,108 @@
+import pygame
+from unit import FACTION_COLORS, DEFAULT_FACTION_COLOR
+
+# Шаг квантования здоровья для полоски (в единицах здоровья)
+HEALTH_STEP = 10
+
+# Смещение клетки юнита внутри плитки: слева рамка выделения, сверху полоска здоровья
+TILE_ORIGIN = (4, 8)
+
+TYPE_COLORS = {
+    "warrior": (200, 200, 200),
+    "archer": (0, 255, 0),
+    "knight": (255, 215, 0)
+}
+
+
+def health_bucket(health):
+    """Номер корзины здоровья (ненулевое здоровье всегда дает видимую полоску)"""
+    return -(-max(0, health) // HEALTH_STEP)
+
+
+class UnitSprite(pygame.sprite.Sprite):
+    """Спрайт-обертка над юнитом для кода, которому нужны pygame.sprite.Group.
+
+    Сами юниты не наследуют Sprite; обертки создаются только на время отрисовки.
+    """
+
+    def __init__(self, unit, atlas):
+        super().__init__()
+        self.unit = unit
+        key = atlas.tile_key(unit)
+        self.image = atlas.tile(key)
+        self.rect = atlas.tile_rect(key, unit)
+
+
+class SpriteAtlas:
+    """Кэш заранее отрисованных плиток юнитов.
+
+    Плитка содержит все, что раньше рисовалось для юнита отдельными вызовами:
+    фон клетки, тело, маркер типа, полоски здоровья, рамку статуса и уголки
+    выделения. Ключ плитки - (тип, фракция, ходил, атаковал, выбран,
+    корзина здоровья), поэтому каждый юнит рисуется одним blit.
+    """
+
+    def __init__(self, grid_size):
+        self.grid_size = grid_size
+        self.tiles = {}
+
+    def tile_key(self, unit):
+        return (unit.unit_type, unit.faction, unit.is_moved, unit.is_attacked,
+                unit.selected, health_bucket(unit.health))
+
+    def tile(self, key):
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self.tiles[key] = self._render(*key)
+        return tile
+
+    def blit_position(self, unit):
+        return (unit.rect.x - TILE_ORIGIN[0], unit.rect.y - TILE_ORIGIN[1])
+
+    def tile_rect(self, key, unit):
+        return self.tile(key).get_rect(topleft=self.blit_position(unit))
+
+    def sprite_group(self, units):
+        """Группа спрайтов для переданных юнитов (например, для Group.draw)"""
+        return pygame.sprite.Group(UnitSprite(unit, self) for unit in units)
+
+    def _render(self, unit_type, faction, is_moved, is_attacked, selected, bucket):
+        size = self.grid_size
+        health = bucket * HEALTH_STEP
+        bar_width = max(30 * health / 100, 2 + (size - 4) * health / 100)
+        ox, oy = TILE_ORIGIN
+        width = ox + max(size + 4, int(bar_width) + 2)
+        tile = pygame.Surface((width, oy + size + 4), pygame.SRCALPHA)
+        rect = pygame.Rect(ox, oy, size, size)
+
+        # Фон клетки и тело юнита
+        pygame.draw.rect(tile, FACTION_COLORS.get(faction, DEFAULT_FACTION_COLOR), rect)
+        if selected:
+            pygame.draw.rect(tile, (255, 255, 0), rect, 2)
+
+        # Полоски здоровья (юнит и поле рисовали их со своими смещениями)
+        pygame.draw.rect(tile, (0, 255, 0), pygame.Rect(ox, oy - 5, 30 * health / 100, 3))
+        pygame.draw.rect(tile, (0, 255, 0), pygame.Rect(ox + 2, oy - 5, (size - 4) * health / 100, 3))
+
+        # Маркер типа юнита
+        pygame.draw.rect(tile, TYPE_COLORS.get(unit_type, (200, 200, 200)),
+                         pygame.Rect(ox + 12, oy + 12, 6, 6))
+
+        # Рамка статуса для юнитов игрока
+        if faction == "faction1":
+            if is_moved and is_attacked:
+                pygame.draw.rect(tile, (255, 0, 0), rect, 2)
+            elif is_moved:
+                pygame.draw.rect(tile, (255, 165, 0), rect, 2)
+            elif is_attacked:
+                pygame.draw.rect(tile, (255, 0, 255), rect, 2)
+
+        # Уголки выделения
+        if selected:
+            corner = 8
+            yellow = (255, 255, 0)
+            for x, dx in ((rect.left, corner), (rect.right, -corner)):
+                for y, dy in ((rect.top, corner), (rect.bottom, -corner)):
+                    pygame.draw.line(tile, yellow, (x, y), (x + dx, y), 3)
+                    pygame.draw.line(tile, yellow, (x, y), (x, y + dy), 3)
+        return tile
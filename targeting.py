@@ -0,0 +1,50 @@
+class TargetIndex:
+    """Индекс целей: для каждого юнита хранит врагов в радиусе его атаки и наоборот.
+
+    Обновляется инкрементально при изменении занятости клеток сетки, поэтому
+    поиск целей в фазе атаки сводится к обращению к словарю. Дальность атаки
+    считается по манхэттенской метрике, как и в правилах атаки.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid  # OccupancyGrid
+        self.targets = {}  # unit -> враги, которых юнит может атаковать
+        self.attackers = {}  # unit -> враги, которые могут атаковать юнита
+        self.cells = {}  # unit -> (x, y)
+        self.max_range = 1
+
+    def on_cell_occupied(self, grid_x, grid_y, unit):
+        self.cells[unit] = (grid_x, grid_y)
+        self.targets[unit] = set()
+        self.attackers[unit] = set()
+        self.max_range = max(self.max_range, unit.attack_range)
+
+        # Просматриваем юнитов в ромбе клеток, где может стоять атакующий или цель
+        r = self.max_range
+        for x, y, other in self.grid.units_near(grid_x, grid_y, r):
+            distance = abs(x - grid_x) + abs(y - grid_y)
+            if distance > r or other is unit or other.faction == unit.faction:
+                continue
+            if other not in self.cells:
+                continue
+            if distance <= unit.attack_range:
+                self.targets[unit].add(other)
+                self.attackers[other].add(unit)
+            if distance <= other.attack_range:
+                self.targets[other].add(unit)
+                self.attackers[unit].add(other)
+
+    def on_cell_cleared(self, grid_x, grid_y, unit):
+        for target in self.targets.pop(unit, ()):
+            self.attackers[target].discard(unit)
+        for attacker in self.attackers.pop(unit, ()):
+            self.targets[attacker].discard(unit)
+        self.cells.pop(unit, None)
+
+    def targets_of(self, unit):
+        """Враги в радиусе атаки юнита"""
+        return self.targets.get(unit, set())
+
+    def attackers_of(self, unit):
+        """Враги, в чьем радиусе атаки находится юнит"""
+        return self.attackers.get(unit, set())
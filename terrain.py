@@ -0,0 +1,203 @@
+"""Местность: карта типов клеток и досягаемость с учетом стоимости движения.
+
+Файл карты - текст, строка файла - ряд клеток, символ - тип местности по
+TERRAIN_TYPES. Пустые строки и строки, начинающиеся с ";", пропускаются:
+
+    ; лес в центре, река на востоке
+    ..ff..~~..
+    .fff..~~..
+    ..h...#...
+"""
+import heapq
+import math
+
+# Стоимость шага по прямой и по диагонали (в десятых клетки, октильная метрика)
+STRAIGHT_STEP = 10
+DIAGONAL_STEP = 14
+
+# cost - множитель стоимости входа в клетку, defense - прибавка к защите юнита в клетке
+TERRAIN_TYPES = {
+    "plain": {"symbol": ".", "cost": 1, "defense": 0, "passable": True, "color": (0, 0, 0)},
+    "forest": {"symbol": "f", "cost": 2, "defense": 10, "passable": True, "color": (16, 52, 16)},
+    "hill": {"symbol": "h", "cost": 2, "defense": 6, "passable": True, "color": (60, 46, 24)},
+    "swamp": {"symbol": "s", "cost": 3, "defense": 0, "passable": True, "color": (36, 48, 40)},
+    "water": {"symbol": "~", "cost": 1, "defense": 0, "passable": False, "color": (14, 30, 76)},
+    "rock": {"symbol": "#", "cost": 1, "defense": 0, "passable": False, "color": (70, 70, 70)},
+}
+
+TERRAIN_BY_SYMBOL = {data["symbol"]: name for name, data in TERRAIN_TYPES.items()}
+
+
+class TerrainMap:
+    """Типы местности по клеткам поля; cells[y][x] - имя типа из TERRAIN_TYPES"""
+
+    def __init__(self, width, height, cells=None):
+        self.width = width
+        self.height = height
+        self.cells = cells or [["plain"] * width for _ in range(height)]
+        self.version = 0
+        self.listeners = []  # получают on_terrain_changed(x, y)
+
+    @classmethod
+    def parse(cls, text):
+        rows = []
+        for number, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith(";"):
+                continue
+            row = []
+            for symbol in line:
+                if symbol not in TERRAIN_BY_SYMBOL:
+                    raise ValueError(f"строка {number}: неизвестный символ местности '{symbol}'")
+                row.append(TERRAIN_BY_SYMBOL[symbol])
+            if rows and len(row) != len(rows[0]):
+                raise ValueError(f"строка {number}: ожидается {len(rows[0])} клеток, получено {len(row)}")
+            rows.append(row)
+        if not rows:
+            raise ValueError("карта пуста")
+        return cls(len(rows[0]), len(rows), rows)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as file:
+            return cls.parse(file.read())
+
+    def copy(self):
+        """Копия карты без подписчиков (для новой игры на той же карте)"""
+        return TerrainMap(self.width, self.height, [list(row) for row in self.cells])
+
+    def dump(self):
+        return "\n".join("".join(TERRAIN_TYPES[name]["symbol"] for name in row) for row in self.cells) + "\n"
+
+    def terrain(self, grid_x, grid_y):
+        return TERRAIN_TYPES[self.cells[grid_y][grid_x]]
+
+    def cost(self, grid_x, grid_y):
+        return TERRAIN_TYPES[self.cells[grid_y][grid_x]]["cost"]
+
+    def defense(self, grid_x, grid_y):
+        return TERRAIN_TYPES[self.cells[grid_y][grid_x]]["defense"]
+
+    def passable(self, grid_x, grid_y):
+        return TERRAIN_TYPES[self.cells[grid_y][grid_x]]["passable"]
+
+    def impassable_cells(self):
+        return {(x, y) for y, row in enumerate(self.cells) for x, name in enumerate(row)
+                if not TERRAIN_TYPES[name]["passable"]}
+
+    def set_cell(self, grid_x, grid_y, name):
+        """Меняет тип клетки и оповещает подписчиков"""
+        if name not in TERRAIN_TYPES:
+            raise ValueError(f"неизвестный тип местности: {name}")
+        self.cells[grid_y][grid_x] = name
+        self.version += 1
+        for listener in self.listeners:
+            listener.on_terrain_changed(grid_x, grid_y)
+
+
+def reachable_cells(grid, terrain, start_x, start_y, movement_range, faction):
+    """Клетки, до которых юнит дойдет за movement_range, со стоимостью пути.
+
+    Без карты местности - круг радиуса movement_range, как в исходных правилах;
+    стоимость - расстояние по прямой в тех же единицах (10 на клетку), округленное.
+    С картой - алгоритм Дейкстры с ограничением бюджета movement_range * 10:
+    шаг стоит 10 по прямой и 14 по диагонали, умноженные на cost клетки.
+    Непроходимые клетки и клетки врагов преграждают путь, свои юниты - нет;
+    срезать угол непроходимой клетки по диагонали нельзя. Занятые клетки
+    входят в результат (через них можно пройти), свободу клетки назначения
+    проверяет вызывающий. Возвращает словарь {(x, y): стоимость} без стартовой клетки.
+    """
+    height, width = grid.height, grid.width
+    if terrain is None:
+        reach = {}
+        limit = movement_range * movement_range
+        for dy in range(max(-movement_range, -start_y), min(movement_range, height - 1 - start_y) + 1):
+            for dx in range(max(-movement_range, -start_x), min(movement_range, width - 1 - start_x) + 1):
+                distance_sq = dx * dx + dy * dy
+                if 0 < distance_sq <= limit:
+                    reach[(start_x + dx, start_y + dy)] = round(STRAIGHT_STEP * math.hypot(dx, dy))
+        return reach
+
+    budget = movement_range * STRAIGHT_STEP
+    best = {(start_x, start_y): 0}
+    queue = [(0, start_x, start_y)]
+    while queue:
+        cost, x, y = heapq.heappop(queue)
+        if cost > best[(x, y)]:
+            continue
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if dx == 0 and dy == 0:
+                    continue
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < width and 0 <= ny < height) or not terrain.passable(nx, ny):
+                    continue
+                occupant = grid.at(nx, ny)
+                if occupant is not None and occupant.faction != faction:
+                    continue
+                if dx and dy:
+                    if not (terrain.passable(x + dx, y) and terrain.passable(x, y + dy)):
+                        continue
+                    step = DIAGONAL_STEP
+                else:
+                    step = STRAIGHT_STEP
+                new_cost = cost + step * terrain.cost(nx, ny)
+                if new_cost <= budget and new_cost < best.get((nx, ny), budget + 1):
+                    best[(nx, ny)] = new_cost
+                    heapq.heappush(queue, (new_cost, nx, ny))
+    del best[(start_x, start_y)]
+    return best
+
+
+class ReachabilityCache:
+    """Кэш досягаемости по (клетка, дальность, фракция).
+
+    Подписчик сетки и карты местности: при изменении занятости или местности
+    клетки сбрасываются только записи, чей радиус поиска её накрывает, так что
+    подсветка хода при перерисовке кадров не пересчитывает путь заново.
+    """
+
+    MAX_ENTRIES = 4096
+
+    def __init__(self, grid, terrain=None):
+        self.grid = grid
+        self.terrain = terrain
+        self.entries = {}  # (x, y, дальность, фракция) -> {(x, y): стоимость}
+        self.hits = 0
+        self.misses = 0
+
+    def set_terrain(self, terrain):
+        self.terrain = terrain
+        self.entries.clear()
+
+    def cells(self, grid_x, grid_y, movement_range, faction):
+        key = (grid_x, grid_y, movement_range, faction)
+        reach = self.entries.get(key)
+        if reach is None:
+            self.misses += 1
+            if len(self.entries) >= self.MAX_ENTRIES:
+                self.entries.clear()
+            reach = reachable_cells(self.grid, self.terrain, grid_x, grid_y, movement_range, faction)
+            self.entries[key] = reach
+        else:
+            self.hits += 1
+        return reach
+
+    def invalidate_around(self, grid_x, grid_y):
+        # Путь длиной movement_range не уходит дальше movement_range клеток по каждой оси
+        stale = [key for key in self.entries
+                 if abs(key[0] - grid_x) <= key[2] and abs(key[1] - grid_y) <= key[2]]
+        for key in stale:
+            del self.entries[key]
+
+    def on_cell_occupied(self, grid_x, grid_y, unit):
+        # Без местности досягаемость от занятости не зависит
+        if self.terrain is not None:
+            self.invalidate_around(grid_x, grid_y)
+
+    def on_cell_cleared(self, grid_x, grid_y, unit):
+        if self.terrain is not None:
+            self.invalidate_around(grid_x, grid_y)
+
+    def on_terrain_changed(self, grid_x, grid_y):
+        self.invalidate_around(grid_x, grid_y)
@@ -0,0 +1,59 @@
+"""Игры ботов с фиксированным seed для проверки инкрементальных индексов.
+
+play_checked(seed, check) играет партию и вызывает check(game_state, событие)
+после каждого хода, удара, гибели юнита и в начале каждой фазы. Во время
+приказа отряду check вызывается между перемещениями юнитов: часть юнитов
+отряда уже на новых клетках, остальные еще не поставлены на сетку. Поэтому
+проверки сверяют индексы с сеткой, а с составом фракций - только на
+"phase_start".
+"""
+import os
+import random
+
+from planner import PlannerBot
+from simulate import make_headless_game
+from terrain import TerrainMap
+
+RIVER_MAP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "maps", "river.txt")
+
+# Стратегии по кругу: одиночные ходы, приказы отрядам, ход всей армией и планировщик
+POLICIES = [("greedy", "squad"), ("army", "random"), ("planner", "greedy"), ("squad", "army")]
+
+CHECKED_EVENTS = {"move", "attack", "death", "phase_start"}
+
+SEEDS = range(6)
+
+
+def play_checked(seed, check, max_turns=25):
+    """Играет партию seed; нечетные seed - на карте river.txt, seed 2 - втроем.
+    Возвращает число вызовов check."""
+    random.seed(seed)
+    terrain = TerrainMap.load(RIVER_MAP) if seed % 2 else None
+    board = (terrain.width, terrain.height) if terrain is not None else (18, 18)
+    factions = 3 if seed % 4 == 2 else 2
+    policies = POLICIES[seed % len(POLICIES)]
+    game_state = make_headless_game((1500, 1500), [name if name != "planner" else "greedy" for name in policies],
+                                    board, factions, terrain)
+    for index, faction in enumerate(game_state.factions):
+        if policies[index % len(policies)] == "planner":
+            # Предел узлов вместо времени: партия не зависит от скорости машины
+            game_state.bot_policies[faction.name] = PlannerBot(max_nodes=40)
+    game_state.start_game()
+    calls = [0]
+    check(game_state, "start")
+    emit = game_state.emit
+
+    def checked_emit(event_type, **data):
+        emit(event_type, **data)
+        if event_type in CHECKED_EVENTS:
+            calls[0] += 1
+            check(game_state, event_type)
+
+    game_state.emit = checked_emit
+    while game_state.state != "game_over" and game_state.turn_number <= max_turns:
+        game_state.begin_turn()
+    return calls[0]
+
+
+def grid_cell(game_state, unit):
+    return unit.rect.x // game_state.grid_size, unit.rect.y // game_state.grid_size
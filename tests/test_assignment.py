@@ -0,0 +1,46 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import assignment
+from assignment import solve_assignment, FORBIDDEN
+
+
+def brute_force(cost):
+    """(число назначенных строк, стоимость) лучшего назначения полным перебором"""
+    rows, cols = cost.shape
+    best = (0, 0.0)
+    for size in range(1, min(rows, cols) + 1):
+        for chosen_rows in itertools.combinations(range(rows), size):
+            for chosen_cols in itertools.permutations(range(cols), size):
+                total = cost[list(chosen_rows), list(chosen_cols)].sum()
+                if np.isfinite(total) and (size > best[0] or (size == best[0] and total < best[1])):
+                    best = (size, total)
+    return best
+
+
+@pytest.fixture
+def fallback(monkeypatch):
+    # Проверяется NumPy-вариант, даже если SciPy установлен
+    monkeypatch.setattr(assignment, "linear_sum_assignment", None)
+
+
+def test_fallback_matches_brute_force(fallback):
+    rng = np.random.default_rng(7)
+    for _ in range(600):
+        rows, cols = rng.integers(1, 5, 2)
+        cost = rng.integers(-5, 10, (rows, cols)).astype(float)
+        cost[rng.random((rows, cols)) < rng.random() * 0.7] = FORBIDDEN
+        chosen_rows, chosen_cols = solve_assignment(cost)
+        assert len(set(chosen_rows.tolist())) == len(chosen_rows)
+        assert len(set(chosen_cols.tolist())) == len(chosen_cols)
+        assert np.isfinite(cost[chosen_rows, chosen_cols]).all()
+        size, total = brute_force(cost)
+        assert len(chosen_rows) == size, cost
+        assert cost[chosen_rows, chosen_cols].sum() == pytest.approx(total), cost
+
+
+def test_all_forbidden(fallback):
+    rows, cols = solve_assignment(np.full((3, 2), FORBIDDEN))
+    assert len(rows) == 0 and len(cols) == 0
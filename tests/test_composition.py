@@ -0,0 +1,68 @@
+import itertools
+import random
+
+import pytest
+
+from composition import default_strength, plan_army
+from unit import SQUAD_DATA
+
+
+def limits(budget, squad_data, max_share):
+    """Предел числа юнитов каждого типа, как в plan_army"""
+    return {unit_type: max(1, int(budget * max_share) // int(stats["cost"]))
+            for unit_type, stats in squad_data.items() if int(stats["cost"]) <= budget}
+
+
+def brute_force(budget, squad_data, max_share):
+    """Лучшая суммарная сила перебором всех допустимых количеств"""
+    caps = limits(budget, squad_data, max_share)
+    types = sorted(caps)
+    best = 0.0
+    for counts in itertools.product(*(range(caps[unit_type] + 1) for unit_type in types)):
+        cost = sum(count * int(squad_data[unit_type]["cost"]) for unit_type, count in zip(types, counts))
+        if cost <= budget:
+            best = max(best, sum(count * default_strength(squad_data[unit_type])
+                                 for unit_type, count in zip(types, counts)))
+    return best
+
+
+def check_plan(budget, squad_data, max_share):
+    plan = plan_army(budget, squad_data, max_share=max_share)
+    caps = limits(budget, squad_data, max_share)
+    assert sum(count * int(squad_data[unit_type]["cost"]) for unit_type, count in plan.items()) <= budget
+    for unit_type, count in plan.items():
+        assert 0 < count <= caps[unit_type]
+    strength = sum(count * default_strength(squad_data[unit_type]) for unit_type, count in plan.items())
+    assert strength == pytest.approx(brute_force(budget, squad_data, max_share))
+
+
+@pytest.mark.parametrize("max_share", [0.2, 0.5, 1.0])
+def test_matches_brute_force_on_squad_data(max_share):
+    for budget in range(0, 1250, 50):
+        check_plan(budget, SQUAD_DATA, max_share)
+
+
+def test_matches_brute_force_on_random_types():
+    rng = random.Random(7)
+    for _ in range(200):
+        squad_data = {
+            f"type{index}": {"cost": rng.randint(20, 400), "health": rng.randint(50, 200),
+                             "attack": rng.randint(10, 40), "defense": rng.randint(5, 30),
+                             "attack_range": rng.randint(1, 3), "movement_range": rng.randint(1, 3)}
+            for index in range(rng.randint(1, 4))
+        }
+        check_plan(rng.randint(0, 900), squad_data, rng.choice([0.1, 0.3, 0.5, 1.0]))
+
+
+def test_budget_below_cheapest_unit():
+    cheapest = min(int(stats["cost"]) for stats in SQUAD_DATA.values())
+    assert plan_army(cheapest - 1, SQUAD_DATA) == {}
+    assert plan_army(0, SQUAD_DATA) == {}
+
+
+def test_max_share_allows_one_expensive_unit():
+    # Юнит дороже max_share бюджета все равно разрешен в одном экземпляре
+    squad_data = {"giant": {"cost": 300, "health": 500, "attack": 80}, "rat": {"cost": 50, "health": 10, "attack": 1}}
+    plan = plan_army(400, squad_data, max_share=0.25)
+    assert plan["giant"] == 1
+    assert plan.get("rat", 0) <= 2
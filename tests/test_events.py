@@ -0,0 +1,17 @@
+import io
+
+from events import EventStream
+
+
+class ClosedSink(io.StringIO):
+    def write(self, text):
+        raise OSError("приемник закрыт")
+
+
+def test_dropped_counts_every_lost_event():
+    # События теряются в обоих потоках: в publish при полной очереди и при записи
+    stream = EventStream(ClosedSink(), maxsize=5)
+    for index in range(50000):
+        stream.publish("tick", index=index)
+    stream.close()
+    assert stream.dropped == 50000
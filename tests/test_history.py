@@ -0,0 +1,37 @@
+from history import MatchHistory
+
+
+def result(seed, winner="faction1"):
+    return {
+        "seed": seed, "turns": 10, "winner": winner, "survivors": {winner: 2},
+        "armies": {
+            "faction1": {"policy": "greedy", "budget": 1000, "units": {"archer": 2, "knight": 1}},
+            "faction2": {"policy": "random", "budget": 1000, "units": {"warrior": 4}},
+        },
+    }
+
+
+def test_two_writers_do_not_collide(tmp_path):
+    # Два процесса, пишущие в одну базу: пачки чередуются, id не повторяются
+    path = str(tmp_path / "matches.db")
+    first = MatchHistory(path, batch_size=3)
+    second = MatchHistory(path, batch_size=2)
+    for seed in range(12):
+        (first if seed % 2 else second).record(result(seed))
+    first.close()
+    second.close()
+
+    history = MatchHistory(path)
+    assert history.count() == 12
+    rows = history.connection.execute("SELECT id, seed FROM matches").fetchall()
+    assert len({match_id for match_id, _ in rows}) == 12
+    # Армии и состав записаны под id своего матча
+    for match_id, seed in rows:
+        armies = history.connection.execute(
+            "SELECT faction, main_type FROM armies WHERE match_id = ? ORDER BY faction", (match_id,)).fetchall()
+        assert armies == [("faction1", "archer"), ("faction2", "warrior")]
+        units = history.connection.execute(
+            "SELECT SUM(count) FROM army_units WHERE match_id = ?", (match_id,)).fetchone()[0]
+        assert units == 7
+    assert history.win_rate("archer", "warrior") == (12, 12, 1.0)
+    history.close()
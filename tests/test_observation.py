@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from seeded_games import SEEDS, play_checked
+
+
+def check_planes(game_state, event):
+    # Первый вызов создает плоскости, дальше они обновляются только по событиям
+    planes = game_state.observation()
+    expected = np.zeros_like(planes.planes)
+    channel = {name: index for index, name in enumerate(planes.names)}
+    for grid_x, grid_y, unit in game_state.grid.occupied():
+        expected[channel[f"occupancy:{unit.faction}"], grid_y, grid_x] = 1
+        expected[channel["health"], grid_y, grid_x] = unit.health
+        expected[channel["attack"], grid_y, grid_x] = unit.attack
+        expected[channel["defense"], grid_y, grid_x] = unit.defense
+        expected[channel["moved"], grid_y, grid_x] = unit.is_moved
+        expected[channel["attacked"], grid_y, grid_x] = unit.is_attacked
+        expected[channel[f"type:{unit.unit_type}"], grid_y, grid_x] = 1
+    assert np.array_equal(planes.view(), expected)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_planes_match_brute_force(seed):
+    assert play_checked(seed, check_planes) > 0
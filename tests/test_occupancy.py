@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from seeded_games import SEEDS, play_checked, grid_cell
+
+
+def check_grid(game_state, event):
+    grid = game_state.grid
+    ids = grid.ids
+    # Каждый юнит таблицы стоит ровно в одной клетке, и в массиве нет чужих id
+    nonzero = ids[ids != 0].tolist()
+    assert sorted(nonzero) == sorted(grid.units)
+    for grid_x, grid_y, unit in grid.occupied():
+        assert grid_cell(game_state, unit) == (grid_x, grid_y)
+        assert grid.at(grid_x, grid_y) is unit
+        assert not grid.is_free(grid_x, grid_y)
+    assert np.array_equal(grid.free_mask(), ids == 0)
+
+    # Окрестность клетки - перебором всех юнитов сетки
+    for grid_x, grid_y, radius in ((0, 0, 3), (grid.width // 2, grid.height // 2, 4), (grid.width - 1, 5, 2)):
+        expected = sorted((x, y, unit.id) for x, y, unit in grid.occupied()
+                          if abs(x - grid_x) <= radius and abs(y - grid_y) <= radius)
+        assert sorted((x, y, unit.id) for x, y, unit in grid.units_near(grid_x, grid_y, radius)) == expected
+
+    if event in ("start", "phase_start"):
+        # Между действиями на сетке стоят ровно живые юниты фракций
+        alive = {unit.id for faction in game_state.factions for unit in faction.units}
+        assert alive == set(grid.units)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_grid_matches_units(seed):
+    assert play_checked(seed, check_grid) > 0
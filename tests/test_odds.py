@@ -0,0 +1,56 @@
+import itertools
+
+import pytest
+
+import odds
+from odds import ROLLS, OddsTable, modified_attack, modified_defense
+from unit import SQUAD_DATA, Unit
+
+
+@pytest.fixture(scope="module")
+def table():
+    return OddsTable.build(SQUAD_DATA)
+
+
+def rolled_damage(attacker_type, defender_type, attack_roll, morale_roll, bonus):
+    """Урон удара по правилам игры: броски меняют характеристики юнитов, затем Unit.damage_against"""
+    attacker = Unit(0, 0, attacker_type, "a")
+    defender = Unit(32, 0, defender_type, "b")
+    attacker.attack = modified_attack(attacker.attack, attack_roll)
+    defender.defense = modified_defense(defender.defense, morale_roll)
+    return attacker.damage_against(defender, bonus)
+
+
+def test_damage_matches_rules(table):
+    for attacker_type, defender_type in itertools.product(SQUAD_DATA, repeat=2):
+        for bonus in table.bonuses:
+            matrix = table.damage_matrix(attacker_type, defender_type, bonus)
+            for attack_roll, morale_roll in itertools.product(ROLLS, repeat=2):
+                assert matrix[attack_roll - 1, morale_roll - 1] == rolled_damage(
+                    attacker_type, defender_type, attack_roll, morale_roll, bonus)
+
+
+def test_kill_probability_matches_enumeration(table):
+    for attacker_type, defender_type in itertools.product(SQUAD_DATA, repeat=2):
+        for bonus in table.bonuses:
+            outcomes = [rolled_damage(attacker_type, defender_type, attack_roll, morale_roll, bonus)
+                        for attack_roll, morale_roll in itertools.product(ROLLS, repeat=2)]
+            pairs = [first + second for first, second in itertools.product(outcomes, repeat=2)]
+            for health in (1, 10, 25, 40, 75, SQUAD_DATA[defender_type]["health"]):
+                one = sum(damage >= health for damage in outcomes) / len(outcomes)
+                two = sum(damage >= health for damage in pairs) / len(pairs)
+                assert table.kill_probability(attacker_type, defender_type, health, 1, bonus) == pytest.approx(one)
+                assert table.kill_probability(attacker_type, defender_type, health, 2, bonus) == pytest.approx(two)
+
+
+def test_odds_table_is_cached_until_reset(monkeypatch):
+    loads = []
+    monkeypatch.setattr(OddsTable, "load", classmethod(lambda cls: loads.append(1) or object()))
+    odds.reset_odds_table()
+    first = odds.odds_table()
+    assert odds.odds_table() is first
+    assert len(loads) == 1
+    odds.reset_odds_table()
+    assert odds.odds_table() is not first
+    assert len(loads) == 2
+    odds.reset_odds_table()
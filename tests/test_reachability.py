@@ -0,0 +1,16 @@
+import pytest
+
+from seeded_games import SEEDS, play_checked
+from terrain import reachable_cells
+
+
+def check_reachability(game_state, event):
+    grid = game_state.grid
+    for grid_x, grid_y, unit in grid.occupied():
+        expected = reachable_cells(grid, game_state.terrain, grid_x, grid_y, unit.movement_range, unit.faction)
+        assert game_state.reachability.cells(grid_x, grid_y, unit.movement_range, unit.faction) == expected
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_reachability_matches_brute_force(seed):
+    assert play_checked(seed, check_reachability) > 0
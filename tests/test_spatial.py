@@ -0,0 +1,28 @@
+import pytest
+
+from seeded_games import SEEDS, play_checked
+
+
+def brute_force_nearest(occupied, grid_x, grid_y, k, enemy_of=None):
+    found = sorted((((x - grid_x) ** 2 + (y - grid_y) ** 2, unit) for x, y, unit in occupied
+                    if enemy_of is None or unit.faction != enemy_of),
+                   key=lambda item: (item[0], item[1].id))
+    return found[:k]
+
+
+def check_spatial(game_state, event):
+    occupied = list(game_state.grid.occupied())
+    spatial = game_state.spatial
+    assert spatial.cells == {unit: (x, y) for x, y, unit in occupied}
+    for grid_x, grid_y, unit in occupied:
+        expected = brute_force_nearest(occupied, grid_x, grid_y, 1, enemy_of=unit.faction)
+        assert spatial.nearest_enemy(unit) is (expected[0][1] if expected else None)
+    grid = game_state.grid
+    for grid_x, grid_y in ((0, 0), (grid.width // 2, grid.height // 2), (grid.width - 1, grid.height - 1)):
+        for k in (1, 3, 8):
+            assert spatial.nearest(grid_x, grid_y, k) == brute_force_nearest(occupied, grid_x, grid_y, k)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_spatial_matches_brute_force(seed):
+    assert play_checked(seed, check_spatial) > 0
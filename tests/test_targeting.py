@@ -0,0 +1,20 @@
+import pytest
+
+from seeded_games import SEEDS, play_checked
+
+
+def check_targets(game_state, event):
+    occupied = list(game_state.grid.occupied())
+    index = game_state.target_index
+    for grid_x, grid_y, unit in occupied:
+        in_range = {other for x, y, other in occupied
+                    if other.faction != unit.faction and abs(x - grid_x) + abs(y - grid_y) <= unit.attack_range}
+        attackers = {other for x, y, other in occupied
+                     if other.faction != unit.faction and abs(x - grid_x) + abs(y - grid_y) <= other.attack_range}
+        assert index.targets_of(unit) == in_range
+        assert index.attackers_of(unit) == attackers
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_targets_match_brute_force(seed):
+    assert play_checked(seed, check_targets) > 0
@@ -0,0 +1,16 @@
+import pytest
+
+from seeded_games import SEEDS, play_checked
+
+
+def check_zobrist(game_state, event):
+    zobrist = game_state.zobrist
+    board = 0
+    for grid_x, grid_y, unit in game_state.grid.occupied():
+        board ^= zobrist.unit_key(unit, grid_x, grid_y)
+    assert zobrist.board == board
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_zobrist_matches_brute_force(seed):
+    assert play_checked(seed, check_zobrist) > 0
@@ -0,0 +1,34 @@
+import tracemalloc
+
+import pygame
+
+from unit import Unit
+
+UNIT_COUNT = 100_000
+
+# Потолок памяти на юнита вместе с его pygame.Rect и местом в списке.
+# Сейчас около 210 байт; с __dict__ или собственной поверхностью - в разы больше.
+MAX_BYTES_PER_UNIT = 320
+
+
+def test_unit_has_no_dict():
+    unit = Unit(0, 0, "warrior", "faction1")
+    assert not hasattr(unit, "__dict__")
+
+
+def test_unit_has_no_surface():
+    unit = Unit(0, 0, "warrior", "faction1")
+    for name in Unit.__slots__:
+        assert not isinstance(getattr(unit, name, None), pygame.Surface), name
+
+
+def test_memory_footprint_100k_units():
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        units = [Unit(index % 600, index // 600 % 600, "warrior", "faction1") for index in range(UNIT_COUNT)]
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert len(units) == UNIT_COUNT
+    assert used / UNIT_COUNT <= MAX_BYTES_PER_UNIT, f"{used / UNIT_COUNT:.0f} байт на юнита"
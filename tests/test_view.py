@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("PySide6")
+
+import view
+from view import ScaledFrame
+
+
+def random_frame(rng, width=96, height=64):
+    return rng.integers(0, 256, (height, width, 3), dtype=np.uint8).tobytes()
+
+
+def test_zoom_change_keeps_recent_tile_caches():
+    rng = np.random.default_rng(0)
+    frame = ScaledFrame(96, 64)
+    frame_bytes = random_frame(rng)
+    frame.resize(192, 128)
+    frame.update(frame_bytes)
+    doubled = frame.tiles
+    frame.resize(150, 100)
+    frame.update(frame_bytes)
+    assert frame.tiles is not doubled
+    # Возврат к прежнему масштабу: плитки берутся из его кэша, новых не добавляется
+    frame.resize(192, 128)
+    assert frame.tiles is doubled
+    size = len(doubled)
+    frame.update(frame_bytes)
+    assert len(doubled) == size
+
+    for width in (120, 130, 140, 160):
+        frame.resize(width, width)
+    assert len(frame.zoom_tiles) == view.ZOOM_CACHES
+    assert 2 not in frame.zoom_tiles
+
+
+def test_full_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(view, "MAX_TILES", 8)
+    rng = np.random.default_rng(1)
+    frame = ScaledFrame(64, 32)
+    frame.resize(128, 64)
+    kept = random_frame(rng, 64, 32)
+    frame.update(kept)
+    kept_keys = list(frame.tiles)
+    for _ in range(5):
+        frame.update(random_frame(rng, 64, 32))
+        frame.update(kept)  # плитки этого кадра все время используются и не вытесняются
+        assert len(frame.tiles) <= 8
+        assert all(key in frame.tiles for key in kept_keys)
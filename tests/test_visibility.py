@@ -0,0 +1,36 @@
+import pytest
+
+from seeded_games import SEEDS, play_checked
+from visibility import line_cells
+
+
+def brute_force_viewshed(grid, unit_x, unit_y, sight):
+    """Клетки в круге обзора, линия до которых не проходит через занятые клетки"""
+    cells = set()
+    for y in range(grid.height):
+        for x in range(grid.width):
+            if (x - unit_x) ** 2 + (y - unit_y) ** 2 > sight * sight:
+                continue
+            if all(grid.is_free(lx, ly) for lx, ly in line_cells(unit_x, unit_y, x, y)):
+                cells.add((x, y))
+    return cells
+
+
+def check_visibility(game_state, event):
+    grid = game_state.grid
+    visibility = game_state.visibility
+    expected = {faction.name: [[0] * grid.width for _ in range(grid.height)]
+                for faction in game_state.factions}
+    for grid_x, grid_y, unit in grid.occupied():
+        viewshed = brute_force_viewshed(grid, grid_x, grid_y, unit.sight_range)
+        assert visibility.unit_sees(unit, grid_x, grid_y)
+        assert set(visibility.viewsheds[unit]) == viewshed
+        for x, y in viewshed:
+            expected[unit.faction][y][x] += 1
+    for faction, counts in expected.items():
+        assert visibility.visible_mask(faction) == counts
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_visibility_matches_brute_force(seed):
+    assert play_checked(seed, check_visibility) > 0
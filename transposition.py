@@ -0,0 +1,111 @@
+import random
+
+# Здоровье хешируется корзинами: позиции, отличающиеся на пару очков, считаются одной
+HEALTH_BUCKET = 10
+
+# Тип оценки в таблице транспозиций (как в альфа-бета поиске)
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class ZobristHash:
+    """Инкрементальный хеш Зобриста позиции.
+
+    Каждому признаку (клетка, тип, фракция, корзина здоровья, флаги хода и
+    атаки) соответствует случайное 64-битное число; хеш поля - XOR чисел всех
+    юнитов. Подписчик сетки и изменений юнитов: перемещение, удар или смена
+    флагов меняет хеш за O(1). Фаза и фракция, которая ходит, добавляются в
+    key() при запросе.
+    """
+
+    def __init__(self, seed=0):
+        self.seed = seed
+        self.board = 0
+        self.parts = {}  # unit -> вклад юнита в хеш поля
+        self.cells = {}  # unit -> (x, y)
+        self.keys = {}  # признак -> случайное число
+
+    def feature_key(self, feature):
+        """Случайное число признака; зависит только от признака и seed, поэтому
+        совпадает в разных процессах"""
+        key = self.keys.get(feature)
+        if key is None:
+            key = random.Random(f"{self.seed}:{feature!r}").getrandbits(64)
+            self.keys[feature] = key
+        return key
+
+    def unit_key(self, unit, grid_x, grid_y):
+        return self.feature_key((grid_x, grid_y, unit.unit_type, unit.faction,
+                                 unit.health // HEALTH_BUCKET, unit.is_moved, unit.is_attacked))
+
+    def on_cell_occupied(self, grid_x, grid_y, unit):
+        self.cells[unit] = (grid_x, grid_y)
+        part = self.unit_key(unit, grid_x, grid_y)
+        self.parts[unit] = part
+        self.board ^= part
+
+    def on_cell_cleared(self, grid_x, grid_y, unit):
+        self.cells.pop(unit, None)
+        self.board ^= self.parts.pop(unit, 0)
+
+    def on_unit_changed(self, unit):
+        cell = self.cells.get(unit)
+        if cell is None:
+            return
+        part = self.unit_key(unit, *cell)
+        self.board ^= self.parts[unit] ^ part
+        self.parts[unit] = part
+
+    def key(self, phase, faction_name):
+        """Хеш позиции с учетом фазы и фракции, которая ходит"""
+        return self.board ^ self.feature_key(("phase", phase)) ^ self.feature_key(("side", faction_name))
+
+
+class TranspositionTable:
+    """Таблица транспозиций ограниченного размера для поисковых ботов.
+
+    Запись хранится в слоте key % size. При столкновении новая запись
+    вытесняет старую, если старая осталась от прошлого поиска (new_search)
+    или была посчитана на меньшую либо равную глубину.
+    """
+
+    def __init__(self, size=1 << 16):
+        self.size = size
+        self.slots = [None] * size  # (ключ, глубина, оценка, тип, ход, поколение)
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def new_search(self):
+        """Помечает записи прошлых поисков как заменяемые"""
+        self.generation += 1
+
+    def probe(self, key, depth=0):
+        """Запись (оценка, тип, ход) для ключа, посчитанная не мельче depth, или None"""
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key and entry[1] >= depth:
+            self.hits += 1
+            return entry[2], entry[3], entry[4]
+        self.misses += 1
+        return None
+
+    def best_move(self, key):
+        """Лучший ход из записи для ключа на любой глубине (для упорядочивания ходов)"""
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry[4]
+        return None
+
+    def store(self, key, depth, value, bound=EXACT, move=None):
+        index = key % self.size
+        entry = self.slots[index]
+        if (entry is None or entry[0] == key or entry[5] != self.generation or
+                entry[1] <= depth):
+            self.slots[index] = (key, depth, value, bound, move, self.generation)
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return sum(1 for entry in self.slots if entry is not None)
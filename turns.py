@@ -0,0 +1,89 @@
+import heapq
+import random
+
+
+def roll_initiative(names, roll=None):
+    """Бросок инициативы для фракций.
+
+    Каждая фракция бросает кубик; фракции с одинаковыми результатами
+    перебрасывают, пока порядок не станет однозначным. Возвращает
+    (порядок ходов, броски по фракциям).
+    """
+    if roll is None:
+        roll = lambda: random.randint(1, 6)
+    rolls = {name: [roll()] for name in names}
+    while True:
+        groups = {}
+        for name in names:
+            groups.setdefault(tuple(rolls[name]), []).append(name)
+        tied = [group for group in groups.values() if len(group) > 1]
+        if not tied:
+            break
+        for group in tied:
+            for name in group:
+                rolls[name].append(roll())
+    order = sorted(names, key=lambda name: [-value for value in rolls[name]])
+    return order, rolls
+
+
+class PhaseState:
+    """Состояние фаз хода одной фракции"""
+    __slots__ = ("index", "rolled", "dice")
+
+    def __init__(self):
+        self.index = -1
+        self.rolled = False
+        self.dice = None
+
+    def reset(self):
+        self.index = -1
+        self.rolled = False
+
+
+class TurnScheduler:
+    """Очередь ходов для любого числа фракций.
+
+    Фракции лежат в куче по (номер следующего хода, место в инициативе), так
+    что выбор следующей фракции стоит O(log F) и не зависит от числа юнитов.
+    Живые юниты считаются по событиям сетки, поэтому проверка победы - O(1).
+    Выбывшие фракции убираются из очереди, когда до них доходит ход.
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.alive = {name: 0 for name in self.names}
+        self.living = 0  # число фракций, у которых есть юниты на поле
+        self.phase_states = {name: PhaseState() for name in self.names}
+        self.queue = []
+
+    def on_cell_occupied(self, grid_x, grid_y, unit):
+        if self.alive[unit.faction] == 0:
+            self.living += 1
+        self.alive[unit.faction] += 1
+
+    def on_cell_cleared(self, grid_x, grid_y, unit):
+        self.alive[unit.faction] -= 1
+        if self.alive[unit.faction] == 0:
+            self.living -= 1
+
+    def start(self, order):
+        """Начинает очередь ходов в порядке инициативы"""
+        self.queue = [(0, rank, name) for rank, name in enumerate(order)]
+        heapq.heapify(self.queue)
+
+    def next_faction(self):
+        """Снимает с очереди следующую живую фракцию и ставит её в конец круга"""
+        while self.queue:
+            turn, rank, name = heapq.heappop(self.queue)
+            if self.alive[name]:
+                heapq.heappush(self.queue, (turn + 1, rank, name))
+                return name
+        return None
+
+    def winner(self):
+        """Единственная фракция с юнитами или None"""
+        if self.living != 1:
+            return None
+        for name, count in self.alive.items():
+            if count:
+                return name
@@ -3,30 +3,155 @@ from pygame.locals import *
 import random
 import json
 import os
+import itertools
+import hashlib
 
-def load_squad_data():
+# Файл с типами отрядов лежит рядом с модулем, а не в текущем каталоге
+SQUADS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'squads.json')
+
+# Обязательные поля описания отряда и их типы
+SQUAD_FIELDS = {
+    "name": str,
+    "health": int,
+    "attack": int,
+    "defense": int,
+    "attack_range": int,
+    "movement_range": int,
+    "cost": int,
+}
+
+# Данные по умолчанию совпадают с поставляемым squads.json
+DEFAULT_SQUAD_DATA = {
+    "warrior": {"name": "warrior", "health": 100, "attack": 25, "defense": 20, "attack_range": 1, "movement_range": 3, "cost": 100},
+    "archer": {"name": "archer", "health": 75, "attack": 30, "defense": 10, "attack_range": 3, "movement_range": 2, "cost": 150},
+    "knight": {"name": "knight", "health": 150, "attack": 35, "defense": 30, "attack_range": 1, "movement_range": 2, "cost": 200}
+}
+
+def parse_squad_data(text):
+    """Разбирает и проверяет содержимое squads.json, возвращает словарь по имени"""
+    squad_list = json.loads(text)
+    if not isinstance(squad_list, list) or not squad_list:
+        raise ValueError("ожидается непустой список отрядов")
+    
+    squad_data = {}
+    for index, squad in enumerate(squad_list):
+        if not isinstance(squad, dict):
+            raise ValueError(f"отряд #{index + 1}: ожидается объект")
+        for field, field_type in SQUAD_FIELDS.items():
+            value = squad.get(field)
+            if not isinstance(value, field_type) or isinstance(value, bool):
+                raise ValueError(f"отряд #{index + 1}: поле '{field}' должно быть {field_type.__name__}")
+            if field_type is int and value < 0:
+                raise ValueError(f"отряд #{index + 1}: поле '{field}' не может быть отрицательным")
+        if squad["name"] in squad_data:
+            raise ValueError(f"повторяющееся имя отряда '{squad['name']}'")
+        squad_data[squad["name"]] = squad
+    return squad_data
+
+def load_squad_data(path=SQUADS_PATH):
     """Загружает данные о типах отрядов из файла squads.json"""
     try:
-        with open('squads.json', 'r', encoding='utf-8') as file:
-            squad_data = json.load(file)
-        
-        # Преобразуем список в словарь для удобного доступа по имени
-        return {squad['name']: squad for squad in squad_data}
+        with open(path, 'r', encoding='utf-8') as file:
+            return parse_squad_data(file.read())
     except Exception as e:
         print(f"Ошибка загрузки squad_data: {e}")
         # Возвращаем данные по умолчанию в случае ошибки
-        return {
-            "warrior": {"health": 100, "attack": 20, "defense": 15, "movement_range": 2, "attack_range": 1, "cost": 100},
-            "archer": {"health": 80, "attack": 15, "defense": 10, "movement_range": 3, "attack_range": 3, "cost": 150},
-            "knight": {"health": 120, "attack": 25, "defense": 20, "movement_range": 1, "attack_range": 1, "cost": 200}
-        }
+        return {name: dict(data) for name, data in DEFAULT_SQUAD_DATA.items()}
 
 # Загружаем данные о типах отрядов при импорте модуля
 SQUAD_DATA = load_squad_data()
 
-class Unit(pygame.sprite.Sprite):
+def squad_data_hash(data=None):
+    """Короткий хэш описаний отрядов: по нему результаты разных версий squads.json не смешиваются"""
+    data = SQUAD_DATA if data is None else data
+    text = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+class SquadDataWatcher:
+    """Следит за squads.json и перезагружает SQUAD_DATA на месте.
+
+    poll() дешевый: пока не изменились время модификации и размер файла,
+    выполняется только os.stat. Содержимое проверяется один раз на каждый
+    новый хэш; при ошибке остаются последние корректные данные.
+    """
+    
+    def __init__(self, path=SQUADS_PATH, data=None):
+        self.path = path
+        self.data = SQUAD_DATA if data is None else data
+        self.stat_key = None
+        self.digest = None
+        self.last_error = None
+        try:
+            with open(path, 'rb') as file:
+                self.digest = hashlib.sha256(file.read()).hexdigest()
+            self.stat_key = self._stat_key()
+        except OSError:
+            pass
+    
+    def _stat_key(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def poll(self):
+        """Проверяет файл; возвращает True, если данные были перезагружены"""
+        try:
+            stat_key = self._stat_key()
+            if stat_key == self.stat_key:
+                return False
+            with open(self.path, 'rb') as file:
+                content = file.read()
+        except OSError as e:
+            self.last_error = str(e)
+            return False
+        
+        self.stat_key = stat_key
+        digest = hashlib.sha256(content).hexdigest()
+        if digest == self.digest:
+            return False
+        self.digest = digest
+        
+        try:
+            new_data = parse_squad_data(content.decode('utf-8'))
+        except (ValueError, UnicodeDecodeError) as e:
+            self.last_error = str(e)
+            print(f"Ошибка в squads.json, оставлены прежние данные: {e}")
+            return False
+        
+        self.last_error = None
+        # Меняем словарь на месте, чтобы ссылки из других модулей остались актуальными
+        self.data.clear()
+        self.data.update(new_data)
+        return True
+
+# Сквозная нумерация юнитов (id нужен для сетевой игры и сериализации)
+_unit_ids = itertools.count(1)
+
+def advance_unit_ids(last_id):
+    """Следующие новые юниты получат id больше last_id (после восстановления снимка)"""
+    global _unit_ids
+    _unit_ids = itertools.count(max(next(_unit_ids), last_id + 1))
+
+# Цвета юнитов по фракциям
+FACTION_COLORS = {
+    "faction1": (255, 0, 0),
+    "faction2": (0, 0, 255),
+    "faction3": (0, 170, 90),
+    "faction4": (230, 120, 0),
+    "faction5": (170, 0, 200),
+    "faction6": (0, 190, 220),
+    "faction7": (240, 100, 170),
+    "faction8": (120, 120, 40),
+}
+DEFAULT_FACTION_COLOR = (0, 0, 255)
+
+class Unit:
+    # Юнитов в больших симуляциях сотни тысяч: без __dict__ и без собственной
+    # поверхности. Картинку юнита дает SpriteAtlas (см. sprites.py).
+    __slots__ = ("id", "rect", "unit_type", "faction", "selected", "is_moved", "is_attacked",
+                 "health", "attack", "defense", "movement_range", "attack_range", "sight_range")
+    
     def __init__(self, x, y, unit_type, faction):
-        super().__init__()
+        self.id = next(_unit_ids)
         self.rect = pygame.Rect(x, y, 32, 32)
         self.unit_type = unit_type
         self.faction = faction
@@ -43,11 +168,12 @@ class Unit(pygame.sprite.Sprite):
         self.defense = unit_stats.get("defense", 15)
         self.movement_range = unit_stats.get("movement_range", 2)
         self.attack_range = unit_stats.get("attack_range", 1)
+        self.sight_range = unit_stats.get("sight_range", 6)
         
+    @property
+    def color(self):
         # Different colors for different factions
-        self.color = (255, 0, 0) if faction == "faction1" else (0, 0, 255)
-        self.image = pygame.Surface((30, 30))
-        self.image.fill(self.color)
+        return FACTION_COLORS.get(self.faction, DEFAULT_FACTION_COLOR)
         
     def draw(self, surface):
         # Простая отрисовка юнита
@@ -81,9 +207,12 @@ class Unit(pygame.sprite.Sprite):
             return True
         return False
     
-    def attack_unit(self, target):
-        # Расчет урона с учетом защиты
-        damage = max(0, self.attack - target.defense // 2)
+    def damage_against(self, target, defense_bonus=0):
+        # Расчет урона с учетом защиты (и прибавки от местности клетки цели)
+        return max(0, self.attack - (target.defense + defense_bonus) // 2)
+    
+    def attack_unit(self, target, defense_bonus=0):
+        damage = self.damage_against(target, defense_bonus)
         target.health = max(0, target.health - damage)
         return damage
     
@@ -0,0 +1,166 @@
+"""Масштабированный кадр поля для виджета любого размера и плотности пикселей.
+
+Поле рисуется в pygame в исходном размере, а на экран выводится кадр в
+пикселях устройства (размер виджета * devicePixelRatio). Кадр обновляется по
+плиткам: сравнивается с прошлым, и масштабируются только изменившиеся
+плитки. Масштабированные плитки кэшируются по содержимому отдельно для
+каждого из последних масштабов, поэтому одинаковые клетки поля (пустая
+сетка, туман) масштабируются один раз, а при возврате к недавнему масштабу
+плитки берутся из его кэша.
+
+При дробном масштабе плитка рисуется со сглаживанием вместе с полями из
+соседних пикселей исходного кадра и одним общим для кадра преобразованием,
+поэтому каждый пиксель устройства получается таким же, как при
+масштабировании кадра целиком: без швов и зазоров на стыках плиток.
+"""
+import math
+from collections import OrderedDict
+
+import numpy as np
+from PySide6.QtCore import Qt, QRect
+from PySide6.QtGui import QImage, QPainter
+
+# Размер плитки исходного кадра (совпадает с клеткой поля, чтобы швы шли по линиям сетки)
+TILE = 32
+
+# Предел кэша масштабированных плиток одного масштаба (при 4K плитка занимает ~50 КБ);
+# при переполнении вытесняются давно не использованные плитки
+MAX_TILES = 1024
+
+# Сколько последних масштабов хранят свой кэш плиток
+ZOOM_CACHES = 3
+
+# Масштаб, отличающийся от целого меньше чем на это, округляется до целого:
+# целый масштаб рисуется без сглаживания, четко и быстрее
+SNAP = 0.05
+
+
+class ScaledFrame:
+    """Кадр поля в пикселях устройства (image), обновляемый по плиткам"""
+
+    def __init__(self, width, height, tile=TILE):
+        self.width = width
+        self.height = height
+        self.tile = tile
+        self.columns = -(-width // tile)
+        self.rows = -(-height // tile)
+        self.zoom = None
+        self.size = (0, 0)
+        self.image = None
+        self.previous = None  # прошлый исходный кадр, массив (высота, ширина, 3)
+        self.tiles = OrderedDict()  # (байты плитки, размер после масштаба) -> QImage
+        self.zoom_tiles = OrderedDict()  # масштаб -> кэш плиток, от давнего к последнему
+        self.edges_x = []
+        self.edges_y = []
+        self.scale_x = 1.0
+        self.scale_y = 1.0
+        self.margin = 1
+        self.transform = Qt.SmoothTransformation
+
+    def resize(self, device_width, device_height):
+        """Подгоняет масштаб под область в пикселях устройства; True, если он изменился"""
+        zoom = max(min(device_width / self.width, device_height / self.height), 0.1)
+        if zoom >= 1 and abs(zoom - round(zoom)) < SNAP:
+            zoom = round(zoom)
+        if zoom == self.zoom:
+            return False
+        self.zoom = zoom
+        self.size = (round(self.width * zoom), round(self.height * zoom))
+        self.image = QImage(self.size[0], self.size[1], QImage.Format_RGB32)
+        self.previous = None
+        self.tiles = self.zoom_tiles.pop(zoom, None) or OrderedDict()
+        self.zoom_tiles[zoom] = self.tiles
+        while len(self.zoom_tiles) > ZOOM_CACHES:
+            self.zoom_tiles.popitem(last=False)
+        # Границы плиток в пикселях устройства: соседние плитки стыкуются без зазоров
+        self.edges_x = [round(min(column * self.tile, self.width) * zoom) for column in range(self.columns + 1)]
+        self.edges_y = [round(min(row * self.tile, self.height) * zoom) for row in range(self.rows + 1)]
+        self.transform = Qt.FastTransformation if zoom == int(zoom) else Qt.SmoothTransformation
+        # Общее преобразование кадра и поля плитки в пикселях исходного кадра:
+        # сглаживанию нужен соседний пиксель, а граница плитки в пикселях
+        # устройства округлена и может сдвинуться на полпикселя устройства
+        self.scale_x = self.size[0] / self.width
+        self.scale_y = self.size[1] / self.height
+        self.margin = math.ceil(0.5 / min(self.scale_x, self.scale_y)) + 1
+        return True
+
+    def update(self, frame_bytes):
+        """Обновляет кадр по новому исходному кадру (байты RGB, как pygame.image.tostring).
+
+        Возвращает QRect изменившейся области в пикселях устройства или None.
+        """
+        frame = np.frombuffer(frame_bytes, dtype=np.uint8).reshape(self.height, self.width, 3)
+        if self.previous is None:
+            changed = np.ones((self.rows, self.columns), dtype=bool)
+        else:
+            diff = np.zeros((self.rows * self.tile, self.columns * self.tile), dtype=bool)
+            diff[:self.height, :self.width] = (frame != self.previous).any(axis=2)
+            if self.transform != Qt.FastTransformation:
+                # Пиксель попадает и в поля соседних плиток: расширяем изменения на ширину поля
+                diff = dilate(diff, self.margin)
+            changed = diff.reshape(self.rows, self.tile, self.columns, self.tile).any(axis=(1, 3))
+        self.previous = frame
+        rows, columns = np.nonzero(changed)
+        if rows.size == 0:
+            return None
+
+        painter = QPainter(self.image)
+        for row, column in zip(rows.tolist(), columns.tolist()):
+            scaled = self._scaled_tile(frame, row, column)
+            painter.drawImage(self.edges_x[column], self.edges_y[row], scaled)
+        painter.end()
+        return QRect(self.edges_x[columns.min()], self.edges_y[rows.min()],
+                     self.edges_x[columns.max() + 1] - self.edges_x[columns.min()],
+                     self.edges_y[rows.max() + 1] - self.edges_y[rows.min()])
+
+    def _scaled_tile(self, frame, row, column):
+        """Плитка в пикселях устройства (из кэша или масштабированная заново)"""
+        target_width = self.edges_x[column + 1] - self.edges_x[column]
+        target_height = self.edges_y[row + 1] - self.edges_y[row]
+        x0, y0 = column * self.tile, row * self.tile
+        if self.transform == Qt.FastTransformation:
+            # Целый масштаб: границы плиток точные, пиксель повторяется без смешивания
+            left, top = x0, y0
+            block = frame[y0:y0 + self.tile, x0:x0 + self.tile]
+            offset = (0.0, 0.0)
+        else:
+            left, top = max(x0 - self.margin, 0), max(y0 - self.margin, 0)
+            block = frame[top:y0 + self.tile + self.margin, left:x0 + self.tile + self.margin]
+            # Сдвиг блока относительно плитки в пикселях устройства; от него
+            # зависит, как пиксели блока ложатся на пиксели устройства
+            offset = (round(left * self.scale_x - self.edges_x[column], 6),
+                      round(top * self.scale_y - self.edges_y[row], 6))
+        key = (block.tobytes(), block.shape[1], target_width, target_height, offset)
+        scaled = self.tiles.get(key)
+        if scaled is not None:
+            self.tiles.move_to_end(key)
+            return scaled
+        while len(self.tiles) >= MAX_TILES:
+            self.tiles.popitem(last=False)
+        source = QImage(key[0], block.shape[1], block.shape[0], block.shape[1] * 3, QImage.Format_RGB888)
+        if self.transform == Qt.FastTransformation:
+            # copy(): QImage не владеет буфером байтов ключа
+            scaled = source.scaled(target_width, target_height, Qt.IgnoreAspectRatio, self.transform).copy()
+        else:
+            scaled = QImage(target_width, target_height, QImage.Format_RGB32)
+            painter = QPainter(scaled)
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.translate(*offset)
+            painter.scale(self.scale_x, self.scale_y)
+            painter.drawImage(0, 0, source)
+            painter.end()
+        self.tiles[key] = scaled
+        return scaled
+
+
+def dilate(mask, radius):
+    """Расширяет отмеченную область маски на radius пикселей по обеим осям"""
+    result = mask.copy()
+    for step in range(1, radius + 1):
+        result[:, step:] |= mask[:, :-step]
+        result[:, :-step] |= mask[:, step:]
+    mask = result.copy()
+    for step in range(1, radius + 1):
+        result[step:, :] |= mask[:-step, :]
+        result[:-step, :] |= mask[step:, :]
+    return result
@@ -0,0 +1,145 @@
+# Дальность обзора по умолчанию (в клетках), если в squads.json не задан sight_range
+DEFAULT_SIGHT_RANGE = 6
+
+
+def line_cells(x0, y0, x1, y1):
+    """Возвращает клетки линии Брезенхэма между двумя клетками (без концов)"""
+    cells = []
+    if x0 == x1 and y0 == y1:
+        return cells
+    dx = abs(x1 - x0)
+    dy = -abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    err = dx + dy
+    x, y = x0, y0
+    while True:
+        e2 = 2 * err
+        if e2 >= dy:
+            err += dy
+            x += sx
+        if e2 <= dx:
+            err += dx
+            y += sy
+        if x == x1 and y == y1:
+            return cells
+        cells.append((x, y))
+
+
+class Visibility:
+    """Кэшируемая линия видимости и туман войны по сетке.
+
+    Для каждого юнита хранится его область видимости (viewshed), для каждой
+    фракции - счетчики того, сколько юнитов видит каждую клетку. При изменении
+    занятости клетки пересчитываются только юниты, чей обзор её покрывает.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid  # OccupancyGrid
+        self.width = grid.width
+        self.height = grid.height
+        self.viewsheds = {}  # unit -> frozenset клеток
+        self.unit_cells = {}  # unit -> (x, y)
+        self.counts = {}  # faction -> счетчики видимости [y][x]
+        self.dirty = set()
+        self.max_sight = DEFAULT_SIGHT_RANGE
+        self.version = 0
+
+    # --- Подписка на изменения сетки ---
+
+    def on_cell_occupied(self, grid_x, grid_y, unit):
+        self.unit_cells[unit] = (grid_x, grid_y)
+        self.max_sight = max(self.max_sight, self._sight(unit))
+        self._mark_around(grid_x, grid_y)
+        self.dirty.add(unit)
+
+    def on_cell_cleared(self, grid_x, grid_y, unit):
+        self._drop_viewshed(unit)
+        self.unit_cells.pop(unit, None)
+        self.dirty.discard(unit)
+        self._mark_around(grid_x, grid_y)
+
+    # --- Запросы ---
+
+    def line_of_sight(self, x0, y0, x1, y1):
+        """Проверяет, что между клетками нет юнитов-препятствий"""
+        for x, y in line_cells(x0, y0, x1, y1):
+            if not self.grid.is_free(x, y):
+                return False
+        return True
+
+    def unit_sees(self, unit, grid_x, grid_y):
+        """Видит ли юнит указанную клетку"""
+        self.refresh()
+        return (grid_x, grid_y) in self.viewsheds.get(unit, ())
+
+    def is_visible(self, faction, grid_x, grid_y):
+        """Видна ли клетка хотя бы одному юниту фракции"""
+        self.refresh()
+        counts = self.counts.get(faction)
+        return counts is not None and counts[grid_y][grid_x] > 0
+
+    def visible_mask(self, faction):
+        """Возвращает счетчики видимости фракции (клетка видна, если > 0)"""
+        self.refresh()
+        return self.counts.setdefault(faction, self._empty_counts())
+
+    def refresh(self):
+        """Пересчитывает обзор юнитов, затронутых изменениями сетки"""
+        if not self.dirty:
+            return
+        for unit in self.dirty:
+            self._drop_viewshed(unit)
+            if unit in self.unit_cells:
+                viewshed = self._compute_viewshed(unit)
+                self.viewsheds[unit] = viewshed
+                counts = self.counts.setdefault(unit.faction, self._empty_counts())
+                for x, y in viewshed:
+                    counts[y][x] += 1
+        self.dirty.clear()
+        self.version += 1
+
+    # --- Внутренние методы ---
+
+    def _sight(self, unit):
+        return getattr(unit, 'sight_range', DEFAULT_SIGHT_RANGE)
+
+    def _empty_counts(self):
+        return [[0] * self.width for _ in range(self.height)]
+
+    def _mark_around(self, grid_x, grid_y):
+        # Помечаем юнитов, в чей радиус обзора попадает изменившаяся клетка
+        for x, y, unit in self.grid.units_near(grid_x, grid_y, self.max_sight):
+            if unit not in self.unit_cells:
+                continue
+            sight = self._sight(unit)
+            if (x - grid_x) ** 2 + (y - grid_y) ** 2 <= sight * sight:
+                self.dirty.add(unit)
+
+    def _drop_viewshed(self, unit):
+        viewshed = self.viewsheds.pop(unit, None)
+        if viewshed:
+            counts = self.counts[unit.faction]
+            for x, y in viewshed:
+                counts[y][x] -= 1
+            self.version += 1
+
+    def _compute_viewshed(self, unit):
+        ux, uy = self.unit_cells[unit]
+        sight = self._sight(unit)
+        # Окрестность обзора один раз переводится в списки: проверки линий
+        # видимости идут по ним, а не по отдельным элементам массива
+        window, x0, y0 = self.grid.window(ux, uy, sight)
+        occupied = window.tolist()
+        cells = []
+        for y in range(y0, y0 + len(occupied)):
+            for x in range(x0, x0 + len(occupied[0])):
+                if (x - ux) ** 2 + (y - uy) ** 2 > sight * sight:
+                    continue
+                for lx, ly in line_cells(ux, uy, x, y):
+                    if occupied[ly - y0][lx - x0]:
+                        break
+                else:
+                    cells.append((x, y))
+        return frozenset(cells)
+